@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""Benchmarks for MyWhisper
+
+    python benchmark.py models fixtures/*.wav
+    python benchmark.py models --models tiny.en distil-small.en fixtures/*.wav
+    python benchmark.py chunked long_meeting.wav --workers 1 2 4 8
+    python benchmark.py batch fixtures/*.wav --batch-size 8
+    python benchmark.py priority fixtures/*.wav --background long_meeting.wav
+    python benchmark.py preprocessing noisy_fixtures/*.wav
+    python benchmark.py text --rules 1000 10000 50000
+"""
+
+import sys
+import os
+import time
+import wave
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from src.config import Config
+from src.model_registry import ModelRegistry, size_label
+from src.model_repository import ModelRepository
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def audio_duration(path: str) -> float:
+    with wave.open(path, 'rb') as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+
+def decode(model, path: str, language: str, **options) -> tuple:
+    # Returns (seconds, text, segments) for one full decode of `path`
+    start = time.perf_counter()
+    segments, info = model.transcribe(path, language=language, **options)
+    segments = list(segments)
+    elapsed = time.perf_counter() - start
+    text = " ".join(segment.text.strip() for segment in segments)
+    return elapsed, text, segments
+
+
+def benchmark_models(args):
+    from src.transcriber import WhisperTranscriber
+
+    config = Config()
+    registry = ModelRegistry(config.get_custom_models())
+    repository = ModelRepository.from_config(config.get_model_repository_config())
+    model_names = args.models or registry.list_models()
+    total_audio = sum(audio_duration(path) for path in args.audio)
+
+    print(f"{'model':<20} {'size':>10} {'langs':>13} {'load s':>7} {'decode s':>9} {'RTF':>6}  text")
+    for model_name in model_names:
+        info = registry.get_info(model_name)
+        try:
+            start = time.perf_counter()
+            transcriber = WhisperTranscriber(
+                model_name=model_name,
+                language=args.language,
+                model_repository=repository,
+                model_registry=registry
+            )
+            load_time = time.perf_counter() - start
+        except Exception as e:
+            print(f"{model_name:<20} failed to load: {e}")
+            continue
+
+        decode_time = 0.0
+        texts = []
+        for path in args.audio:
+            elapsed, text, _ = decode(transcriber.model, path, args.language, beam_size=args.beam_size)
+            decode_time += elapsed
+            texts.append(text)
+
+        size = size_label(info) or "?"
+        print(
+            f"{model_name:<20} {size:>10} {info['languages']:>13} {load_time:>7.2f} "
+            f"{decode_time:>9.2f} {decode_time / total_audio:>6.3f}  {' | '.join(texts)[:60]}"
+        )
+
+
+def load_samples(path: str):
+    import numpy as np
+
+    with wave.open(path, 'rb') as wf:
+        frames = wf.readframes(wf.getnframes())
+        channels = wf.getnchannels()
+    samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def benchmark_chunked(args):
+    from src.transcriber import WhisperTranscriber
+    from src.chunking import split_at_silences
+
+    config = Config()
+    samples = load_samples(args.audio)
+    duration = len(samples) / 16000
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or [w for w in (1, 2, 4, 8, 16) if w <= cores]
+    print(f"{args.audio}: {duration:.0f} s, {len(split_at_silences(samples))} chunks, {cores} cores")
+
+    baseline = None
+    print(f"{'workers':>7} {'threads/worker':>14} {'wall s':>8} {'RTF':>6} {'speedup':>8}")
+    for workers in worker_counts:
+        transcriber = WhisperTranscriber(
+            model_name=args.model or config.get_model(),
+            language=args.language,
+            model_repository=ModelRepository.from_config(config.get_model_repository_config()),
+            model_registry=ModelRegistry(config.get_custom_models()),
+            cpu_threads=max(1, cores // workers),
+            num_workers=workers,
+            # workers=1 is the plain sequential path
+            long_audio={"enabled": workers > 1, "min_duration_s": 0}
+        )
+        start = time.perf_counter()
+        transcriber.transcribe(samples)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>7} {max(1, cores // workers):>14} {elapsed:>8.2f} "
+            f"{elapsed / duration:>6.3f} {baseline / elapsed:>7.2f}x"
+        )
+
+
+def benchmark_batch(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.transcriber import WhisperTranscriber
+
+    config = Config()
+    clips = [load_samples(path) for path in args.audio]
+    clips = [clip for clip in clips if len(clip) <= 30 * 16000]
+    if not clips:
+        print("No clips of 30 s or less")
+        return
+    audio_s = sum(len(clip) for clip in clips) / 16000
+    print(f"{len(clips)} clips, {audio_s:.0f} s of audio submitted at once")
+
+    print(f"{'batching':>8} {'idle latency ms':>15} {'wall s':>8} {'audio s/s':>10}")
+    for enabled in (False, True):
+        transcriber = WhisperTranscriber(
+            model_name=args.model or config.get_model(),
+            language=args.language,
+            model_repository=ModelRepository.from_config(config.get_model_repository_config()),
+            model_registry=ModelRegistry(config.get_custom_models()),
+            batching={"enabled": enabled, "window_ms": args.window_ms, "max_batch_size": args.batch_size}
+        )
+        transcriber.transcribe(clips[0])
+        # A lone utterance with an empty queue must not get slower
+        start = time.perf_counter()
+        transcriber.transcribe(clips[0])
+        idle_ms = (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(max_workers=len(clips)) as executor:
+            start = time.perf_counter()
+            list(executor.map(transcriber.transcribe, clips))
+            elapsed = time.perf_counter() - start
+        print(f"{'on' if enabled else 'off':>8} {idle_ms:>15.0f} {elapsed:>8.2f} {audio_s / elapsed:>10.1f}")
+
+
+def benchmark_priority(args):
+    import threading
+    from src.transcriber import WhisperTranscriber, INTERACTIVE, BACKGROUND
+
+    config = Config()
+    clips = [load_samples(path) for path in args.audio]
+    background = load_samples(args.background)
+    transcriber = WhisperTranscriber(
+        model_name=args.model or config.get_model(),
+        language=args.language,
+        model_repository=ModelRepository.from_config(config.get_model_repository_config()),
+        model_registry=ModelRegistry(config.get_custom_models())
+    )
+    transcriber.transcribe(clips[0])
+
+    def interactive_latencies():
+        latencies = []
+        for _ in range(args.rounds):
+            for clip in clips:
+                start = time.perf_counter()
+                transcriber.transcribe(clip)
+                latencies.append((time.perf_counter() - start) * 1000)
+                # Dictation comes in bursts, not back to back
+                time.sleep(args.pause)
+        return sorted(latencies)
+
+    def under_load(priority):
+        if priority is None:
+            return interactive_latencies()
+        stopped = threading.Event()
+        current = []
+
+        def archive():
+            while not stopped.is_set():
+                job = transcriber.create_job(background, priority=priority)
+                current[:] = [job]
+                transcriber.transcribe(background, job=job)
+
+        thread = threading.Thread(target=archive, daemon=True)
+        thread.start()
+        time.sleep(1.0)
+        try:
+            return interactive_latencies()
+        finally:
+            stopped.set()
+            for job in current:
+                job.cancel()
+            thread.join()
+
+    print(f"{len(clips)} clips x {args.rounds} rounds; background: {len(background) / 16000:.0f} s file")
+    print(f"{'load':<36} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for label, priority in (
+        ("none", None),
+        ("background job, background priority", BACKGROUND),
+        ("background job, same priority", INTERACTIVE),
+    ):
+        latencies = under_load(priority)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{label:<36} {latencies[len(latencies) // 2]:>8.0f} {p95:>8.0f} {latencies[-1]:>8.0f}")
+
+
+def preprocess(samples, chain, block_size: int) -> tuple:
+    # Runs the chain block by block, as AudioCapture does; returns the
+    # processed int16 samples and the time spent
+    import numpy as np
+
+    chain.reset()
+    blocks = []
+    start = time.perf_counter()
+    for offset in range(0, len(samples), block_size):
+        blocks.append(chain.process(samples[offset:offset + block_size].reshape(-1, 1)))
+    elapsed = time.perf_counter() - start
+    return np.concatenate(blocks).reshape(-1), elapsed
+
+
+def benchmark_preprocessing(args):
+    import numpy as np
+    from faster_whisper import WhisperModel
+    from src.audio_processing import PreprocessingChain
+
+    config = Config()
+    audio_config = config.get_audio_config()
+    preprocessing = dict(audio_config.get("preprocessing") or Config.DEFAULT_CONFIG["audio"]["preprocessing"])
+    preprocessing["enabled"] = True
+    if args.all_stages:
+        for stage in ("noise_gate", "agc"):
+            preprocessing[stage] = dict(preprocessing.get(stage, {}), enabled=True)
+    chain = PreprocessingChain.from_config(preprocessing, 16000)
+    block_size = audio_config.get("chunk_size", 1024)
+
+    model_name = args.model or config.get_model()
+    path = ModelRepository.from_config(config.get_model_repository_config()).resolve(model_name)
+    model = WhisperModel(path or model_name, device="cpu", compute_type="int8")
+
+    print(f"stages: {', '.join(type(stage).__name__ for stage in chain.stages)}")
+    print(f"{'fixture':<24} {'chain':<5} {'prep RTF':>9} {'decode s':>9} {'fallbacks':>9}  text")
+    totals = {"raw": [0.0, 0], "chain": [0.0, 0]}
+    for fixture in args.audio:
+        raw = (load_samples(fixture) * 32768.0).astype(np.int16)
+        processed, prep_time = preprocess(raw, chain, block_size)
+        duration = len(raw) / 16000
+
+        for label, samples, prep_rtf in (("raw", raw, None), ("chain", processed, prep_time / duration)):
+            start = time.perf_counter()
+            segments, _ = model.transcribe(samples.astype(np.float32) / 32768.0, language=args.language)
+            segments = list(segments)
+            elapsed = time.perf_counter() - start
+            # Segments decoded above temperature 0 needed at least one fallback
+            fallbacks = sum(1 for segment in segments if segment.temperature > 0)
+            totals[label][0] += elapsed
+            totals[label][1] += fallbacks
+            text = " ".join(segment.text.strip() for segment in segments)
+            rtf = f"{prep_rtf:>9.4f}" if prep_rtf is not None else f"{'-':>9}"
+            print(f"{os.path.basename(fixture)[:24]:<24} {label:<5} {rtf} {elapsed:>9.2f} {fallbacks:>9}  {text[:50]}")
+
+    for label, (decode_time, fallbacks) in totals.items():
+        print(f"{'total':<24} {label:<5} {'':>9} {decode_time:>9.2f} {fallbacks:>9}")
+
+
+def benchmark_text(args):
+    import re
+    import random
+    from src.text_processor import TextProcessor, VocabularyAutomaton
+
+    rng = random.Random(42)
+    syllables = ["ka", "lo", "mi", "tren", "zu", "vor", "pe", "dax", "qui", "ro", "sha", "nim"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+
+    filler = [word() for _ in range(2000)]
+    print(f"{'rules':>7} {'compile ms':>11} {'words':>7} {'automaton ms':>13} {'regex loop ms':>14} {'speedup':>8}")
+    for count in args.rules:
+        rules = {" ".join(word() for _ in range(rng.randint(1, 3))): word().capitalize() for _ in range(count)}
+        phrases = list(rules)
+
+        start = time.perf_counter()
+        processor = TextProcessor(spoken_commands=False)
+        processor.automaton = VocabularyAutomaton(rules)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        # A dictation-sized text where about one word in ten hits a rule
+        words = []
+        while len(words) < args.words:
+            words.append(rng.choice(phrases) if rng.random() < 0.1 else rng.choice(filler))
+        text = " ".join(words)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            processor.process(text)
+        automaton_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+        # The naive approach: one precompiled regex per rule, applied in turn
+        patterns = [
+            (re.compile(r"\b" + re.escape(phrase) + r"\b", re.IGNORECASE), replacement)
+            for phrase, replacement in rules.items()
+        ]
+        start = time.perf_counter()
+        result = text
+        for pattern, replacement in patterns:
+            result = pattern.sub(replacement, result)
+        regex_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{count:>7} {compile_ms:>11.1f} {len(words):>7} {automaton_ms:>13.2f} "
+            f"{regex_ms:>14.2f} {regex_ms / automaton_ms:>7.0f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MyWhisper benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    models = subparsers.add_parser("models", help="load and decode time for each registered model")
+    models.add_argument("audio", nargs="+", help="16 kHz WAV fixtures")
+    models.add_argument("--models", nargs="+", help="model names or paths (default: whole catalog)")
+    models.add_argument("--language", default="en")
+    models.add_argument("--beam-size", type=int, default=5)
+    models.set_defaults(func=benchmark_models)
+
+    chunked = subparsers.add_parser("chunked", help="wall-clock speedup of parallel chunked decoding vs workers")
+    chunked.add_argument("audio", help="a long (multi-minute) 16 kHz WAV recording")
+    chunked.add_argument("--workers", nargs="+", type=int, help="worker counts (default: powers of two up to the core count)")
+    chunked.add_argument("--model")
+    chunked.add_argument("--language", default="en")
+    chunked.set_defaults(func=benchmark_chunked)
+
+    batch = subparsers.add_parser("batch", help="throughput of concurrent short clips with and without batching")
+    batch.add_argument("audio", nargs="+", help="16 kHz WAV clips of up to 30 s, decoded concurrently")
+    batch.add_argument("--model")
+    batch.add_argument("--language", default="en")
+    batch.add_argument("--batch-size", type=int, default=8)
+    batch.add_argument("--window-ms", type=float, default=20)
+    batch.set_defaults(func=benchmark_batch)
+
+    priority = subparsers.add_parser(
+        "priority",
+        help="interactive latency percentiles with and without a prioritized background job"
+    )
+    priority.add_argument("audio", nargs="+", help="short 16 kHz WAV utterances")
+    priority.add_argument("--background", required=True, help="a long 16 kHz WAV transcribed in the background")
+    priority.add_argument("--rounds", type=int, default=5)
+    priority.add_argument("--pause", type=float, default=0.5, help="seconds between utterances")
+    priority.add_argument("--model")
+    priority.add_argument("--language", default="en")
+    priority.set_defaults(func=benchmark_priority)
+
+    preprocessing = subparsers.add_parser(
+        "preprocessing",
+        help="decode time and temperature fallbacks with and without the capture preprocessing chain"
+    )
+    preprocessing.add_argument("audio", nargs="+", help="noisy 16 kHz WAV fixtures")
+    preprocessing.add_argument("--model")
+    preprocessing.add_argument("--language", default="en")
+    preprocessing.add_argument("--all-stages", action="store_true", help="also enable the noise gate and AGC")
+    preprocessing.set_defaults(func=benchmark_preprocessing)
+
+    text = subparsers.add_parser("text", help="vocabulary automaton vs a per-rule regex loop")
+    text.add_argument("--rules", nargs="+", type=int, default=[100, 1000, 10000, 50000])
+    text.add_argument("--words", type=int, default=200, help="words per processed text")
+    text.add_argument("--repeat", type=int, default=100)
+    text.set_defaults(func=benchmark_text)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
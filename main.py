@@ -2,104 +2,182 @@
 
 import sys
 import os
+import json
+import time
 import signal
-import logging
 import threading
+import argparse
+import logging
+from pathlib import Path
 from src.audio_capture import AudioCapture
 from src.transcriber import WhisperTranscriber
-from src.hotkey_manager import HotkeyManager
 from src.text_inserter import TextInserter
-from src.gui.system_tray import SystemTrayIcon
+from src.model_repository import ModelRepository
+from src.model_registry import ModelRegistry
+from src.app_core import AppCore, RecordingState
+from src.text_processor import TextProcessor
+from src.history import TranscriptHistory
 from src.config import Config
+from src import metrics, profiling
+from src.metrics import MetricsExporter
+from src.log_setup import setup_logging
+
+# Heavy third-party packages (faster_whisper, sounddevice, numpy, pyautogui,
+# pystray, PIL, PyQt6) are imported where they are first used, so that the
+# hotkey listener is up long before the model has finished loading.
+_IMPORT_TIME = time.perf_counter()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
 class MyWhisperApp:
-    def __init__(self):
+    def __init__(
+        self,
+        headless: bool = False,
+        output: str = "stdout",
+        control_socket: str = None,
+        config: Config = None,
+        audio_stream_factory=None,
+        hotkey_listener_factory=None,
+        text_inserter=None
+    ):
+        # The last four are injection points for the replay harness
+        # (replay.py): a config file, fake audio stream and keyboard
+        # listener, and a text inserter that records instead of typing
         logger.info("Initializing MyWhisper...")
+        self.headless = headless
 
-        self.config = Config()
+        self.config = config or Config()
 
         audio_config = self.config.get_audio_config()
         self.audio_capture = AudioCapture(
             sample_rate=audio_config["sample_rate"],
             channels=audio_config["channels"],
-            chunk_size=audio_config["chunk_size"]
+            chunk_size=audio_config["chunk_size"],
+            endpointing=audio_config.get("endpointing"),
+            stream_factory=audio_stream_factory,
+            preprocessing=audio_config.get("preprocessing"),
+            device=audio_config.get("device"),
+            latency=audio_config.get("latency", "low")
         )
+        self.endpointing_enabled = audio_config.get("endpointing", {}).get("enabled", False)
+
+        inference_config = self.config.get_inference_config()
+        transcriber_options = {}
+        if inference_config.get("out_of_process"):
+            from src.inference_worker import OutOfProcessTranscriber
+            transcriber_class = OutOfProcessTranscriber
+            transcriber_options["prewarm_spare"] = inference_config.get("prewarm_spare", True)
+        else:
+            transcriber_class = WhisperTranscriber
 
-        self.transcriber = WhisperTranscriber(
+        self.transcriber = transcriber_class(
+            **transcriber_options,
             model_name=self.config.get_model(),
-            language=self.config.get_language()
+            language=self.config.get_language(),
+            preempt_policy=self.config.get_preempt_policy(),
+            load_async=True,
+            model_repository=ModelRepository.from_config(self.config.get_model_repository_config()),
+            model_registry=ModelRegistry(self.config.get_custom_models()),
+            compute_type=inference_config.get("compute_type", "auto"),
+            cpu_threads=inference_config.get("cpu_threads", 0),
+            beam_size=inference_config.get("beam_size", 5),
+            num_workers=inference_config.get("num_workers", 1),
+            long_audio=inference_config.get("long_audio"),
+            language_detection=self.config.get_language_detection_config(),
+            idle_unload=inference_config.get("idle_unload"),
+            batching=inference_config.get("batching")
         )
 
-        self.text_inserter = TextInserter()
+        if headless:
+            from src.headless import TranscriptSink, ControlServer, default_socket_path
+            from src.process_stats import ProcessStats
+            self.text_inserter = TranscriptSink(output)
+            self.process_stats = ProcessStats()
+            self.control_server = ControlServer(
+                control_socket or default_socket_path(),
+                self.handle_hotkey,
+                self.get_status,
+                sink=self.text_inserter,
+                on_quit=self.quit,
+                transcribe=self.transcribe_file,
+                profile=self.profile_next
+            )
+        else:
+            self.text_inserter = text_inserter or TextInserter()
+            self.control_server = None
+        self.streaming_insert = self.config.get_streaming_insert()
+        self.text_processor = TextProcessor.from_config(self.config.get_text_processing_config())
+        self.history = TranscriptHistory.from_config(self.config.get_history_config())
+        self.metrics_exporter = MetricsExporter.from_config(self.config.get_metrics_config())
+        if self.metrics_exporter:
+            metrics.REGISTRY.add_collector(self._collect_metrics)
+
+        self.core = AppCore(
+            self.audio_capture,
+            self.transcriber,
+            self.text_inserter,
+            streaming_insert=self.streaming_insert,
+            text_processor=self.text_processor,
+            history=self.history,
+            on_state_change=self.on_recording_state_change
+        )
 
         # Check if we're on Wayland
-        self.is_wayland = os.environ.get('XDG_SESSION_TYPE') == 'wayland'
+        self.is_wayland = os.environ.get('XDG_SESSION_TYPE') == 'wayland' and not headless
 
-        if self.is_wayland:
+        if headless:
+            logger.info("Headless mode - control socket only")
+            self.hotkey_manager = None
+            self.system_tray = None
+            self.wayland_window = None
+            self._update_endpointing(self.config.get_recording_mode())
+        elif self.is_wayland:
             logger.info("Wayland detected - using GUI mode")
             self.hotkey_manager = None
             self.system_tray = None
             self.wayland_window = None
         else:
             logger.info("X11 detected - using hotkey mode")
-            self.hotkey_manager = HotkeyManager()
+            from src.hotkey_manager import HotkeyManager
+            self.hotkey_manager = HotkeyManager(listener_factory=hotkey_listener_factory)
             self.hotkey_manager.set_hotkey(self.config.get_hotkey())
+            self.hotkey_manager.set_cancel_hotkey(self.config.get_cancel_hotkey())
             self.hotkey_manager.set_recording_mode(self.config.get_recording_mode())
+            self._update_endpointing(self.config.get_recording_mode())
             self.hotkey_manager.register_callback(self.handle_hotkey)
-            self.system_tray = SystemTrayIcon(self)
+            # Built in run(), once the hotkey listener is already up
+            self.system_tray = None
             self.wayland_window = None
 
-        self.is_recording = False
-        self.running = True
+        self.config.subscribe(self._on_config_changed)
+        profiling_config = self.config.get_profiling_config()
+        if profiling_config.get("utterances", 0) > 0:
+            self.profile_next(profiling_config["utterances"])
 
     def handle_hotkey(self, action: str):
-        logger.debug(f"Hotkey action: {action}")
-
-        if action == "start":
-            self.start_recording()
-        elif action == "stop":
-            self.stop_recording()
-        elif action == "toggle":
-            if self.is_recording:
-                self.stop_recording()
-            else:
-                self.start_recording()
+        # Called from the pynput, PortAudio and tray threads; the core
+        # serializes everything on its event loop
+        self.core.post(action)
+
+    @property
+    def is_recording(self) -> bool:
+        return self.core.is_recording
 
     def start_recording(self):
-        if not self.is_recording:
-            logger.info("Starting recording...")
-            self.is_recording = True
-            self.system_tray.update_recording_status(True)
-            self.audio_capture.start_recording()
+        self.core.post("start")
 
     def stop_recording(self):
-        if self.is_recording:
-            logger.info("Stopping recording...")
-            self.is_recording = False
-            self.system_tray.update_recording_status(False)
-
-            audio_file = self.audio_capture.stop_recording()
-            if audio_file:
-                self.transcriber.transcribe_async(
-                    audio_file,
-                    self.on_transcription_complete
-                )
-
-    def on_transcription_complete(self, text: str):
-        if text:
-            logger.info(f"Transcription complete: {text}")
-            success = self.text_inserter.insert_at_cursor(text)
-            if success:
-                logger.info("Text inserted successfully")
-            else:
-                logger.error("Failed to insert text")
+        self.core.post("stop")
+
+    def cancel(self):
+        self.core.post("cancel")
+
+    def on_recording_state_change(self, state: RecordingState):
+        if self.system_tray:
+            self.system_tray.update_recording_status(
+                state in (RecordingState.STARTING, RecordingState.RECORDING)
+            )
 
     def get_recording_mode(self) -> str:
         return self.config.get_recording_mode()
@@ -107,10 +185,115 @@ class MyWhisperApp:
     def set_recording_mode(self, mode: str):
         self.config.set_recording_mode(mode)
         self.hotkey_manager.set_recording_mode(mode)
+        self._update_endpointing(mode)
+
+    def _update_endpointing(self, mode: str):
+        # In push-to-talk the key release already marks the end of speech
+        if self.endpointing_enabled and mode == "toggle":
+            self.audio_capture.set_endpoint_callback(self.on_end_of_speech)
+        else:
+            self.audio_capture.set_endpoint_callback(None)
+
+    def _on_config_changed(self, changed: set):
+        # Runs on the config watcher thread after the file was edited by hand
+        if self.hotkey_manager:
+            if "hotkey" in changed:
+                self.hotkey_manager.set_hotkey(self.config.get_hotkey())
+            if "cancel_hotkey" in changed:
+                self.hotkey_manager.set_cancel_hotkey(self.config.get_cancel_hotkey())
+            if "recording_mode" in changed:
+                self.hotkey_manager.set_recording_mode(self.config.get_recording_mode())
+        if "recording_mode" in changed:
+            self._update_endpointing(self.config.get_recording_mode())
+        if "language" in changed:
+            self.transcriber.set_language(self.config.get_language())
+        if "preempt_policy" in changed:
+            self.transcriber.set_preempt_policy(self.config.get_preempt_policy())
+        if "streaming_insert" in changed:
+            self.streaming_insert = self.config.get_streaming_insert()
+            self.core.streaming_insert = self.streaming_insert
+        if "model" in changed:
+            threading.Thread(
+                target=self.transcriber.change_model, args=(self.config.get_model(),), daemon=True
+            ).start()
+
+        restart = changed & {"audio", "inference", "history", "text_processing", "logging", "model_repository"}
+        if restart:
+            logger.info(f"Changes to {', '.join(sorted(restart))} take effect after a restart")
+
+    def on_end_of_speech(self):
+        # Same path as a second hotkey press, so tray state stays in sync
+        self.handle_hotkey("stop")
+
+    def get_status(self) -> dict:
+        status = {
+            "state": self.core.state.value,
+            "model": self.transcriber.get_current_model(),
+            "model_ready": self.transcriber.model_ready,
+            "active_jobs": self.transcriber.get_active_job_count(),
+            "memory": self.transcriber.get_memory_stats(),
+            "last_recording": self.audio_capture.last_recording_stats,
+            "language_detection": self.transcriber.get_language_stats(),
+        }
+        if self.headless:
+            status.update(self.process_stats.sample())
+        return status
+
+    def _collect_metrics(self):
+        # Runs on the exporter thread just before each scrape or file write
+        memory = self.transcriber.get_memory_stats()
+        metrics.RESIDENT_MEMORY_BYTES.set(int(memory["rss_mb"] * 1024 * 1024))
+        metrics.QUEUE_DEPTH.set(self.core.queue_depth)
+        loaded = memory["model_loaded"] and self.transcriber.model_ready
+        metrics.MODEL_LOADED.clear()
+        metrics.MODEL_LOADED.set(int(loaded), model=self.transcriber.get_current_model())
+
+    def transcribe_file(self, path: str):
+        # Background priority: dictation is served first and the file job
+        # pauses between segments whenever an utterance is decoding
+        def run():
+            text = self.transcriber.transcribe_file(path)
+            if text is None:
+                return
+            output = Path(path).with_suffix(".txt")
+            try:
+                output.write_text(text + "\n", encoding="utf-8")
+                logger.info(f"Transcript of {path} written to {output}")
+            except OSError as e:
+                logger.error(f"Failed to write {output}: {e}")
+
+        threading.Thread(target=run, name="file-transcription", daemon=True).start()
+
+    def profile_next(self, utterances: int) -> bool:
+        profiling_config = self.config.get_profiling_config()
+        return profiling.start(
+            utterances,
+            mode=profiling_config.get("mode", "sampling"),
+            interval_ms=profiling_config.get("interval_ms", 5),
+            directory=profiling_config.get("directory", profiling.DEFAULT_DIRECTORY)
+        )
+
+    def get_recent_history(self, limit: int = 10) -> list:
+        return self.history.recent(limit) if self.history else []
+
+    def search_history(self, query: str, limit: int = 20) -> list:
+        return self.history.search(query, limit) if self.history else []
+
+    def reinsert(self, text: str):
+        self.core.reinsert(text)
 
     def get_model(self) -> str:
         return self.config.get_model()
 
+    def get_available_models(self) -> list:
+        return self.transcriber.get_available_models()
+
+    def describe_model(self, model_name: str) -> str:
+        return self.transcriber.model_registry.describe(model_name)
+
+    def get_model_family(self, model_name: str) -> str:
+        return self.transcriber.model_registry.get_info(model_name)["family"]
+
     def change_model(self, model_name: str):
         if self.transcriber.change_model(model_name):
             self.config.set_model(model_name)
@@ -119,8 +302,17 @@ class MyWhisperApp:
 
     def run(self):
         logger.info("Starting MyWhisper...")
-
-        if self.is_wayland:
+        self.config.start_watching()
+        if self.metrics_exporter:
+            self.metrics_exporter.start()
+
+        if self.headless:
+            if not self.control_server.start():
+                sys.exit(1)
+            self.core.run()
+            self._cleanup()
+            sys.exit(0)
+        elif self.is_wayland:
             # Use PyQt6 for Wayland
             from PyQt6.QtWidgets import QApplication
             from src.wayland_window import WaylandWindow
@@ -135,33 +327,81 @@ class MyWhisperApp:
             sys.exit(app.exec())
         else:
             # Use hotkeys for X11
-            if self.hotkey_manager:
-                self.hotkey_manager.start()
+            self.start_hotkey_listener()
 
-            if self.system_tray:
-                self.system_tray.run()
+            from src.gui.system_tray import SystemTrayIcon
+            self.system_tray = SystemTrayIcon(self)
+            self.system_tray.run()
 
-            try:
-                while self.running:
-                    threading.Event().wait(1)
-            except KeyboardInterrupt:
-                logger.info("Received keyboard interrupt")
-                self.quit()
+            # Blocks until quit() or SIGINT/SIGTERM
+            self.core.run()
+            self._cleanup()
+            sys.exit(0)
+
+    def start_hotkey_listener(self) -> float:
+        if not self.hotkey_manager:
+            return 0.0
+        self.hotkey_manager.start()
+        ready = process_uptime()
+        logger.info(f"Hotkey listener ready {ready * 1000:.0f} ms after launch")
+        return ready
 
     def quit(self):
         logger.info("Shutting down MyWhisper...")
-        self.running = False
 
-        if self.is_recording:
-            self.stop_recording()
+        if self.is_wayland:
+            self._cleanup()
+        else:
+            # run() does the cleanup once the core loop has exited
+            self.core.stop()
 
+    def _cleanup(self):
         if self.hotkey_manager:
             self.hotkey_manager.stop()
 
+        if self.system_tray:
+            self.system_tray.stop()
+
+        if self.control_server:
+            self.control_server.stop()
+
         self.audio_capture.cleanup()
+        self.transcriber.shutdown()
 
-        if not self.is_wayland:
-            sys.exit(0)
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+
+        # Keep what an unfinished profiling session has collected
+        profiling.stop()
+
+        if self.history:
+            self.history.close()
+
+        self.config.close()
+
+
+def process_uptime() -> float:
+    # Seconds since the process was launched, interpreter startup included
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORT_TIME
+
+
+def startup_benchmark(app: MyWhisperApp) -> dict:
+    hotkey_ready = app.start_hotkey_listener()
+    app.transcriber.wait_until_ready()
+    result = {
+        "hotkey_ready_ms": round(hotkey_ready * 1000, 1),
+        "model_ready_ms": round(process_uptime() * 1000, 1),
+    }
+    if app.hotkey_manager:
+        app.hotkey_manager.stop()
+    return result
 
 
 def signal_handler(signum, frame):
@@ -169,11 +409,303 @@ def signal_handler(signum, frame):
     sys.exit(0)
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="MyWhisper voice dictation")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="no tray, window or hotkeys; control through a unix socket (see `ctl`)"
+    )
+    parser.add_argument(
+        "--output",
+        default="stdout",
+        metavar="TARGET",
+        help="headless transcript output: stdout, socket or a file path (default: stdout)"
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="headless control socket (default: $XDG_RUNTIME_DIR/mywhisper.sock)"
+    )
+    parser.add_argument(
+        "--startup-benchmark",
+        action="store_true",
+        help="print time until the hotkey listener and the model are ready, then exit"
+    )
+    parser.add_argument(
+        "--prefetch",
+        nargs="+",
+        metavar="MODEL",
+        help="download (or copy a local CTranslate2 directory) into the model repository, then exit"
+    )
+    parser.add_argument(
+        "--verify",
+        nargs="*",
+        metavar="MODEL",
+        help="check repository models against their checksums (all models if none given), then exit"
+    )
+    parser.add_argument(
+        "--repository",
+        metavar="PATH",
+        help="repository path used by --prefetch, e.g. a shared read-only directory"
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    tune = subparsers.add_parser(
+        "tune",
+        help="measure compute type, threads and beam size on this host and save the best settings"
+    )
+    tune.add_argument(
+        "--fixtures",
+        default=str(Path.home() / ".config" / "mywhisper" / "fixtures"),
+        help="directory of 16 kHz WAV fixtures, optionally with .txt reference transcripts"
+    )
+    tune.add_argument("--models", nargs="+", help="models to consider (default: the configured model)")
+    tune.add_argument("--compute-types", nargs="+", help="default: int8 int8_float32 int16 float32")
+    tune.add_argument("--threads", nargs="+", type=int, help="cpu_threads values to try")
+    tune.add_argument("--beam-sizes", nargs="+", type=int, help="default: 1 5")
+    tune.add_argument("--force", action="store_true", help="re-tune even if cached results match this host")
+
+    history = subparsers.add_parser("history", help="search transcript history or show latency trends")
+    history.add_argument("query", nargs="*", help="words to search for (default: most recent)")
+    history.add_argument("--limit", type=int, default=20)
+    history.add_argument("--stats", type=float, metavar="DAYS", help="per-day stage latencies over DAYS days")
+
+    diag = subparsers.add_parser(
+        "audio-diag",
+        help="measure start lag, input latency, callback jitter and xruns of input devices"
+    )
+    diag.add_argument("--list", action="store_true", help="only list input devices")
+    diag.add_argument(
+        "--device",
+        nargs="+",
+        help="device indexes or names (default: the configured device; 'all' for every input device)"
+    )
+    diag.add_argument("--blocksizes", nargs="+", type=int, help="default: 256 512 and the configured chunk_size")
+    diag.add_argument("--latency", nargs="+", help="latency classes or seconds (default: low high)")
+    diag.add_argument("--seconds", type=float, default=2.0, help="recording time per combination")
+
+    ctl = subparsers.add_parser("ctl", help="send a command to a running headless instance")
+    ctl.add_argument(
+        "action",
+        choices=["start", "stop", "toggle", "cancel", "status", "subscribe", "quit", "transcribe", "profile"]
+    )
+    ctl.add_argument(
+        "path",
+        nargs="?",
+        help="audio file for `transcribe` (the text goes to a .txt beside it); utterance count for `profile`"
+    )
+
+    return parser.parse_args(argv)
+
+
+def run_history_command(args, config: Config) -> int:
+    history = TranscriptHistory.from_config(dict(config.get_history_config(), enabled=True))
+    if history is None:
+        return 1
+    try:
+        if args.stats:
+            stages = ("capture_ms", "decode_ms", "insert_ms", "total_ms")
+            print(f"{'day':<11} {'count':>5} " + " ".join(f"{stage[:-3] + ' p50/p95':>19}" for stage in stages))
+            for day in history.latency_stats(args.stats):
+                cells = []
+                for stage in stages:
+                    values = day.get(stage)
+                    cells.append(f"{values['p50']:>9.0f}/{values['p95']:<9.0f}" if values else f"{'-':>19}")
+                print(f"{day['day']:<11} {day['utterances']:>5} " + " ".join(cells))
+        else:
+            for entry in reversed(history.search(" ".join(args.query), args.limit)):
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+                lost = " [audio dropouts]" if entry["xruns"] else ""
+                print(f"{entry['id']:>6}  {when}  {entry['model'] or '-':<12} {entry['text']}{lost}")
+    finally:
+        history.close()
+    return 0
+
+
+def run_audio_diag_command(args, config: Config) -> int:
+    from src.audio_capture import resolve_input_device
+    from src.audio_diagnostics import list_input_devices, run_diagnostics
+
+    audio_config = config.get_audio_config()
+    try:
+        devices = list_input_devices()
+    except Exception as e:
+        logger.error(f"Cannot query audio devices: {e}")
+        return 1
+
+    if args.list:
+        for device in devices:
+            marker = " (default)" if device["default"] else ""
+            print(f"{device['index']:>3}  {device['name']} [{device['hostapi']}, "
+                  f"{device['default_samplerate']:.0f} Hz]{marker}")
+        return 0
+
+    if args.device == ["all"]:
+        targets = [device["index"] for device in devices]
+    else:
+        targets = [resolve_input_device(device) for device in args.device or [audio_config.get("device")]]
+    blocksizes = args.blocksizes or sorted({256, 512, audio_config["chunk_size"]})
+    latencies = [
+        float(latency) if latency.replace(".", "", 1).isdigit() else latency
+        for latency in args.latency or ["low", "high"]
+    ]
+
+    results = run_diagnostics(
+        targets, blocksizes, latencies,
+        sample_rate=audio_config["sample_rate"],
+        channels=audio_config["channels"],
+        seconds=args.seconds
+    )
+    print(f"{'device':>6} {'block':>5} {'latency':>7} {'start':>7} {'reported':>8} "
+          f"{'measured p50/p95':>16} {'jitter':>7} {'max dev':>7} {'xruns':>5}")
+    for result in results:
+        device = "default" if result["device"] is None else result["device"]
+        prefix = f"{device:>6} {result['blocksize']:>5} {result['latency']:>7}"
+        if "error" in result:
+            print(f"{prefix}  {result['error']}")
+            continue
+        measured = result["measured_latency_ms"]
+        measured = f"{measured['p50']:.1f}/{measured['p95']:.1f}" if measured else "-"
+
+        def ms(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        print(f"{prefix} {ms(result['start_lag_ms']):>7} {ms(result['reported_latency_ms']):>8} "
+              f"{measured:>16} {ms(result['jitter_ms']):>7} {ms(result['max_deviation_ms']):>7} "
+              f"{result['overflows'] + result['underflows']:>5}")
+    print("All times in ms. Pick the smallest block and latency with low start lag and no xruns.")
+    return 0
+
+
+def run_ctl_command(args) -> int:
+    from src.headless import send_command, follow_transcripts, default_socket_path
+
+    path = args.socket or default_socket_path()
+    if args.action == "subscribe":
+        try:
+            for line in follow_transcripts(path):
+                print(line, flush=True)
+        except OSError as e:
+            logger.error(f"Failed to reach MyWhisper at {path}: {e}")
+            return 1
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    command = args.action
+    if args.action == "transcribe":
+        if not args.path:
+            logger.error("ctl transcribe needs an audio file")
+            return 1
+        # The service may run in another working directory
+        command = f"transcribe {os.path.abspath(args.path)}"
+    elif args.action == "profile" and args.path:
+        command = f"profile {args.path}"
+
+    reply = send_command(path, command)
+    if reply is None:
+        return 1
+    print(reply)
+    return 0 if not reply.startswith("error") else 1
+
+
+def run_tune_command(args, config: Config) -> int:
+    from src.tuner import HardwareTuner, TuningCache, host_key, pareto_front
+
+    cache = TuningCache()
+    key = host_key()
+    models = args.models or [config.get_model()]
+
+    cached = cache.get(key)
+    if cached and not args.force and cached["chosen"]["model"] in models:
+        chosen = cached["chosen"]
+        logger.info(f"Using cached tuning for {key} from {cached['tuned_at']}")
+    else:
+        fixtures = HardwareTuner.find_fixtures(args.fixtures)
+        if not fixtures:
+            logger.error(f"No WAV fixtures found in {args.fixtures}")
+            return 1
+
+        tuner = HardwareTuner(
+            fixtures,
+            models,
+            compute_types=args.compute_types,
+            thread_counts=args.threads,
+            beam_sizes=args.beam_sizes,
+            language=config.get_language(),
+            model_repository=ModelRepository.from_config(config.get_model_repository_config()),
+            model_registry=ModelRegistry(config.get_custom_models())
+        )
+        results = tuner.run()
+        chosen = tuner.choose(results)
+        if chosen is None:
+            logger.error("Tuning produced no usable results")
+            return 1
+        cache.put(key, results, chosen)
+
+        print(f"{'model':<18} {'compute':<13} {'threads':>7} {'beam':>4} {'RTF':>7} {'quality':>7}")
+        for result in pareto_front(results):
+            marker = " <- chosen" if result is chosen else ""
+            print(
+                f"{result['model']:<18} {result['compute_type']:<13} {result['cpu_threads']:>7} "
+                f"{result['beam_size']:>4} {result['rtf']:>7.3f} {result['quality']:>7.3f}{marker}"
+            )
+
+    config.set_model(chosen["model"])
+    config.set_inference_config({
+        "compute_type": chosen["compute_type"],
+        "cpu_threads": chosen["cpu_threads"],
+        "beam_size": chosen["beam_size"],
+        "tuned_for": key,
+    })
+    config.flush()
+    logger.info(f"Saved tuned settings: {chosen}")
+    return 0
+
+
+def run_repository_command(args, config: Config) -> int:
+    repository = ModelRepository.from_config(config.get_model_repository_config())
+    ok = True
+    if args.prefetch:
+        for model_name in args.prefetch:
+            ok = repository.prefetch(model_name, root=args.repository) is not None and ok
+    if args.verify is not None:
+        for model_name in args.verify or list(repository.list_models()):
+            ok = repository.verify(model_name) and ok
+    return 0 if ok else 1
+
+
 def main():
+    args = parse_args()
+    # One instance for everything: each Config parses the file and may run
+    # its own writer and watcher threads
+    config = Config()
+    setup_logging(config.get_logging_config())
+
+    if args.prefetch or args.verify is not None:
+        sys.exit(run_repository_command(args, config))
+
+    if args.command == "tune":
+        sys.exit(run_tune_command(args, config))
+
+    if args.command == "ctl":
+        sys.exit(run_ctl_command(args))
+
+    if args.command == "audio-diag":
+        sys.exit(run_audio_diag_command(args, config))
+
+    if args.command == "history":
+        sys.exit(run_history_command(args, config))
+
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    app = MyWhisperApp()
+    app = MyWhisperApp(headless=args.headless, output=args.output, control_socket=args.socket, config=config)
+    if args.startup_benchmark:
+        print(json.dumps(startup_benchmark(app)))
+        return
     app.run()
 
 
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""End-to-end replay harness for MyWhisper
+
+Drives a real MyWhisperApp (hotkeys -> AudioCapture -> WhisperTranscriber ->
+text insertion) from a recorded session, with no microphone, keyboard or X
+server. The app gets a fake sounddevice stream that plays the session audio,
+a fake pynput listener that replays the key events, and a text inserter that
+records what would have been typed.
+
+    python replay.py sessions/*.json
+    python replay.py --speed 4 sessions/dictation.json
+
+A session file:
+
+    {
+        "audio": "dictation.wav",          # 16-bit PCM at the capture sample rate
+        "config": {"model": "tiny.en", "recording_mode": "push"},
+        "events": [
+            {"t": 0.40, "press": ["ctrl", "alt", "space"]},
+            {"t": 3.10, "release": ["space", "alt", "ctrl"]}
+        ],
+        "expected": "the quick brown fox",
+        "max_wer": 0.2,
+        "budgets_ms": {"final_text_ms": 2000}
+    }
+
+Times are seconds on the session timeline, which starts with the audio file.
+The audio stream only plays while the app records, from the current position
+on the timeline, exactly as a microphone would. The harness reports the
+latency of each stage per utterance. Text is attributed to the utterance
+whose stop came last before it was inserted, so utterances should not
+overlap.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import wave
+import argparse
+import tempfile
+import threading
+import logging
+
+# Without a display pynput's X backend cannot even be imported; the fake
+# listener never needs a real backend
+if not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+# The harness replaces hotkeys, so take the X11 (non-Qt) code path
+os.environ["XDG_SESSION_TYPE"] = "x11"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import Config
+from src.tuner import word_error_rate
+
+logger = logging.getLogger("replay")
+
+STAGES = [
+    "hotkey_to_capture_ms",  # start action -> audio stream started
+    "release_to_capture_stop_ms",  # stop action -> audio stream stopped
+    "decode_ms",  # transcribe() call
+    "first_text_ms",  # stop action -> first text inserted
+    "final_text_ms",  # stop action -> last text inserted (end to end)
+]
+
+
+class SessionClock:
+    """Session timeline in seconds, optionally running faster than real time"""
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self._start = time.monotonic()
+
+    def start(self) -> None:
+        self._start = time.monotonic()
+
+    def now(self) -> float:
+        return (time.monotonic() - self._start) * self.speed
+
+    def sleep_until(self, t: float) -> None:
+        delay = (t - self.now()) / self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FakeInputStream:
+    """Stands in for sounddevice.InputStream, playing the session audio"""
+
+    def __init__(self, samples, clock: SessionClock, events: list, samplerate, channels, dtype, blocksize, callback):
+        self.samples = samples
+        self.clock = clock
+        self.events = events
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self._running = False
+        self._thread = None
+
+    def start(self) -> None:
+        self.events.append(("stream_start", time.monotonic()))
+        self._running = True
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+
+    def _play(self) -> None:
+        import numpy as np
+
+        position = int(self.clock.now() * self.samplerate)
+        while self._running:
+            block = self.samples[position:position + self.blocksize]
+            if len(block) < self.blocksize:
+                # Past the end of the recording: the room is silent
+                block = np.concatenate([block, np.zeros(self.blocksize - len(block), dtype=np.int16)])
+            block = np.repeat(block.reshape(-1, 1), self.channels, axis=1)
+            self.callback(block, self.blocksize, None, None)
+            position += self.blocksize
+            self.clock.sleep_until(position / self.samplerate)
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.events.append(("stream_stop", time.monotonic()))
+
+    def close(self) -> None:
+        pass
+
+
+class FakeKeyboardListener:
+    """Stands in for pynput.keyboard.Listener; the harness calls press/release"""
+
+    def __init__(self, on_press, on_release):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.running = False
+
+    def start(self) -> None:
+        self.running = True
+
+    def stop(self) -> None:
+        self.running = False
+
+    def press(self, key) -> None:
+        if self.running:
+            self.on_press(key)
+
+    def release(self, key) -> None:
+        if self.running:
+            self.on_release(key)
+
+
+class RecordingTextInserter:
+    """Collects inserted text with timestamps instead of typing it"""
+
+    def __init__(self, events: list):
+        self.events = events
+        self.texts = []
+
+    def get_active_window_class(self):
+        return "replay"
+
+    def insert_at_cursor(self, text: str) -> bool:
+        self.texts.append(text)
+        self.events.append(("insert", time.monotonic()))
+        return True
+
+
+def load_samples(path: str, sample_rate: int):
+    import numpy as np
+
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getframerate() != sample_rate:
+            raise ValueError(f"{path}: expected 16-bit PCM at {sample_rate} Hz")
+        frames = wf.readframes(wf.getnframes())
+        channels = wf.getnchannels()
+    samples = np.frombuffer(frames, dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w' ]", " ", text.lower()).split())
+
+
+class ReplayHarness:
+    def __init__(self, session_path: str, speed: float = 1.0, timeout: float = 120.0):
+        with open(session_path) as f:
+            self.session = json.load(f)
+        self.session_path = session_path
+        self.base_dir = os.path.dirname(os.path.abspath(session_path))
+        self.speed = speed
+        self.timeout = timeout
+        self.clock = SessionClock(speed)
+        # (kind, monotonic time) for every observable step, in order
+        self.events = []
+        self.listener = None
+        self.samples = None
+
+    def _make_stream(self, samplerate, channels, dtype, blocksize, callback, device=None, latency=None):
+        return FakeInputStream(
+            self.samples, self.clock, self.events, samplerate, channels, dtype, blocksize, callback
+        )
+
+    def _make_listener(self, on_press, on_release):
+        self.listener = FakeKeyboardListener(on_press, on_release)
+        return self.listener
+
+    def run(self) -> dict:
+        from main import MyWhisperApp
+
+        inserter = RecordingTextInserter(self.events)
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Config(os.path.join(tmp, "config.json"))
+            # Keep replayed utterances out of the user's transcript history
+            config.set("history", dict(config.get_history_config(), enabled=False))
+            for key, value in self.session.get("config", {}).items():
+                config.set(key, value)
+            self.samples = load_samples(
+                os.path.join(self.base_dir, self.session["audio"]),
+                config.get_audio_config()["sample_rate"]
+            )
+
+            app = MyWhisperApp(
+                config=config,
+                audio_stream_factory=self._make_stream,
+                hotkey_listener_factory=self._make_listener,
+                text_inserter=inserter
+            )
+            self._instrument(app)
+            app.transcriber.wait_until_ready()
+
+            core_thread = threading.Thread(target=app.core.run, daemon=True)
+            core_thread.start()
+            app.start_hotkey_listener()
+            try:
+                self._replay_events(app)
+            finally:
+                app.core.stop()
+                core_thread.join(10)
+                app._cleanup()
+
+        return self._report(" ".join(text.strip() for text in inserter.texts))
+
+    def _instrument(self, app) -> None:
+        handle_hotkey = app.handle_hotkey
+
+        def timed_handle_hotkey(action):
+            self.events.append((f"action_{action}", time.monotonic()))
+            handle_hotkey(action)
+
+        # Covers both the key listener and end-of-speech detection
+        app.handle_hotkey = timed_handle_hotkey
+        app.hotkey_manager.register_callback(timed_handle_hotkey)
+
+        transcribe = app.transcriber.transcribe
+
+        def timed_transcribe(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return transcribe(*args, **kwargs)
+            finally:
+                self.events.append(("decode", start))
+                self.events.append(("decode_end", time.monotonic()))
+
+        app.transcriber.transcribe = timed_transcribe
+
+    def _replay_events(self, app) -> None:
+        hotkey_manager = app.hotkey_manager
+        self.clock.start()
+        for event in self.session["events"]:
+            self.clock.sleep_until(event["t"])
+            for name in event.get("press", []):
+                for key in hotkey_manager._parse_keys([name]):
+                    self.listener.press(key)
+            for name in event.get("release", []):
+                for key in hotkey_manager._parse_keys([name]):
+                    self.listener.release(key)
+
+        deadline = time.monotonic() + self.timeout
+        while app.core.is_busy and time.monotonic() < deadline:
+            time.sleep(0.02)
+        if app.core.is_busy:
+            logger.error(f"Pipeline still busy after {self.timeout:.0f} s")
+
+    def _utterances(self) -> list:
+        utterances = []
+        current = None
+        for kind, at in self.events:
+            if kind in ("action_start", "action_toggle") and (current is None or "stop" in current):
+                current = {"start": at}
+                utterances.append(current)
+            elif current is None:
+                continue
+            elif kind in ("action_stop", "action_toggle") and "stop" not in current:
+                current["stop"] = at
+            elif kind == "stream_start":
+                current.setdefault("stream_start", at)
+            elif kind == "stream_stop":
+                current.setdefault("stream_stop", at)
+            elif kind == "insert":
+                current.setdefault("first_text", at)
+                current["final_text"] = at
+
+        # Decodes run in utterance order, one per submitted recording
+        decodes = [at for kind, at in self.events if kind == "decode"]
+        decode_ends = [at for kind, at in self.events if kind == "decode_end"]
+        for utterance, start, end in zip([u for u in utterances if "stop" in u], decodes, decode_ends):
+            utterance["decode_ms"] = (end - start) * 1000
+
+        def span(utterance, begin, end):
+            if begin in utterance and end in utterance:
+                return round((utterance[end] - utterance[begin]) * 1000, 1)
+            return None
+
+        return [
+            {
+                "hotkey_to_capture_ms": span(u, "start", "stream_start"),
+                "release_to_capture_stop_ms": span(u, "stop", "stream_stop"),
+                "decode_ms": round(u["decode_ms"], 1) if "decode_ms" in u else None,
+                "first_text_ms": span(u, "stop", "first_text"),
+                "final_text_ms": span(u, "stop", "final_text"),
+            }
+            for u in utterances
+        ]
+
+    def _report(self, text: str) -> dict:
+        utterances = self._utterances()
+        stages = {}
+        for stage in STAGES:
+            values = [u[stage] for u in utterances if u[stage] is not None]
+            if values:
+                stages[stage] = {"mean": round(sum(values) / len(values), 1), "max": max(values)}
+
+        expected = self.session.get("expected")
+        wer = word_error_rate(normalize(expected), normalize(text)) if expected is not None else None
+        failures = []
+        if wer is not None and wer > self.session.get("max_wer", 0.2):
+            failures.append(f"WER {wer:.2f} above {self.session.get('max_wer', 0.2)}")
+        for stage, budget in self.session.get("budgets_ms", {}).items():
+            if stage in stages and stages[stage]["max"] > budget:
+                failures.append(f"{stage} {stages[stage]['max']:.0f} ms over budget {budget} ms")
+
+        return {
+            "session": os.path.basename(self.session_path),
+            "speed": self.speed,
+            "text": text,
+            "expected": expected,
+            "wer": round(wer, 3) if wer is not None else None,
+            "utterances": utterances,
+            "stages": stages,
+            "failures": failures,
+            "passed": not failures,
+        }
+
+
+def print_report(report: dict) -> None:
+    status = "PASS" if report["passed"] else "FAIL"
+    print(f"{status} {report['session']} (x{report['speed']:g}, WER {report['wer']})")
+    print(f"  text: {report['text']}")
+    print(f"  {'stage':<28} {'mean ms':>9} {'max ms':>9}")
+    for stage, values in report["stages"].items():
+        print(f"  {stage:<28} {values['mean']:>9.1f} {values['max']:>9.1f}")
+    for failure in report["failures"]:
+        print(f"  ! {failure}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through MyWhisper")
+    parser.add_argument("sessions", nargs="+", help="session JSON files")
+    parser.add_argument("--speed", type=float, default=1.0, help="timeline speed (audio and key events)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for the last transcript")
+    parser.add_argument("--json", action="store_true", help="print reports as JSON lines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    ok = True
+    for path in args.sessions:
+        report = ReplayHarness(path, speed=args.speed, timeout=args.timeout).run()
+        ok = ok and report["passed"]
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_report(report)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
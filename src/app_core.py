@@ -0,0 +1,320 @@
+"""Event-driven application core for MyWhisper
+
+Hotkeys, end-of-speech detection and menu actions only post events; a single
+coroutine consumes them and owns the recording state, so there is exactly one
+place where recordings start and stop. Blocking work (PortAudio, decoding,
+clipboard/xdotool) runs in executors, and transcribed text flows to a single
+insertion consumer that preserves utterance and segment order.
+"""
+
+import time
+import asyncio
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Optional, Callable, List, Tuple
+import logging
+from . import metrics, profiling
+from .transcriber import INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+
+class RecordingState(Enum):
+    IDLE = "idle"
+    STARTING = "starting"
+    RECORDING = "recording"
+    STOPPING = "stopping"
+
+
+class AppCore:
+    ACTIONS = ("start", "stop", "toggle", "cancel")
+
+    def __init__(
+        self,
+        audio_capture,
+        transcriber,
+        text_inserter,
+        streaming_insert: bool = True,
+        text_processor=None,
+        history=None,
+        on_state_change: Optional[Callable[[RecordingState], None]] = None
+    ):
+        self.audio_capture = audio_capture
+        self.transcriber = transcriber
+        self.text_inserter = text_inserter
+        self.streaming_insert = streaming_insert
+        self.text_processor = text_processor
+        self.history = history
+        self.on_state_change = on_state_change
+        self.state = RecordingState.IDLE
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._events: Optional[asyncio.Queue] = None
+        self._insertions: Optional[asyncio.Queue] = None
+        self._stopped: Optional[asyncio.Event] = None
+        # (action, perf_counter time it was posted)
+        self._early_events: List[Tuple[str, float]] = []
+        # Submitted utterances whose text has not been fully inserted yet
+        self._pending_jobs = 0
+        self._post_lock = threading.Lock()
+
+        # One thread each for the audio device and the insertion backend
+        # keeps their calls strictly ordered
+        self._audio_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+        decode_threads = max(2, getattr(transcriber, "num_workers", 1))
+        batch_scheduler = getattr(transcriber, "batch_scheduler", None)
+        if batch_scheduler:
+            # Queued clips wait for their batch on a decode thread of their own
+            decode_threads = max(decode_threads, batch_scheduler.max_batch_size + 1)
+        self._decode_executor = ThreadPoolExecutor(max_workers=decode_threads, thread_name_prefix="decode")
+        self._insert_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="insert")
+
+    @property
+    def is_recording(self) -> bool:
+        return self.state in (RecordingState.STARTING, RecordingState.RECORDING)
+
+    @property
+    def is_busy(self) -> bool:
+        return self.state != RecordingState.IDLE or self._pending_jobs > 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending_jobs
+
+    # Producer API, safe to call from any thread
+
+    def post(self, action: str) -> None:
+        if action not in self.ACTIONS:
+            logger.warning(f"Unknown action: {action}")
+            return
+        event = (action, time.perf_counter())
+        with self._post_lock:
+            if self._loop is None:
+                self._early_events.append(event)
+                return
+            loop = self._loop
+        loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    def reinsert(self, text: str) -> None:
+        # Queued behind any insertion in progress; safe from any thread
+        self._insert_executor.submit(self.text_inserter.insert_at_cursor, text)
+
+    def stop(self) -> None:
+        with self._post_lock:
+            loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stopped.set)
+
+    def run(self) -> None:
+        asyncio.run(self._main())
+
+    # Event loop side
+
+    async def _main(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        self._insertions = asyncio.Queue()
+        self._stopped = asyncio.Event()
+
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, self._stopped.set)
+
+        with self._post_lock:
+            self._loop = loop
+            for event in self._early_events:
+                self._events.put_nowait(event)
+            self._early_events.clear()
+
+        tasks = [
+            asyncio.create_task(self._consume_events()),
+            asyncio.create_task(self._consume_insertions()),
+        ]
+        await self._stopped.wait()
+
+        logger.info("Core shutting down")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._shutdown()
+
+        with self._post_lock:
+            self._loop = None
+
+    async def _shutdown(self) -> None:
+        self.transcriber.cancel_all()
+        if self.is_recording:
+            await self._run_audio(self.audio_capture.cancel_recording)
+            self._set_state(RecordingState.IDLE)
+        for executor in (self._audio_executor, self._decode_executor, self._insert_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _set_state(self, state: RecordingState) -> None:
+        if state == self.state:
+            return
+        logger.debug(f"Recording state: {self.state.value} -> {state.value}")
+        self.state = state
+        if self.on_state_change:
+            self.on_state_change(state)
+
+    async def _run_audio(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._audio_executor, func, *args)
+
+    async def _consume_events(self) -> None:
+        while True:
+            action, posted_at = await self._events.get()
+            try:
+                await self._handle(action, posted_at)
+            except Exception as e:
+                logger.error(f"Failed to handle {action}: {e}")
+                self._set_state(RecordingState.IDLE)
+
+    async def _handle(self, action: str, posted_at: Optional[float] = None) -> None:
+        logger.debug(f"Hotkey action: {action}")
+
+        if action == "toggle":
+            action = "stop" if self.is_recording else "start"
+
+        if action == "start" and self.state == RecordingState.IDLE:
+            await self._start_recording()
+        elif action == "stop" and self.state == RecordingState.RECORDING:
+            await self._stop_recording(posted_at)
+        elif action == "cancel":
+            await self._cancel()
+
+    async def _start_recording(self) -> None:
+        logger.info("Starting recording...")
+        self._set_state(RecordingState.STARTING)
+        # An idle-unloaded model reloads while the user is speaking
+        self.transcriber.prepare()
+        try:
+            await self._run_audio(self.audio_capture.start_recording)
+        except Exception as e:
+            logger.error(f"Failed to start recording: {e}")
+            self._set_state(RecordingState.IDLE)
+            return
+        self._set_state(RecordingState.RECORDING)
+
+    async def _stop_recording(self, requested_at: Optional[float] = None) -> None:
+        logger.info("Stopping recording...")
+        self._set_state(RecordingState.STOPPING)
+        stopped_at = time.perf_counter()
+        try:
+            audio = await self._run_audio(self.audio_capture.stop_recording, True)
+        finally:
+            self._set_state(RecordingState.IDLE)
+        if audio is not None:
+            context = None
+            if self.transcriber.uses_language_context():
+                context = await self._run_audio(self.text_inserter.get_active_window_class)
+            timings = {
+                "requested_at": requested_at or stopped_at,
+                "stopped_at": stopped_at,
+                "capture_ms": (time.perf_counter() - stopped_at) * 1000,
+            }
+            stats = self.audio_capture.last_recording_stats
+            if stats:
+                timings["xruns"] = stats["overflows"] + stats["underflows"]
+            self._submit(audio, context, timings)
+
+    async def _cancel(self) -> None:
+        # Throw away the current recording and every in-flight dictation;
+        # background file jobs keep going
+        if self.is_recording:
+            logger.info("Cancelling recording...")
+            await self._run_audio(self.audio_capture.cancel_recording)
+            self._set_state(RecordingState.IDLE)
+        self.transcriber.cancel_all(INTERACTIVE)
+
+    def _submit(self, audio, context: Optional[str] = None, timings: Optional[dict] = None) -> None:
+        loop = asyncio.get_running_loop()
+        job = self.transcriber.create_job(audio, context)
+        # Utterances are inserted in the order they were recorded, even
+        # when a later one finishes decoding first
+        job_texts = asyncio.Queue()
+        timings = timings or {"stopped_at": time.perf_counter()}
+        # A live config change must not switch modes halfway through a job,
+        # or the text would be inserted twice or not at all
+        streaming = self.streaming_insert
+        self._pending_jobs += 1
+        self._insertions.put_nowait((job, job_texts, timings))
+
+        def deliver(text: Optional[str]) -> None:
+            try:
+                loop.call_soon_threadsafe(job_texts.put_nowait, text)
+            except RuntimeError:
+                # The loop has already shut down
+                pass
+
+        def on_complete(text: str) -> None:
+            if text:
+                logger.info(f"Transcription complete: {text}")
+                if not streaming:
+                    deliver(text)
+
+        def decode() -> None:
+            start = time.perf_counter()
+            try:
+                with profiling.section("decode"):
+                    self.transcriber.transcribe(
+                        audio,
+                        on_complete,
+                        segment_callback=deliver if streaming else None,
+                        job=job
+                    )
+            finally:
+                timings["decode_ms"] = (time.perf_counter() - start) * 1000
+                deliver(None)
+
+        loop.run_in_executor(self._decode_executor, decode)
+
+    def _insert(self, text: str) -> Optional[str]:
+        # Vocabulary and spoken commands are applied per inserted piece, so
+        # with streaming_insert a rule cannot span two segments. Returns the
+        # inserted text, or None on failure
+        with profiling.section("insert"):
+            if self.text_processor:
+                text = self.text_processor.process(text)
+            return text if self.text_inserter.insert_at_cursor(text) else None
+
+    async def _consume_insertions(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job, job_texts, timings = await self._insertions.get()
+            inserted = []
+            insert_s = 0.0
+            while True:
+                text = await job_texts.get()
+                if text is None:
+                    self._pending_jobs -= 1
+                    break
+                if job.cancelled:
+                    continue
+                start = time.perf_counter()
+                processed = await loop.run_in_executor(self._insert_executor, self._insert, text)
+                insert_s += time.perf_counter() - start
+                if processed is None:
+                    logger.error("Failed to insert text")
+                else:
+                    if not inserted and "requested_at" in timings:
+                        metrics.HOTKEY_TO_TEXT_SECONDS.observe(time.perf_counter() - timings["requested_at"])
+                    inserted.append(processed)
+
+            if self.history and inserted and not job.cancelled:
+                is_array = not isinstance(job.audio, str)
+                self.history.record({
+                    "text": " ".join(piece.strip() for piece in inserted),
+                    "model": self.transcriber.get_current_model(),
+                    "language": self.transcriber.language,
+                    "audio": job.audio if is_array and self.history.store_audio else None,
+                    "audio_s": len(job.audio) / 16000 if is_array else None,
+                    "capture_ms": timings.get("capture_ms"),
+                    "decode_ms": timings.get("decode_ms"),
+                    "insert_ms": insert_s * 1000,
+                    "total_ms": (time.perf_counter() - timings["stopped_at"]) * 1000,
+                    "xruns": timings.get("xruns"),
+                })
+            if inserted and not job.cancelled:
+                profiling.utterance_done()
@@ -1,13 +1,38 @@
-import sounddevice as sd
 import wave
+import time
 import threading
 import queue
 import tempfile
-import numpy as np
-from typing import Optional, Callable
+from typing import Optional, Callable, Union
 import logging
+from .log_setup import RateLimitFilter
+from . import metrics, profiling
 
 logger = logging.getLogger(__name__)
+# Overflow warnings come in bursts from the PortAudio thread; only they are
+# rate limited, so one-off errors from the rest of the module always show
+callback_logger = logging.getLogger(f"{__name__}.callback")
+callback_logger.addFilter(RateLimitFilter(interval=5.0))
+
+# Whisper models expect 16 kHz mono float32 when given samples directly
+WHISPER_SAMPLE_RATE = 16000
+
+
+def resolve_input_device(device: Union[int, str, None]) -> Optional[int]:
+    """Index of the input device given by index or part of its name; None for the default"""
+    if device is None or device == "":
+        return None
+    if isinstance(device, int) or device.isdigit():
+        return int(device)
+
+    import sounddevice as sd
+
+    wanted = device.lower()
+    for index, info in enumerate(sd.query_devices()):
+        if info["max_input_channels"] > 0 and wanted in info["name"].lower():
+            return index
+    logger.warning(f"No input device matching '{device}'; using the default")
+    return None
 
 
 class AudioCapture:
@@ -16,14 +41,52 @@ class AudioCapture:
         sample_rate: int = 16000,
         channels: int = 1,
         chunk_size: int = 1024,
-        audio_format: str = 'int16'
+        audio_format: str = 'int16',
+        endpointing: Optional[dict] = None,
+        stream_factory: Optional[Callable] = None,
+        preprocessing: Optional[dict] = None,
+        device: Union[int, str, None] = None,
+        latency: Union[str, float] = "low"
     ):
         self.sample_rate = sample_rate
         self.channels = channels
         self.chunk_size = chunk_size
         self.dtype = audio_format
+        self.device = device
+        self.latency = latency
+        self._device_index: Optional[int] = None
+        self._device_resolved = False
+
+        # Input overflows (frames dropped because the callback fell behind)
+        # and underflows, counted per recording on the PortAudio thread
+        self._overflows = 0
+        self._underflows = 0
+        self._frames = 0
+        self.last_recording_stats: Optional[dict] = None
 
-        self.stream: Optional[sd.InputStream] = None
+        # End-of-speech detection: once speech has been heard, fire the
+        # endpoint callback after `hangover_ms` of trailing silence
+        endpointing = endpointing or {}
+        self.silence_threshold = endpointing.get("silence_threshold", 0.01)
+        self.hangover_ms = endpointing.get("hangover_ms", 800)
+        self.min_speech_ms = endpointing.get("min_speech_ms", 300)
+        self.endpoint_callback: Optional[Callable[[], None]] = None
+        self._speech_ms = 0.0
+        self._silence_ms = 0.0
+        self._endpoint_fired = False
+
+        # DC removal / high-pass / noise gate / AGC, applied block by block
+        # in the callback; built on the first recording since it needs scipy
+        self.preprocessing = preprocessing
+        self.preprocessor = None
+        self._preprocessor_built = False
+        self._preprocessing_s = 0.0
+
+        # sounddevice.InputStream, created on first use so that importing
+        # this module does not initialize PortAudio. stream_factory takes
+        # the same arguments and lets the replay harness feed recorded audio.
+        self.stream_factory = stream_factory
+        self.stream = None
         self.is_recording = False
         self.audio_queue = queue.Queue()
         self.recording_thread: Optional[threading.Thread] = None
@@ -35,16 +98,37 @@ class AudioCapture:
 
         self.is_recording = True
         self.audio_queue = queue.Queue()
+        self._speech_ms = 0.0
+        self._silence_ms = 0.0
+        self._endpoint_fired = False
+        self._overflows = 0
+        self._underflows = 0
+        self._frames = 0
+        self._prepare_preprocessor()
 
         try:
-            self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=self.channels,
-                dtype=self.dtype,
-                blocksize=self.chunk_size,
-                callback=self._audio_callback
-            )
-            self.stream.start()
+            stream_factory = self.stream_factory
+            device = self.device
+            if stream_factory is None:
+                import sounddevice as sd
+                stream_factory = sd.InputStream
+                if not self._device_resolved:
+                    # Looking a name up enumerates every device; do it once
+                    self._device_index = resolve_input_device(self.device)
+                    self._device_resolved = True
+                device = self._device_index
+
+            with profiling.section("capture"):
+                self.stream = stream_factory(
+                    samplerate=self.sample_rate,
+                    channels=self.channels,
+                    dtype=self.dtype,
+                    blocksize=self.chunk_size,
+                    device=device,
+                    latency=self.latency,
+                    callback=self._audio_callback
+                )
+                self.stream.start()
             logger.info("Started recording")
 
         except Exception as e:
@@ -52,13 +136,64 @@ class AudioCapture:
             self.is_recording = False
             raise
 
-    def _audio_callback(self, indata, frames, time, status):
-        if status:
-            logger.warning(f"Audio callback status: {status}")
-        if self.is_recording:
-            self.audio_queue.put(indata.copy())
+    def _prepare_preprocessor(self) -> None:
+        if not self._preprocessor_built:
+            self._preprocessor_built = True
+            try:
+                from .audio_processing import PreprocessingChain
+                self.preprocessor = PreprocessingChain.from_config(self.preprocessing, self.sample_rate)
+            except Exception as e:
+                logger.error(f"Audio preprocessing disabled: {e}")
+        elif self.preprocessor:
+            self.preprocessor.reset()
+        self._preprocessing_s = 0.0
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        with profiling.section("capture"):
+            self._frames += frames
+            if status:
+                if status.input_overflow:
+                    self._overflows += 1
+                    metrics.AUDIO_XRUNS.inc(kind="overflow")
+                if status.input_underflow:
+                    self._underflows += 1
+                    metrics.AUDIO_XRUNS.inc(kind="underflow")
+                # Lazy %-args: a rate-limited record is dropped before formatting
+                callback_logger.warning("Audio callback status: %s", status)
+            if self.is_recording:
+                if self.preprocessor:
+                    start = time.perf_counter()
+                    block = self.preprocessor.process(indata)
+                    self._preprocessing_s += time.perf_counter() - start
+                else:
+                    block = indata.copy()
+                self.audio_queue.put(block)
+                if self.endpoint_callback and not self._endpoint_fired:
+                    self._update_endpoint(block, frames)
 
-    def stop_recording(self) -> Optional[str]:
+    def set_endpoint_callback(self, callback: Optional[Callable[[], None]]) -> None:
+        self.endpoint_callback = callback
+
+    def _update_endpoint(self, block, frames: int) -> None:
+        # Runs on the PortAudio thread, so keep it to one cheap RMS per block
+        import numpy as np
+
+        level = float(np.sqrt(np.mean(np.square(block, dtype=np.float32)))) / 32768.0
+        block_ms = frames * 1000.0 / self.sample_rate
+        if level >= self.silence_threshold:
+            self._speech_ms += block_ms
+            self._silence_ms = 0.0
+        else:
+            self._silence_ms += block_ms
+
+        if self._speech_ms >= self.min_speech_ms and self._silence_ms >= self.hangover_ms:
+            self._endpoint_fired = True
+            logger.info("End of speech detected")
+            threading.Thread(target=self.endpoint_callback, daemon=True).start()
+
+    def stop_recording(self, as_array: bool = False) -> Optional[Union[str, "np.ndarray"]]:
+        # Returns a temporary WAV path, or with as_array=True the samples as
+        # 16 kHz mono float32, which skips the round trip through disk
         if not self.is_recording:
             logger.warning("Not currently recording")
             return None
@@ -66,12 +201,80 @@ class AudioCapture:
         self.is_recording = False
 
         if self.stream:
-            self.stream.stop()
-            self.stream.close()
+            with profiling.section("capture"):
+                self.stream.stop()
+                self.stream.close()
 
         logger.info("Stopped recording")
+        self._record_stats()
+        if self.preprocessor:
+            # chunk_size may be 0 (PortAudio picks a variable block size)
+            recorded_s = self._frames / self.sample_rate
+            logger.debug(
+                f"Preprocessing took {self._preprocessing_s * 1000:.1f} ms for {recorded_s:.1f} s of audio"
+            )
+        if as_array:
+            return self._get_audio_array()
         return self._save_audio_to_file()
 
+    def _record_stats(self) -> None:
+        latency = getattr(self.stream, "latency", None)
+        self.last_recording_stats = {
+            "device": self.device,
+            "blocksize": self.chunk_size,
+            "latency_ms": round(latency * 1000, 1) if isinstance(latency, (int, float)) else None,
+            "frames": self._frames,
+            "overflows": self._overflows,
+            "underflows": self._underflows,
+            # PortAudio reports that an overflow dropped input, not how much
+            "had_overflow": self._overflows > 0,
+        }
+        metrics.LAST_RECORDING_XRUNS.set(self._overflows + self._underflows)
+        if self._overflows or self._underflows:
+            logger.warning(
+                f"Recording had {self._overflows} input overflow(s) and {self._underflows} underflow(s); "
+                f"try a larger audio.chunk_size or audio.latency"
+            )
+
+    def cancel_recording(self) -> None:
+        if not self.is_recording:
+            return
+
+        self.is_recording = False
+
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+
+        # Drop whatever was captured so nothing gets transcribed
+        self.audio_queue = queue.Queue()
+        metrics.CANCELLATIONS.inc(reason="recording")
+        logger.info("Recording cancelled")
+
+    def _get_audio_array(self) -> Optional["np.ndarray"]:
+        try:
+            import numpy as np
+
+            audio_data = []
+            while not self.audio_queue.empty():
+                audio_data.append(self.audio_queue.get())
+
+            if not audio_data:
+                logger.warning("No audio data collected")
+                return None
+
+            audio_array = np.concatenate(audio_data).astype(np.float32) / 32768.0
+            if audio_array.ndim > 1:
+                audio_array = audio_array.mean(axis=1)
+            if self.sample_rate != WHISPER_SAMPLE_RATE:
+                from scipy.signal import resample_poly
+                audio_array = resample_poly(audio_array, WHISPER_SAMPLE_RATE, self.sample_rate).astype(np.float32)
+            return np.ascontiguousarray(audio_array)
+
+        except Exception as e:
+            logger.error(f"Failed to collect audio: {e}")
+            return None
+
     def _save_audio_to_file(self) -> Optional[str]:
         if self.audio_queue.empty():
             logger.warning("No audio data to save")
@@ -85,6 +288,8 @@ class AudioCapture:
         temp_file.close()
 
         try:
+            import numpy as np
+
             audio_data = []
             while not self.audio_queue.empty():
                 audio_data.append(self.audio_queue.get())
@@ -113,6 +318,8 @@ class AudioCapture:
             return 0.0
 
         try:
+            import numpy as np
+
             if not self.audio_queue.empty():
                 data = list(self.audio_queue.queue)[-1]
                 level = np.abs(data).mean() / 32768.0
@@ -0,0 +1,132 @@
+"""Input latency and callback jitter measurements for `main.py audio-diag`
+
+Each device / blocksize / latency combination is opened with the same
+settings AudioCapture would use and recorded for a few seconds:
+
+- start lag: from stream.start() to the first callback, the delay before
+  the first word can be captured
+- input latency: what PortAudio reports, and the measured age of each
+  block's first sample when its callback runs
+- jitter: spread of the intervals between callbacks around the block period
+- overflows and underflows
+"""
+
+import time
+from typing import List, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Callbacks while the stream is still settling are left out of the jitter
+WARMUP_CALLBACKS = 5
+
+
+def list_input_devices() -> List[dict]:
+    import sounddevice as sd
+
+    default_input = sd.default.device[0]
+    devices = []
+    for index, info in enumerate(sd.query_devices()):
+        if info["max_input_channels"] > 0:
+            devices.append({
+                "index": index,
+                "name": info["name"],
+                "hostapi": sd.query_hostapis(info["hostapi"])["name"],
+                "default": index == default_input,
+                "default_samplerate": info["default_samplerate"],
+            })
+    return devices
+
+
+def _percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure_input(
+    device: Optional[int],
+    sample_rate: int = 16000,
+    channels: int = 1,
+    blocksize: int = 1024,
+    latency: Union[str, float] = "low",
+    seconds: float = 2.0
+) -> dict:
+    import numpy as np
+    import sounddevice as sd
+
+    arrivals = []
+    ages = []
+    counts = {"overflows": 0, "underflows": 0}
+
+    def callback(indata, frames, time_info, status):
+        arrivals.append(time.perf_counter())
+        # Both on the stream clock; some host APIs leave them at 0
+        if time_info.inputBufferAdcTime > 0:
+            ages.append(time_info.currentTime - time_info.inputBufferAdcTime)
+        if status.input_overflow:
+            counts["overflows"] += 1
+        if status.input_underflow:
+            counts["underflows"] += 1
+
+    stream = sd.InputStream(
+        device=device,
+        samplerate=sample_rate,
+        channels=channels,
+        dtype="int16",
+        blocksize=blocksize,
+        latency=latency,
+        callback=callback
+    )
+    try:
+        started = time.perf_counter()
+        stream.start()
+        time.sleep(seconds)
+        stream.stop()
+        reported_latency = stream.latency
+    finally:
+        stream.close()
+
+    result = {
+        "device": device,
+        "blocksize": blocksize,
+        "latency": latency,
+        "callbacks": len(arrivals),
+        "reported_latency_ms": round(reported_latency * 1000, 1),
+        "start_lag_ms": round((arrivals[0] - started) * 1000, 1) if arrivals else None,
+        "measured_latency_ms": None,
+        "jitter_ms": None,
+        "max_deviation_ms": None,
+        **counts,
+    }
+    if ages:
+        result["measured_latency_ms"] = {
+            "p50": round(_percentile(ages, 0.5) * 1000, 1),
+            "p95": round(_percentile(ages, 0.95) * 1000, 1),
+        }
+    intervals = np.diff(arrivals[WARMUP_CALLBACKS:])
+    if len(intervals) > 1:
+        # blocksize 0 lets PortAudio vary the block; compare with the median then
+        period = blocksize / sample_rate if blocksize else float(np.median(intervals))
+        result["jitter_ms"] = round(float(np.std(intervals)) * 1000, 2)
+        result["max_deviation_ms"] = round(float(np.max(np.abs(intervals - period))) * 1000, 2)
+    return result
+
+
+def run_diagnostics(
+    devices: List[Optional[int]],
+    blocksizes: List[int],
+    latencies: List[Union[str, float]],
+    sample_rate: int = 16000,
+    channels: int = 1,
+    seconds: float = 2.0
+) -> List[dict]:
+    results = []
+    for device in devices:
+        for blocksize in blocksizes:
+            for latency in latencies:
+                try:
+                    results.append(measure_input(device, sample_rate, channels, blocksize, latency, seconds))
+                except Exception as e:
+                    logger.error(f"Device {device}, blocksize {blocksize}, latency {latency}: {e}")
+                    results.append({"device": device, "blocksize": blocksize, "latency": latency, "error": str(e)})
+    return results
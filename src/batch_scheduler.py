@@ -0,0 +1,177 @@
+"""Micro-batching of concurrent short transcriptions
+
+Whisper pads every clip up to one 30 s window, so several short clips cost
+little more to decode together than one alone. The scheduler sits in front
+of the model:
+
+- When nothing is decoding, a request runs at once on the caller's thread
+  through the normal streaming path. A single user sees no added latency.
+- Requests that arrive while a decode is in flight queue up. When it
+  finishes, the dispatcher waits at most window_ms after the oldest queued
+  request for others to join. It then decodes up to max_batch_size queued
+  requests from the same length bucket in one batched call, so a 2 s clip
+  does not wait for the beam search of a 25 s one.
+
+Only clips that fit in one window are scheduled; longer recordings keep the
+chunked or sequential paths.
+"""
+
+import time
+import threading
+from typing import Callable, List, Optional, Sequence
+import logging
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class _Request:
+    __slots__ = ("samples", "job", "bucket", "decode_single", "enqueued_at", "done", "text", "error", "batched")
+
+    def __init__(self, samples, job, bucket: int, decode_single: Callable[[], Optional[str]]):
+        self.samples = samples
+        self.job = job
+        self.bucket = bucket
+        self.decode_single = decode_single
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.text: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.batched = False
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        decode_batch: Callable[[list], List[Optional[str]]],
+        window_ms: float = 20,
+        max_batch_size: int = 8,
+        buckets_s: Sequence[float] = (5, 15, 30)
+    ):
+        # decode_batch([(samples, job), ...]) -> one text (or None) per clip
+        self.decode_batch = decode_batch
+        self.window_s = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.buckets_s = sorted(buckets_s)
+        self._cond = threading.Condition()
+        self._queue: List[_Request] = []
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.batched_requests = 0
+
+    @classmethod
+    def from_config(cls, batching: Optional[dict], decode_batch: Callable) -> Optional["BatchScheduler"]:
+        batching = batching or {}
+        if not batching.get("enabled", False):
+            return None
+        return cls(
+            decode_batch,
+            window_ms=batching.get("window_ms", 20),
+            max_batch_size=batching.get("max_batch_size", 8)
+        )
+
+    def accepts(self, samples) -> bool:
+        return len(samples) <= self.buckets_s[-1] * SAMPLE_RATE
+
+    def _bucket(self, samples) -> int:
+        duration = len(samples) / SAMPLE_RATE
+        for index, limit in enumerate(self.buckets_s):
+            if duration <= limit:
+                return index
+        return len(self.buckets_s)
+
+    def run(
+        self,
+        samples,
+        job,
+        decode_single: Callable[[], Optional[str]],
+        segment_callback: Optional[Callable[[str], None]] = None
+    ) -> Optional[str]:
+        """Decodes samples for job, either directly or as part of a batch"""
+        with self._cond:
+            direct = not self._busy and not self._queue
+            if direct:
+                self._busy = True
+            else:
+                request = _Request(samples, job, self._bucket(samples), decode_single)
+                self._queue.append(request)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch_loop, name="batch-dispatch", daemon=True)
+                    self._thread.start()
+                self._cond.notify_all()
+
+        if direct:
+            try:
+                return decode_single()
+            finally:
+                self._release()
+
+        job.add_cancel_callback(lambda: self._drop(request))
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        if request.batched and request.text and segment_callback and not job.cancelled:
+            # Batched clips finish all at once, as a single segment
+            segment_callback(request.text)
+        return request.text
+
+    def _release(self) -> None:
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def _drop(self, request: _Request) -> None:
+        with self._cond:
+            if request not in self._queue:
+                return
+            self._queue.remove(request)
+        request.done.set()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._busy or not self._queue:
+                    self._cond.wait()
+                # Give requests right behind the oldest one a chance to join
+                deadline = self._queue[0].enqueued_at + self.window_s
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._busy or not self._queue:
+                    continue
+                bucket = self._queue[0].bucket
+                batch = [request for request in self._queue if request.bucket == bucket][:self.max_batch_size]
+                for request in batch:
+                    self._queue.remove(request)
+                self._busy = True
+
+            try:
+                self._run_batch(batch)
+            finally:
+                self._release()
+                for request in batch:
+                    request.done.set()
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        metrics.BATCH_SIZE.observe(len(batch))
+        try:
+            if len(batch) == 1:
+                # Nobody to batch with: keep streaming segments
+                batch[0].text = batch[0].decode_single()
+                return
+            start = time.perf_counter()
+            texts = self.decode_batch([(request.samples, request.job) for request in batch])
+            for request, text in zip(batch, texts):
+                request.text = text
+                request.batched = True
+            self.batches += 1
+            self.batched_requests += len(batch)
+            logger.info(f"Decoded a batch of {len(batch)} clips in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            for request in batch:
+                request.error = e
@@ -0,0 +1,105 @@
+import re
+from typing import List, Tuple
+
+
+def frame_levels(audio, sample_rate: int, frame_ms: int = 30):
+    # RMS per non-overlapping frame, computed in one vectorized pass
+    import numpy as np
+
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), frame
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    return np.sqrt(np.mean(np.square(frames), axis=1)), frame
+
+
+def find_silences(
+    audio,
+    sample_rate: int = 16000,
+    frame_ms: int = 30,
+    min_silence_ms: int = 300,
+    threshold: float = 0.0
+) -> List[Tuple[int, int]]:
+    """Return (start, end) sample ranges of silence.
+
+    With threshold=0 the level is derived from the recording itself, so
+    the split works the same on quiet and loud microphones.
+    """
+    import numpy as np
+
+    levels, frame = frame_levels(audio, sample_rate, frame_ms)
+    if levels.size == 0:
+        return []
+    if threshold <= 0:
+        threshold = max(float(np.percentile(levels, 10)) * 2.0, 1e-4)
+
+    quiet = levels < threshold
+    min_frames = max(1, min_silence_ms // frame_ms)
+    # Edges of runs of quiet frames
+    padded = np.concatenate(([False], quiet, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[0::2], edges[1::2]
+
+    return [
+        (int(start) * frame, int(end) * frame)
+        for start, end in zip(starts, ends)
+        if end - start >= min_frames
+    ]
+
+
+def split_at_silences(
+    audio,
+    sample_rate: int = 16000,
+    target_chunk_s: float = 20.0,
+    max_chunk_s: float = 28.0,
+    min_chunk_s: float = 5.0,
+    overlap_s: float = 0.3
+) -> List[Tuple[int, int]]:
+    """Split `audio` into independently decodable (start, end) chunks.
+
+    Cuts are placed in the middle of silences, as close to target_chunk_s
+    as possible, never producing a chunk longer than max_chunk_s. Each
+    chunk is widened by overlap_s on both sides so no word is lost at a
+    hard cut; merge_chunk_texts() removes the duplicated words.
+    """
+    total = len(audio)
+    target = int(target_chunk_s * sample_rate)
+    longest = int(max_chunk_s * sample_rate)
+    shortest = int(min_chunk_s * sample_rate)
+    overlap = int(overlap_s * sample_rate)
+
+    cut_points = [(start + end) // 2 for start, end in find_silences(audio, sample_rate)]
+
+    boundaries = [0]
+    while total - boundaries[-1] > longest:
+        start = boundaries[-1]
+        candidates = [p for p in cut_points if start + shortest <= p <= start + longest]
+        if candidates:
+            cut = min(candidates, key=lambda p: abs(p - (start + target)))
+        else:
+            cut = start + longest
+        boundaries.append(cut)
+    boundaries.append(total)
+
+    return [
+        (max(0, start - overlap), min(total, end + overlap))
+        for start, end in zip(boundaries, boundaries[1:])
+    ]
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_chunk_texts(previous: str, current: str, max_overlap_words: int = 8) -> str:
+    """Drop the words at the start of `current` that repeat the end of
+    `previous`, which happens when both chunks decoded the overlap."""
+    prev_words = [_normalize(w) for w in previous.split()[-max_overlap_words:]]
+    words = current.split()
+    cur_words = [_normalize(w) for w in words[:max_overlap_words]]
+
+    for size in range(min(len(prev_words), len(cur_words)), 0, -1):
+        if prev_words[-size:] == cur_words[:size] and any(prev_words[-size:]):
+            return " ".join(words[size:])
+    return current
@@ -1,7 +1,11 @@
-import json
 import os
+import copy
+import json
+import select
+import struct
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,14 +14,120 @@ logger = logging.getLogger(__name__)
 class Config:
     DEFAULT_CONFIG = {
         "hotkey": ["ctrl", "alt", "space"],
+        "cancel_hotkey": ["ctrl", "alt", "x"],
         "recording_mode": "push",  # "push" or "toggle"
         "model": "base",
-        "language": "en",
+        "custom_models": {},  # name -> converted CTranslate2 model directory
+        "model_repository": {
+            # Searched in order; put a shared read-only directory first
+            "paths": ["/usr/share/mywhisper/models", "~/.local/share/mywhisper/models"],
+            "offline": False  # never fall back to the Hugging Face hub
+        },
+        "language": "en",  # or "auto" to detect once and reuse the result
+        "language_detection": {
+            "scope": "session",  # "session" or "application" (per focused window)
+            "candidates": [],  # e.g. ["en", "pt"]; empty allows any language
+            "min_confidence": 0.45  # re-detect when the first segment falls below this
+        },
+        "inference": {
+            # Written by `main.py tune`; "auto" keeps the built-in int8-on-CPU rule
+            "compute_type": "auto",
+            "cpu_threads": 0,  # 0 lets CTranslate2 decide
+            "beam_size": 5,
+            "num_workers": 2,  # concurrent decodes, used for long recordings
+            "long_audio": {
+                # Split recordings at least this long at silences and decode
+                # the chunks in parallel
+                "enabled": True,
+                "min_duration_s": 60
+            },
+            "tuned_for": None,
+            "idle_unload": {
+                # Release the model after this long without dictation and
+                # reload it when the next recording starts
+                "enabled": False,
+                "after_minutes": 10,
+                "standby_model": None  # e.g. "tiny.en": kept loaded meanwhile, used until the reload finishes
+            },
+            # Run the model in a supervised subprocess; audio goes over shared memory
+            "out_of_process": False,
+            "prewarm_spare": True,  # keep a loaded standby worker for instant restarts
+            "batching": {
+                # Decode clips of up to 30 s that queue up behind a busy
+                # decode together; a lone utterance is never delayed
+                "enabled": False,
+                "window_ms": 20,
+                "max_batch_size": 8
+            }
+        },
+        "history": {
+            # Every inserted utterance, searchable from the tray / window
+            "enabled": True,
+            "path": "~/.local/share/mywhisper/history.db",
+            "store_audio": False,  # keep zlib-compressed 16-bit audio too
+            "retention_days": 90,
+            "max_entries": 50000
+        },
         "insertion_method": "clipboard",  # "clipboard" or "typing"
+        "streaming_insert": True,  # insert each segment as soon as it is decoded
+        "text_processing": {
+            # Custom vocabulary, one `spoken words => replacement` per line;
+            # reloaded automatically when the file changes
+            "enabled": True,
+            "vocabulary_file": "~/.config/mywhisper/vocabulary.txt",
+            "spoken_commands": False  # "new line", "period", "comma", ...
+        },
+        "preempt_policy": "none",  # "none", "oldest" or "all" pending transcriptions
         "audio": {
             "sample_rate": 16000,
             "channels": 1,
-            "chunk_size": 1024
+            "chunk_size": 1024,  # frames per callback; 0 lets PortAudio choose
+            "device": None,  # input device index or part of its name; null for the default
+            "latency": "low",  # "low", "high" or seconds of input buffering
+            "endpointing": {
+                # Toggle mode only: stop automatically when the speaker finishes
+                "enabled": True,
+                "silence_threshold": 0.01,  # block RMS, 0..1 of full scale
+                "hangover_ms": 800,  # trailing silence before stopping
+                "min_speech_ms": 300  # speech needed before silence counts
+            },
+            "preprocessing": {
+                # Cleans each captured block before it is stored; helps noisy
+                # laptop mics, where Whisper hallucinates on hum and clatter
+                "enabled": True,
+                "dc_removal": True,
+                "highpass": {"enabled": True, "cutoff_hz": 80},
+                "noise_gate": {
+                    "enabled": False,
+                    "threshold_db": -50,  # block RMS, dBFS
+                    "attenuation_db": -30,
+                    "hold_ms": 250
+                },
+                "agc": {"enabled": False, "target_db": -20, "max_gain_db": 20}
+            }
+        },
+        "metrics": {
+            # Opt-in Prometheus text format: served on host:port, or
+            # rewritten every interval_s for node_exporter's textfile collector
+            "enabled": False,
+            "host": "127.0.0.1",
+            "port": None,  # e.g. 9464
+            "file": None,  # e.g. /var/lib/node_exporter/textfile/mywhisper.prom
+            "interval_s": 15
+        },
+        "profiling": {
+            # Profile this many utterances from startup; the tray menu starts
+            # the same session on demand. Output in directory/<timestamp>/
+            "utterances": 0,
+            "mode": "sampling",  # or "cprofile" for exact call counts as well
+            "interval_ms": 5,
+            "directory": "~/.config/mywhisper/profiles"
+        },
+        "logging": {
+            "level": "INFO",
+            "file": "~/.local/state/mywhisper/mywhisper.log",  # rotated; null for stderr only
+            "max_bytes": 5242880,
+            "backup_count": 3
         },
         "ui": {
             "show_notifications": True,
@@ -25,6 +135,21 @@ class Config:
         }
     }
 
+    # Values the JSON types alone do not pin down
+    CHOICES = {
+        "recording_mode": ("push", "toggle"),
+        "preempt_policy": ("none", "oldest", "all"),
+        "profiling.mode": ("sampling", "cprofile"),
+    }
+
+    # Values that may be given as any of several types
+    ALTERNATIVE_TYPES = {
+        "audio.latency": (str, int, float),
+    }
+
+    SAVE_DELAY_S = 0.5
+    POLL_INTERVAL_S = 2.0
+
     def __init__(self, config_path: str = None):
         if config_path is None:
             config_dir = Path.home() / ".config" / "mywhisper"
@@ -33,37 +158,121 @@ class Config:
         else:
             self.config_path = Path(config_path)
 
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._subscribers: List[Callable[[set], None]] = []
+        # Text of the last file we wrote or read, to tell our own writes
+        # apart from edits made by someone else
+        self._file_text: Optional[str] = None
+        self._dirty = False
+        self._save_wanted = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+
         self.config = self.load_config()
 
+    @classmethod
+    def merge(cls, defaults: Dict[str, Any], loaded: Dict[str, Any], path: str = "") -> Dict[str, Any]:
+        """Deep-merges loaded over defaults, keeping the default for any value of the wrong type"""
+        merged = copy.deepcopy(defaults)
+        for key, value in loaded.items():
+            name = f"{path}{key}"
+            if key not in defaults or defaults[key] is None:
+                merged[key] = value
+                continue
+            default = defaults[key]
+            if name in cls.ALTERNATIVE_TYPES:
+                if isinstance(value, cls.ALTERNATIVE_TYPES[name]) and not isinstance(value, bool):
+                    merged[key] = value
+                    continue
+            elif isinstance(default, dict):
+                if isinstance(value, dict):
+                    merged[key] = cls.merge(default, value, f"{name}.")
+                    continue
+            elif isinstance(default, bool):
+                if isinstance(value, bool):
+                    merged[key] = value
+                    continue
+            elif isinstance(default, (int, float)):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    merged[key] = value
+                    continue
+            elif isinstance(value, type(default)) or (isinstance(default, str) and value is None):
+                if name not in cls.CHOICES or value in cls.CHOICES[name]:
+                    merged[key] = value
+                    continue
+            logger.warning(f"Invalid config value {name}={value!r}; using default {default!r}")
+        return merged
+
     def load_config(self) -> Dict[str, Any]:
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r') as f:
-                    loaded_config = json.load(f)
-                    config = self.DEFAULT_CONFIG.copy()
-                    config.update(loaded_config)
-                    logger.info(f"Configuration loaded from {self.config_path}")
-                    return config
+                text = self.config_path.read_text()
+                config = self.merge(self.DEFAULT_CONFIG, json.loads(text))
+                self._file_text = text
+                logger.info(f"Configuration loaded from {self.config_path}")
+                return config
             except Exception as e:
                 logger.error(f"Failed to load configuration: {e}")
-                return self.DEFAULT_CONFIG.copy()
+                return copy.deepcopy(self.DEFAULT_CONFIG)
         else:
             logger.info("No configuration file found, using defaults")
             self.save_config(self.DEFAULT_CONFIG)
-            return self.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(self.DEFAULT_CONFIG)
 
     def save_config(self, config: Dict[str, Any] = None) -> bool:
-        if config is None:
-            config = self.config
+        """Writes the file now: temporary file, fsync, then rename over the old one"""
+        with self._lock:
+            if config is None:
+                config = self.config
+                self._dirty = False
+            text = json.dumps(config, indent=4)
 
-        try:
-            with open(self.config_path, 'w') as f:
-                json.dump(config, f, indent=4)
-            logger.info(f"Configuration saved to {self.config_path}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save configuration: {e}")
-            return False
+        # Separate lock, so set() never waits for the disk
+        with self._write_lock:
+            tmp_path = self.config_path.with_name(f".{self.config_path.name}.tmp")
+            try:
+                with open(tmp_path, 'w') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.config_path)
+                self._file_text = text
+                logger.info(f"Configuration saved to {self.config_path}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to save configuration: {e}")
+                return False
+
+    def flush(self) -> None:
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self.save_config()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._save_wanted.set()
+        self.flush()
+
+    def _schedule_save(self) -> None:
+        # Write-behind: callers on the hotkey, audio or tray threads only
+        # touch memory; the writer thread persists bursts of changes once
+        with self._lock:
+            self._dirty = True
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="config-writer", daemon=True)
+                self._writer.start()
+        self._save_wanted.set()
+
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self._save_wanted.wait()
+            if self._stop.wait(self.SAVE_DELAY_S):
+                return
+            self._save_wanted.clear()
+            self.flush()
 
     def get(self, key: str, default: Any = None) -> Any:
         keys = key.split('.')
@@ -77,13 +286,89 @@ class Config:
 
     def set(self, key: str, value: Any) -> None:
         keys = key.split('.')
-        config = self.config
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        config[keys[-1]] = value
-        self.save_config()
+        with self._lock:
+            if self.get(key) == value:
+                return
+            # Copy on write: readers keep using the old snapshot without a lock
+            snapshot = copy.deepcopy(self.config)
+            config = snapshot
+            for k in keys[:-1]:
+                if not isinstance(config.get(k), dict):
+                    config[k] = {}
+                config = config[k]
+            config[keys[-1]] = value
+            self.config = snapshot
+        self._schedule_save()
+
+    # Live reload
+
+    def subscribe(self, callback: Callable[[set], None]) -> None:
+        """Calls callback(changed top-level keys) after the file is changed by someone else.
+
+        Changes made through set() are not reported; the caller already
+        knows about them.
+        """
+        self._subscribers.append(callback)
+
+    def start_watching(self) -> None:
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        try:
+            watch = _Inotify(self.config_path)
+        except OSError as e:
+            logger.info(f"inotify unavailable ({e}); polling {self.config_path} for changes")
+            watch = None
+
+        try:
+            while not self._stop.is_set():
+                if watch is not None:
+                    changed = watch.wait(1.0)
+                else:
+                    self._stop.wait(self.POLL_INTERVAL_S)
+                    changed = True
+                if changed:
+                    self._reload()
+        finally:
+            if watch is not None:
+                watch.close()
+
+    def _reload(self) -> None:
+        # Holding the write lock, the file and _file_text always agree
+        with self._write_lock:
+            try:
+                text = self.config_path.read_text()
+            except OSError:
+                return
+            if text == self._file_text:
+                return
+            self._file_text = text
+            try:
+                loaded = json.loads(text)
+                if not isinstance(loaded, dict):
+                    raise ValueError("not a JSON object")
+            except ValueError as e:
+                # Probably saved half-way through an edit; wait for the next one
+                logger.error(f"Ignoring invalid configuration file: {e}")
+                return
+            config = self.merge(self.DEFAULT_CONFIG, loaded)
+            with self._lock:
+                changed = {key for key in config.keys() | self.config.keys() if config.get(key) != self.config.get(key)}
+                # The file wins over changes that were not written yet
+                self._dirty = False
+                self.config = config
+
+        if not changed:
+            return
+        logger.info(f"Configuration reloaded; changed: {', '.join(sorted(changed))}")
+        for callback in list(self._subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.error(f"Config subscriber failed: {e}")
 
     def get_hotkey(self) -> list:
         return self.config.get("hotkey", self.DEFAULT_CONFIG["hotkey"])
@@ -91,6 +376,12 @@ class Config:
     def set_hotkey(self, keys: list) -> None:
         self.set("hotkey", keys)
 
+    def get_cancel_hotkey(self) -> list:
+        return self.config.get("cancel_hotkey", self.DEFAULT_CONFIG["cancel_hotkey"])
+
+    def set_cancel_hotkey(self, keys: list) -> None:
+        self.set("cancel_hotkey", keys)
+
     def get_recording_mode(self) -> str:
         return self.config.get("recording_mode", self.DEFAULT_CONFIG["recording_mode"])
 
@@ -104,15 +395,119 @@ class Config:
     def set_model(self, model: str) -> None:
         self.set("model", model)
 
+    def get_custom_models(self) -> dict:
+        return self.config.get("custom_models", self.DEFAULT_CONFIG["custom_models"])
+
+    def add_custom_model(self, name: str, path: str) -> None:
+        custom_models = dict(self.get_custom_models())
+        custom_models[name] = path
+        self.set("custom_models", custom_models)
+
+    def get_model_repository_config(self) -> dict:
+        return self.config.get("model_repository", self.DEFAULT_CONFIG["model_repository"])
+
     def get_language(self) -> str:
         return self.config.get("language", self.DEFAULT_CONFIG["language"])
 
     def set_language(self, language: str) -> None:
         self.set("language", language)
 
+    def get_language_detection_config(self) -> dict:
+        return self.config.get("language_detection", self.DEFAULT_CONFIG["language_detection"])
+
+    def get_streaming_insert(self) -> bool:
+        return self.config.get("streaming_insert", self.DEFAULT_CONFIG["streaming_insert"])
+
+    def set_streaming_insert(self, enabled: bool) -> None:
+        self.set("streaming_insert", bool(enabled))
+
+    def get_metrics_config(self) -> dict:
+        return self.config.get("metrics", self.DEFAULT_CONFIG["metrics"])
+
+    def get_profiling_config(self) -> dict:
+        return self.config.get("profiling", self.DEFAULT_CONFIG["profiling"])
+
+    def get_logging_config(self) -> dict:
+        return self.config.get("logging", self.DEFAULT_CONFIG["logging"])
+
+    def get_history_config(self) -> dict:
+        return self.config.get("history", self.DEFAULT_CONFIG["history"])
+
+    def get_text_processing_config(self) -> dict:
+        return self.config.get("text_processing", self.DEFAULT_CONFIG["text_processing"])
+
+    def get_preempt_policy(self) -> str:
+        return self.config.get("preempt_policy", self.DEFAULT_CONFIG["preempt_policy"])
+
+    def set_preempt_policy(self, policy: str) -> None:
+        if policy in ["none", "oldest", "all"]:
+            self.set("preempt_policy", policy)
+
+    def get_inference_config(self) -> dict:
+        return self.config.get("inference", self.DEFAULT_CONFIG["inference"])
+
+    def set_inference_config(self, inference: dict) -> None:
+        merged = dict(self.get_inference_config())
+        merged.update(inference)
+        self.set("inference", merged)
+
     def get_audio_config(self) -> dict:
         return self.config.get("audio", self.DEFAULT_CONFIG["audio"])
 
     def reset_to_defaults(self) -> None:
-        self.config = self.DEFAULT_CONFIG.copy()
-        self.save_config()
\ No newline at end of file
+        with self._lock:
+            self.config = copy.deepcopy(self.DEFAULT_CONFIG)
+        self._schedule_save()
+
+
+class _Inotify:
+    """Watches the directory of one file for writes and renames onto it.
+
+    Editors and Config.save_config replace the file by renaming, which a
+    watch on the file itself would miss.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _HEADER = struct.Struct("iIII")
+
+    def __init__(self, path: Path):
+        import ctypes
+        import ctypes.util
+
+        self.name = path.name.encode()
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("no inotify in libc")
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, str(path.parent).encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"cannot watch {path.parent}")
+
+    def wait(self, timeout: float) -> bool:
+        """True if the file was written or replaced within timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        changed = False
+        while offset + self._HEADER.size <= len(data):
+            _, _, _, length = self._HEADER.unpack_from(data, offset)
+            offset += self._HEADER.size
+            if data[offset:offset + length].rstrip(b"\0") == self.name:
+                changed = True
+            offset += length
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
\ No newline at end of file
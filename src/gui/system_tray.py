@@ -1,8 +1,10 @@
 import pystray
 from PIL import Image, ImageDraw
 import threading
+import subprocess
 from typing import Callable, Optional
 import logging
+from ..model_registry import FAMILIES
 
 logger = logging.getLogger(__name__)
 
@@ -31,36 +33,11 @@ class SystemTrayIcon:
                     )
                 )
             ),
-            pystray.MenuItem(
-                "Model",
-                pystray.Menu(
-                    pystray.MenuItem(
-                        "Tiny (39MB)",
-                        lambda: self._on_model_change("tiny"),
-                        checked=lambda item: self.app_controller.get_model() == "tiny"
-                    ),
-                    pystray.MenuItem(
-                        "Base (74MB)",
-                        lambda: self._on_model_change("base"),
-                        checked=lambda item: self.app_controller.get_model() == "base"
-                    ),
-                    pystray.MenuItem(
-                        "Small (244MB)",
-                        lambda: self._on_model_change("small"),
-                        checked=lambda item: self.app_controller.get_model() == "small"
-                    ),
-                    pystray.MenuItem(
-                        "Medium (769MB)",
-                        lambda: self._on_model_change("medium"),
-                        checked=lambda item: self.app_controller.get_model() == "medium"
-                    ),
-                    pystray.MenuItem(
-                        "Large (1550MB)",
-                        lambda: self._on_model_change("large"),
-                        checked=lambda item: self.app_controller.get_model() == "large"
-                    )
-                )
-            ),
+            pystray.MenuItem("Model", self._create_model_menu()),
+            # Rebuilt every time the menu opens
+            pystray.MenuItem("History", pystray.Menu(self._history_items)),
+            pystray.MenuItem("Cancel Transcription", self._on_cancel),
+            pystray.MenuItem("Profile Next 5 Utterances", self._on_profile),
             pystray.MenuItem("Settings", self._on_settings),
             pystray.MenuItem("", None),
             pystray.MenuItem("Quit", self._on_quit)
@@ -69,6 +46,71 @@ class SystemTrayIcon:
         image = self._create_tray_image(recording=False)
         self.icon = pystray.Icon("MyWhisper", image, "MyWhisper - Voice Dictation", menu)
 
+    def _create_model_menu(self) -> pystray.Menu:
+        families = {}
+        for model_name in self.app_controller.get_available_models():
+            family = self.app_controller.get_model_family(model_name)
+            families.setdefault(family, []).append(
+                pystray.MenuItem(
+                    self.app_controller.describe_model(model_name),
+                    self._model_action(model_name),
+                    checked=self._model_checked(model_name)
+                )
+            )
+
+        return pystray.Menu(*[
+            pystray.MenuItem(family, pystray.Menu(*families[family]))
+            for family in FAMILIES if family in families
+        ])
+
+    def _model_action(self, model_name: str) -> Callable:
+        return lambda: self._on_model_change(model_name)
+
+    def _model_checked(self, model_name: str) -> Callable:
+        return lambda item: self.app_controller.get_model() == model_name
+
+    def _history_items(self):
+        items = [pystray.MenuItem("Search...", self._on_search_history), pystray.Menu.SEPARATOR]
+        for entry in self.app_controller.get_recent_history(10):
+            text = entry["text"]
+            label = text if len(text) <= 50 else text[:47] + "..."
+            items.append(pystray.MenuItem(label, self._reinsert_action(text)))
+        return items
+
+    def _reinsert_action(self, text: str) -> Callable:
+        return lambda: self.app_controller.reinsert(text)
+
+    def _on_search_history(self, icon, item):
+        # zenity blocks until the user answers, so keep it off the tray thread
+        threading.Thread(target=self._search_history_dialog, daemon=True).start()
+
+    def _search_history_dialog(self):
+        try:
+            query = subprocess.run(
+                ["zenity", "--entry", "--title=MyWhisper History", "--text=Search transcripts:"],
+                capture_output=True, text=True
+            )
+            if query.returncode != 0:
+                return
+            entries = self.app_controller.search_history(query.stdout.strip())
+            if not entries:
+                subprocess.run(["zenity", "--info", "--text=No matching transcripts"])
+                return
+            rows = []
+            for entry in entries:
+                rows.extend([str(entry["id"]), entry["text"]])
+            choice = subprocess.run(
+                ["zenity", "--list", "--title=MyWhisper History", "--text=Select a transcript to insert",
+                 "--column=id", "--column=Transcript", "--hide-column=1", "--width=600", "--height=400", *rows],
+                capture_output=True, text=True
+            )
+            selected = choice.stdout.strip()
+            for entry in entries:
+                if str(entry["id"]) == selected:
+                    self.app_controller.reinsert(entry["text"])
+        except FileNotFoundError:
+            logger.warning("History search needs zenity; use `main.py history QUERY` instead")
+
     def _create_tray_image(self, recording: bool = False) -> Image.Image:
         size = 64
         image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
@@ -103,6 +145,13 @@ class SystemTrayIcon:
         self.app_controller.change_model(model_name)
         logger.info(f"Model changed to {model_name}")
 
+    def _on_cancel(self, icon, item):
+        logger.info("Cancel requested")
+        self.app_controller.cancel()
+
+    def _on_profile(self, icon, item):
+        self.app_controller.profile_next(5)
+
     def _on_settings(self, icon, item):
         logger.info("Settings menu clicked")
 
@@ -125,5 +174,6 @@ class SystemTrayIcon:
 
     def stop(self):
         if self.icon:
-            self.icon.stop()
+            icon, self.icon = self.icon, None
+            icon.stop()
             logger.info("System tray icon stopped")
\ No newline at end of file
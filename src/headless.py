@@ -0,0 +1,191 @@
+"""Headless service mode for MyWhisper
+
+No tray, no Qt, no pynput and no X11 insertion: recordings are started and
+stopped through a unix control socket and transcripts are written to stdout,
+a file or the control socket's subscribers.
+
+    echo toggle | nc -U $XDG_RUNTIME_DIR/mywhisper.sock
+    python main.py ctl toggle
+"""
+
+import os
+import sys
+import json
+import socket
+import threading
+import socketserver
+from pathlib import Path
+from typing import Optional, Callable, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or str(Path.home() / ".config" / "mywhisper")
+    return os.path.join(runtime_dir, "mywhisper.sock")
+
+
+class TranscriptSink:
+    """Stands in for TextInserter: receives each transcribed piece of text.
+
+    target is "stdout", "socket" (control socket subscribers) or a file path.
+    """
+
+    def __init__(self, target: str = "stdout"):
+        self.target = target
+        self._lock = threading.Lock()
+        self._subscribers: List[socket.socket] = []
+
+    def get_active_window_class(self) -> Optional[str]:
+        return None
+
+    def subscribe(self, connection: socket.socket) -> None:
+        with self._lock:
+            self._subscribers.append(connection)
+
+    def insert_at_cursor(self, text: str) -> bool:
+        line = text.strip() + "\n"
+        try:
+            if self.target == "stdout":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            elif self.target == "socket":
+                self._broadcast(line.encode())
+            else:
+                with open(os.path.expanduser(self.target), "a") as f:
+                    f.write(line)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to write transcript to {self.target}: {e}")
+            return False
+
+    def _broadcast(self, data: bytes) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for connection in subscribers:
+            try:
+                connection.sendall(data)
+            except OSError:
+                with self._lock:
+                    self._subscribers.remove(connection)
+
+
+class ControlServer:
+    """Line-based unix socket: start, stop, toggle, cancel, status, subscribe, quit,
+    `transcribe PATH`, which queues a file as a background job, and
+    `profile [N]`, which profiles the next N utterances"""
+
+    COMMANDS = ("start", "stop", "toggle", "cancel", "status", "subscribe", "quit", "transcribe", "profile")
+
+    def __init__(
+        self,
+        path: str,
+        post: Callable[[str], None],
+        status: Callable[[], dict],
+        sink: Optional[TranscriptSink] = None,
+        on_quit: Optional[Callable[[], None]] = None,
+        transcribe: Optional[Callable[[str], None]] = None,
+        profile: Optional[Callable[[int], bool]] = None
+    ):
+        self.path = path
+        self.post = post
+        self.status = status
+        self.sink = sink
+        self.on_quit = on_quit
+        self.transcribe = transcribe
+        self.profile = profile
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def start(self) -> bool:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+            control = self
+
+            class Handler(socketserver.StreamRequestHandler):
+                def handle(self):
+                    for raw in self.rfile:
+                        reply = control.handle_command(raw.decode().strip(), self.connection)
+                        if reply is None:
+                            # Subscribed: keep the connection open for transcripts
+                            self.rfile.read()
+                            return
+                        self.wfile.write((reply + "\n").encode())
+
+            self._server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+            self._server.daemon_threads = True
+            os.chmod(self.path, 0o600)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logger.info(f"Control socket listening on {self.path}")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to open control socket {self.path}: {e}")
+            return False
+
+    def handle_command(self, command: str, connection: Optional[socket.socket] = None) -> Optional[str]:
+        command, _, argument = command.partition(" ")
+        if command not in self.COMMANDS:
+            return f"error unknown command: {command}"
+        if command == "transcribe":
+            if not argument or not os.path.isfile(argument):
+                return f"error no such file: {argument}"
+            if self.transcribe is None:
+                return "error file transcription is not available"
+            self.transcribe(argument)
+            return "ok queued"
+        if command == "profile":
+            if self.profile is None:
+                return "error profiling is not available"
+            if argument and not argument.isdigit():
+                return f"error not a number of utterances: {argument}"
+            if not self.profile(int(argument or 5)):
+                return "error a profiling session is already running"
+            return "ok profiling"
+        if command == "status":
+            return json.dumps(self.status())
+        if command == "subscribe":
+            if self.sink is None or self.sink.target != "socket" or connection is None:
+                return "error transcripts are not sent to the socket (use --output socket)"
+            self.sink.subscribe(connection)
+            return None
+        if command == "quit":
+            if self.on_quit:
+                self.on_quit()
+            return "ok"
+        self.post(command)
+        return "ok"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def send_command(path: str, command: str, timeout: float = 5.0) -> Optional[str]:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(path)
+            client.sendall((command + "\n").encode())
+            client.shutdown(socket.SHUT_WR)
+            return client.makefile().readline().strip()
+    except OSError as e:
+        logger.error(f"Failed to reach MyWhisper at {path}: {e}")
+        return None
+
+
+def follow_transcripts(path: str):
+    # Yields transcript lines until the service closes the connection
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall(b"subscribe\n")
+        for line in client.makefile():
+            yield line.rstrip("\n")
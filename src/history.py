@@ -0,0 +1,266 @@
+"""Transcript history in SQLite with full-text search
+
+Every finished utterance is handed to record(), which only enqueues it: a
+single writer thread owns the write connection, so the insertion path never
+waits on disk. Readers (search, recent, latency statistics) open their own
+connections; WAL mode lets them run while the writer commits.
+"""
+
+import os
+import time
+import zlib
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("capture_ms", "decode_ms", "insert_ms", "total_ms")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS utterances (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    text TEXT NOT NULL,
+    model TEXT,
+    language TEXT,
+    audio_s REAL,
+    capture_ms REAL,
+    decode_ms REAL,
+    insert_ms REAL,
+    total_ms REAL,
+    audio BLOB,
+    xruns INTEGER
+);
+CREATE INDEX IF NOT EXISTS utterances_created_at ON utterances(created_at);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts
+    USING fts5(text, content='utterances', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS utterances_ai AFTER INSERT ON utterances BEGIN
+    INSERT INTO utterances_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS utterances_ad AFTER DELETE ON utterances BEGIN
+    INSERT INTO utterances_fts(utterances_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def compress_audio(samples) -> bytes:
+    # float32 -1..1 -> zlib-compressed 16-bit PCM
+    import numpy as np
+
+    pcm = np.clip(np.asarray(samples) * 32768.0, -32768, 32767).astype("<i2")
+    return zlib.compress(pcm.tobytes(), 6)
+
+
+def decompress_audio(blob: bytes):
+    import numpy as np
+
+    return np.frombuffer(zlib.decompress(blob), dtype="<i2").astype(np.float32) / 32768.0
+
+
+class TranscriptHistory:
+    PRUNE_INTERVAL_S = 3600
+
+    def __init__(
+        self,
+        path: str = "~/.local/share/mywhisper/history.db",
+        store_audio: bool = False,
+        retention_days: float = 90,
+        max_entries: int = 50000
+    ):
+        self.path = Path(os.path.expanduser(path))
+        self.store_audio = store_audio
+        self.retention_days = retention_days
+        self.max_entries = max_entries
+        self.has_fts = False
+        self._queue: queue.Queue = queue.Queue()
+        self._last_prune = 0.0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer_conn = self._connect()
+        self._create_schema(self._writer_conn)
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_config(cls, history_config: Optional[dict]) -> Optional["TranscriptHistory"]:
+        history_config = history_config or {}
+        if not history_config.get("enabled", False):
+            return None
+        try:
+            return cls(
+                path=history_config.get("path", "~/.local/share/mywhisper/history.db"),
+                store_audio=history_config.get("store_audio", False),
+                retention_days=history_config.get("retention_days", 90),
+                max_entries=history_config.get("max_entries", 50000)
+            )
+        except sqlite3.Error as e:
+            logger.error(f"Transcript history disabled: {e}")
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+        # Only takes effect on a new database, before anything is written
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(utterances)")}
+        if "xruns" not in columns:
+            # Databases from before input overflows were tracked
+            conn.execute("ALTER TABLE utterances ADD COLUMN xruns INTEGER")
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite has no FTS5 ({e}); history search falls back to LIKE")
+        conn.commit()
+
+    # Writer side
+
+    def record(self, entry: dict) -> None:
+        """Queue an utterance: text, model, language, audio (samples), *_ms timings and xruns"""
+        entry.setdefault("created_at", time.time())
+        self._queue.put(entry)
+
+    def _write_loop(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                self._write(entry)
+                # Batch whatever else queued up meanwhile into the same commit
+                while not self._queue.empty():
+                    entry = self._queue.get_nowait()
+                    if entry is None:
+                        self._writer_conn.commit()
+                        return
+                    self._write(entry)
+                self._writer_conn.commit()
+                if time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_S:
+                    self._prune()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write transcript history: {e}")
+
+    def _write(self, entry: dict) -> None:
+        audio = entry.get("audio")
+        blob = None
+        audio_s = entry.get("audio_s")
+        if audio is not None and not isinstance(audio, str):
+            audio_s = audio_s or len(audio) / 16000
+            if self.store_audio:
+                blob = compress_audio(audio)
+        self._writer_conn.execute(
+            "INSERT INTO utterances (created_at, text, model, language, audio_s, "
+            "capture_ms, decode_ms, insert_ms, total_ms, audio, xruns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry["created_at"], entry["text"], entry.get("model"), entry.get("language"), audio_s,
+                entry.get("capture_ms"), entry.get("decode_ms"), entry.get("insert_ms"),
+                entry.get("total_ms"), blob, entry.get("xruns"),
+            )
+        )
+
+    def _prune(self) -> int:
+        # Runs on the writer thread: drop old and excess rows, then give
+        # the freed pages back to the file system
+        self._last_prune = time.monotonic()
+        conn = self._writer_conn
+        deleted = 0
+        if self.retention_days:
+            cutoff = time.time() - self.retention_days * 86400
+            deleted += conn.execute("DELETE FROM utterances WHERE created_at < ?", (cutoff,)).rowcount
+        if self.max_entries:
+            deleted += conn.execute(
+                "DELETE FROM utterances WHERE id NOT IN "
+                "(SELECT id FROM utterances ORDER BY id DESC LIMIT ?)",
+                (self.max_entries,)
+            ).rowcount
+        conn.commit()
+        if deleted:
+            conn.execute("PRAGMA incremental_vacuum")
+            conn.commit()
+            logger.info(f"Pruned {deleted} transcript(s) from history")
+        return deleted
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(5)
+        self._writer_conn.close()
+
+    # Reader side
+
+    def _query(self, sql: str, params: tuple = ()) -> List[dict]:
+        conn = sqlite3.connect(str(self.path), timeout=5)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    _COLUMNS = "u.id, u.created_at, u.text, u.model, u.language, u.audio_s, " \
+               "u.capture_ms, u.decode_ms, u.insert_ms, u.total_ms, u.xruns"
+
+    def recent(self, limit: int = 10) -> List[dict]:
+        return self._query(f"SELECT {self._COLUMNS} FROM utterances u ORDER BY u.id DESC LIMIT ?", (limit,))
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        query = query.strip()
+        if not query:
+            return self.recent(limit)
+        if self.has_fts:
+            # Each word as a quoted prefix term, so user input is never FTS syntax
+            terms = " ".join('"' + word.replace('"', '""') + '"*' for word in query.split())
+            try:
+                return self._query(
+                    f"SELECT {self._COLUMNS} FROM utterances_fts f JOIN utterances u ON u.id = f.rowid "
+                    "WHERE utterances_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (terms, limit)
+                )
+            except sqlite3.OperationalError as e:
+                logger.warning(f"History search failed: {e}")
+                return []
+        return self._query(
+            f"SELECT {self._COLUMNS} FROM utterances u WHERE u.text LIKE ? ORDER BY u.id DESC LIMIT ?",
+            (f"%{query}%", limit)
+        )
+
+    def get_audio(self, utterance_id: int):
+        rows = self._query("SELECT audio FROM utterances WHERE id = ?", (utterance_id,))
+        if not rows or rows[0]["audio"] is None:
+            return None
+        return decompress_audio(rows[0]["audio"])
+
+    def latency_stats(self, days: float = 30) -> List[dict]:
+        """Per day: utterance count and mean / p50 / p95 of each stage"""
+        rows = self._query(
+            f"SELECT date(created_at, 'unixepoch', 'localtime') AS day, {', '.join(STAGES)} "
+            "FROM utterances WHERE created_at >= ? ORDER BY day",
+            (time.time() - days * 86400,)
+        )
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row["day"], []).append(row)
+
+        stats = []
+        for day, day_rows in by_day.items():
+            summary = {"day": day, "utterances": len(day_rows)}
+            for stage in STAGES:
+                values = sorted(row[stage] for row in day_rows if row[stage] is not None)
+                if values:
+                    summary[stage] = {
+                        "mean": round(sum(values) / len(values), 1),
+                        "p50": round(values[len(values) // 2], 1),
+                        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+                    }
+            stats.append(summary)
+        return stats
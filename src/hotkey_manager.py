@@ -1,13 +1,15 @@
 from pynput import keyboard
 from typing import Callable, Optional, Set
-import threading
 import logging
+from . import metrics, profiling
 
 logger = logging.getLogger(__name__)
 
 
 class HotkeyManager:
-    def __init__(self):
+    def __init__(self, listener_factory: Optional[Callable] = None):
+        # Defaults to keyboard.Listener; the replay harness passes a fake
+        self.listener_factory = listener_factory or keyboard.Listener
         self.listener: Optional[keyboard.Listener] = None
         self.hotkey_callback: Optional[Callable] = None
         self.hotkey_combination: Set[keyboard.Key | keyboard.KeyCode] = {
@@ -15,30 +17,41 @@ class HotkeyManager:
             keyboard.Key.alt_l,
             keyboard.Key.space
         }
+        self.cancel_combination: Set[keyboard.Key | keyboard.KeyCode] = set()
         self.current_keys: Set[keyboard.Key | keyboard.KeyCode] = set()
         self.recording_mode = "push"  # "push" or "toggle"
         self.is_pressed = False
+        self.cancel_pressed = False
 
-    def set_hotkey(self, keys: list) -> None:
-        self.hotkey_combination = set()
+    def _parse_keys(self, keys: list) -> Set[keyboard.Key | keyboard.KeyCode]:
+        combination = set()
         for key in keys:
             if isinstance(key, str):
                 if key.lower() == "ctrl":
-                    self.hotkey_combination.add(keyboard.Key.ctrl_l)
+                    combination.add(keyboard.Key.ctrl_l)
                 elif key.lower() == "alt":
-                    self.hotkey_combination.add(keyboard.Key.alt_l)
+                    combination.add(keyboard.Key.alt_l)
                 elif key.lower() == "shift":
-                    self.hotkey_combination.add(keyboard.Key.shift_l)
+                    combination.add(keyboard.Key.shift_l)
                 elif key.lower() == "space":
-                    self.hotkey_combination.add(keyboard.Key.space)
+                    combination.add(keyboard.Key.space)
+                elif key.lower() in ("esc", "escape"):
+                    combination.add(keyboard.Key.esc)
                 else:
                     try:
-                        self.hotkey_combination.add(keyboard.KeyCode.from_char(key))
+                        combination.add(keyboard.KeyCode.from_char(key))
                     except:
                         logger.warning(f"Invalid key: {key}")
+        return combination
 
+    def set_hotkey(self, keys: list) -> None:
+        self.hotkey_combination = self._parse_keys(keys)
         logger.info(f"Hotkey set to: {keys}")
 
+    def set_cancel_hotkey(self, keys: list) -> None:
+        self.cancel_combination = self._parse_keys(keys) if keys else set()
+        logger.info(f"Cancel hotkey set to: {keys}")
+
     def set_recording_mode(self, mode: str) -> None:
         if mode in ["push", "toggle"]:
             self.recording_mode = mode
@@ -47,13 +60,15 @@ class HotkeyManager:
             logger.warning(f"Invalid recording mode: {mode}")
 
     def register_callback(self, callback: Callable) -> None:
+        # Invoked on the pynput listener thread, so it must not block;
+        # MyWhisperApp only posts the action to its event loop
         self.hotkey_callback = callback
 
     def start(self) -> None:
         if self.listener:
             self.stop()
 
-        self.listener = keyboard.Listener(
+        self.listener = self.listener_factory(
             on_press=self._on_press,
             on_release=self._on_release
         )
@@ -62,45 +77,57 @@ class HotkeyManager:
 
     def _on_press(self, key) -> None:
         self.current_keys.add(key)
-        logger.debug(f"Key pressed: {key}, Current keys: {self.current_keys}")
+        # Runs on every keystroke system-wide: skip formatting unless enabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Key pressed: {key}, Current keys: {self.current_keys}")
+
+        if self._is_combination_pressed(self.cancel_combination) and not self.cancel_pressed:
+            self.cancel_pressed = True
+            logger.info("Cancel hotkey activated")
+            self._fire("cancel")
+            return
 
         if self._is_hotkey_pressed() and not self.is_pressed:
             self.is_pressed = True
             logger.info(f"Hotkey activated! Mode: {self.recording_mode}")
-            if self.hotkey_callback:
-                if self.recording_mode == "push":
-                    threading.Thread(
-                        target=lambda: self.hotkey_callback("start"),
-                        daemon=True
-                    ).start()
-                elif self.recording_mode == "toggle":
-                    threading.Thread(
-                        target=lambda: self.hotkey_callback("toggle"),
-                        daemon=True
-                    ).start()
+            if self.recording_mode == "push":
+                self._fire("start")
+            elif self.recording_mode == "toggle":
+                self._fire("toggle")
 
     def _on_release(self, key) -> None:
         try:
             self.current_keys.remove(key)
-            logger.debug(f"Key released: {key}, Current keys: {self.current_keys}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Key released: {key}, Current keys: {self.current_keys}")
         except KeyError:
             pass
 
+        if self.cancel_pressed and not self._is_combination_pressed(self.cancel_combination):
+            self.cancel_pressed = False
+
         if self.recording_mode == "push" and self.is_pressed:
             if not self._is_hotkey_pressed():
                 self.is_pressed = False
                 logger.info("Hotkey released - stopping recording")
-                if self.hotkey_callback:
-                    threading.Thread(
-                        target=lambda: self.hotkey_callback("stop"),
-                        daemon=True
-                    ).start()
+                self._fire("stop")
         elif self.recording_mode == "toggle":
             if not self._is_hotkey_pressed():
                 self.is_pressed = False
 
+    def _fire(self, action: str) -> None:
+        metrics.HOTKEY_EVENTS.inc(action=action)
+        if self.hotkey_callback:
+            with profiling.section("hotkey"):
+                self.hotkey_callback(action)
+
     def _is_hotkey_pressed(self) -> bool:
-        for key in self.hotkey_combination:
+        return self._is_combination_pressed(self.hotkey_combination)
+
+    def _is_combination_pressed(self, combination: Set[keyboard.Key | keyboard.KeyCode]) -> bool:
+        if not combination:
+            return False
+        for key in combination:
             if isinstance(key, keyboard.Key):
                 if key not in self.current_keys:
                     alt_key = None
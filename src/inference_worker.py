@@ -0,0 +1,437 @@
+"""Out-of-process inference for MyWhisper
+
+The WhisperModel lives in a child process so that a long decode can never
+stall the hotkey listener, PortAudio or the UI, and a CTranslate2 crash only
+costs a worker restart. Audio is handed over through shared memory; only
+small control messages go through the pipe.
+"""
+
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Callable, Dict
+import logging
+
+from .transcriber import WhisperTranscriber, TranscriptionJob, AudioInput, INTERACTIVE, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # The parent owns the segment; keep this process's resource tracker
+    # from unlinking it when the worker exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _worker_main(conn, transcriber_kwargs: dict) -> None:
+    import numpy as np
+
+    try:
+        transcriber = WhisperTranscriber(**transcriber_kwargs)
+    except Exception as e:
+        conn.send(("failed", None, str(e)))
+        return
+    conn.send(("ready", None, transcriber.model_name))
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    # Created on receipt, so a cancel for a job still waiting in its queue
+    # only has to mark it
+    jobs: Dict[int, TranscriptionJob] = {}
+    jobs_lock = threading.Lock()
+    # One decoder thread per priority: a file job keeps its thread while an
+    # utterance decodes on the other, and the transcriber pauses the file
+    # job between segments exactly as it does in process
+    queues = {INTERACTIVE: queue.Queue(), BACKGROUND: queue.Queue()}
+
+    def run(message):
+        _, job_id, shm_name, n_samples, language, beam_size, context, priority = message
+        with jobs_lock:
+            job = jobs[job_id]
+        if job.cancelled:
+            transcriber._finish_job(job)
+            with jobs_lock:
+                jobs.pop(job_id, None)
+            send(("cancelled", job_id, None))
+            return
+
+        shm = _attach_shared_memory(shm_name)
+        try:
+            audio = np.ndarray((n_samples,), dtype=np.float32, buffer=shm.buf)
+            transcriber.language = language
+            transcriber.beam_size = beam_size
+
+            text = transcriber.transcribe(
+                audio,
+                segment_callback=lambda piece: send(("segment", job_id, piece)),
+                job=job,
+                progress_callback=lambda fraction: send(("progress", job_id, fraction))
+            )
+            del audio
+            # The language cache lives here; the parent reports its counts
+            send(("language_stats", job_id, transcriber.get_language_stats()))
+            if job.cancelled:
+                send(("cancelled", job_id, None))
+            elif text is None:
+                send(("error", job_id, "Transcription failed"))
+            else:
+                send(("done", job_id, text))
+        except Exception as e:
+            send(("error", job_id, str(e)))
+        finally:
+            transcriber._finish_job(job)
+            with jobs_lock:
+                jobs.pop(job_id, None)
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+    def decode_loop(jobs_queue):
+        while True:
+            message = jobs_queue.get()
+            if message is None:
+                return
+            run(message)
+
+    for priority, jobs_queue in queues.items():
+        threading.Thread(target=decode_loop, args=(jobs_queue,), name=f"decode-{priority}", daemon=True).start()
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "cancel":
+            with jobs_lock:
+                job = jobs.get(message[1])
+            if job is not None:
+                job.cancel()
+        elif kind == "transcribe":
+            job_id, context, priority = message[1], message[6], message[7]
+            with jobs_lock:
+                jobs[job_id] = transcriber.create_job(None, context, priority)
+            queues.get(priority, queues[INTERACTIVE]).put(message)
+
+    transcriber.cancel_all()
+    for jobs_queue in queues.values():
+        jobs_queue.put(None)
+
+
+class _WorkerHandle:
+    def __init__(self, context, transcriber_kwargs: dict):
+        self.model_name = transcriber_kwargs["model_name"]
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, transcriber_kwargs),
+            name="mywhisper-inference",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.send_lock = threading.Lock()
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.conn.poll(timeout):
+            return False
+        try:
+            kind, _, detail = self.conn.recv()
+        except EOFError:
+            return False
+        if kind != "ready":
+            logger.error(f"Inference worker failed to load model: {detail}")
+            return False
+        return True
+
+    def send(self, message: tuple) -> bool:
+        try:
+            with self.send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, ValueError, BrokenPipeError):
+            return False
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        self.send(("stop",))
+        self.process.join(2)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class OutOfProcessTranscriber(WhisperTranscriber):
+    """Drop-in WhisperTranscriber whose model runs in a supervised subprocess"""
+
+    READY_TIMEOUT = 300.0
+    MAX_RESTART_DELAY = 30.0
+
+    def __init__(self, prewarm_spare: bool = True, **kwargs):
+        self.prewarm_spare = prewarm_spare
+        self._context = multiprocessing.get_context("spawn")
+        self._worker: Optional[_WorkerHandle] = None
+        self._spare: Optional[_WorkerHandle] = None
+        self._worker_lock = threading.Lock()
+        self._pending: Dict[int, tuple] = {}
+        self._job_ids = itertools.count(1)
+        self._stopping = False
+        self._language_stats: Optional[dict] = None
+        self.restart_count = 0
+        super().__init__(**kwargs)
+        if self.batch_scheduler:
+            logger.warning("Batching needs the in-process model; ignoring it with out_of_process")
+            self.batch_scheduler = None
+
+    def _worker_kwargs(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "language": self.language,
+            "device": self.device,
+            "model_repository": self.model_repository,
+            "model_registry": self.model_registry,
+            "compute_type": self.compute_type,
+            "cpu_threads": self.cpu_threads,
+            "beam_size": self.beam_size,
+            "num_workers": self.num_workers,
+            "language_detection": {
+                "scope": self.language_cache.scope,
+                "candidates": self.language_cache.candidates,
+                "min_confidence": self.language_cache.min_confidence,
+            },
+            "long_audio": {
+                "enabled": self.long_audio_enabled,
+                "min_duration_s": self.long_audio_min_duration,
+            },
+        }
+
+    def _spawn(self) -> Optional[_WorkerHandle]:
+        start = time.perf_counter()
+        worker = _WorkerHandle(self._context, self._worker_kwargs())
+        if not worker.wait_ready(self.READY_TIMEOUT):
+            worker.stop()
+            return None
+        logger.info(f"Inference worker {worker.process.pid} ready in {time.perf_counter() - start:.1f} s")
+        return worker
+
+    def _load_model(self) -> None:
+        self._model_ready.clear()
+        try:
+            self._stop_workers()
+            worker = self._spawn()
+            if worker is None:
+                raise RuntimeError("Inference worker failed to start")
+            self._activate(worker)
+            if self.prewarm_spare:
+                threading.Thread(target=self._prepare_spare, daemon=True).start()
+        finally:
+            self._model_ready.set()
+
+    def _release_model(self) -> None:
+        # The whole worker goes; a standby model would need a worker of its own
+        self._model_ready.clear()
+        self._stop_workers()
+
+    def _restore_model(self) -> None:
+        self._load_model()
+
+    def get_language_stats(self) -> dict:
+        # As of the last finished job; a restarted worker starts from zero
+        return self._language_stats or super().get_language_stats()
+
+    @property
+    def model_ready(self) -> bool:
+        # self.model stays None here; the model lives in the worker
+        with self._worker_lock:
+            worker = self._worker
+        return worker is not None and worker.is_alive() and self._model_ready.is_set()
+
+    def _activate(self, worker: _WorkerHandle) -> None:
+        with self._worker_lock:
+            self._worker = worker
+        threading.Thread(target=self._read_loop, args=(worker,), daemon=True).start()
+
+    def _prepare_spare(self) -> None:
+        spare = self._spawn()
+        with self._worker_lock:
+            if (spare and self._spare is None and not self._stopping
+                    and spare.model_name == self.model_name):
+                self._spare = spare
+                spare = None
+        if spare:
+            spare.stop()
+
+    def _read_loop(self, worker: _WorkerHandle) -> None:
+        while True:
+            try:
+                kind, job_id, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            pending = self._pending.get(job_id)
+            if pending:
+                pending[1].put((kind, payload))
+        self._on_worker_exit(worker)
+
+    def _on_worker_exit(self, worker: _WorkerHandle) -> None:
+        # Fail whatever was running on the dead worker
+        for job_id, (owner, results) in list(self._pending.items()):
+            if owner is worker:
+                results.put(("error", "inference worker exited"))
+
+        with self._worker_lock:
+            if worker is not self._worker or self._stopping:
+                return
+            spare, self._spare = self._spare, None
+
+        self.restart_count += 1
+        logger.error(f"Inference worker exited with code {worker.process.exitcode}, restarting")
+
+        if spare and spare.is_alive():
+            self._activate(spare)
+        else:
+            self._model_ready.clear()
+            time.sleep(min(self.MAX_RESTART_DELAY, 0.5 * 2 ** min(self.restart_count, 6)))
+            replacement = self._spawn()
+            if replacement:
+                self._activate(replacement)
+            self._model_ready.set()
+
+        if self.prewarm_spare:
+            threading.Thread(target=self._prepare_spare, daemon=True).start()
+
+    def _as_array(self, audio: AudioInput):
+        import numpy as np
+
+        if not isinstance(audio, str):
+            return np.ascontiguousarray(audio, dtype=np.float32)
+
+        import os
+        import wave
+        try:
+            with wave.open(audio, 'rb') as wf:
+                frames = wf.readframes(wf.getnframes())
+                channels = wf.getnchannels()
+            samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            return np.ascontiguousarray(samples)
+        finally:
+            try:
+                os.remove(audio)
+            except OSError:
+                pass
+
+    def _transcribe(
+        self,
+        audio: AudioInput,
+        callback: Optional[Callable[[str], None]],
+        segment_callback: Optional[Callable[[str], None]],
+        job: TranscriptionJob,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> Optional[str]:
+        samples = self._as_array(audio)
+        if job.cancelled or samples.size == 0:
+            return None
+
+        self.prepare()
+        if not self._model_ready.is_set():
+            logger.info("Waiting for inference worker")
+            self._model_ready.wait()
+
+        with self._worker_lock:
+            worker = self._worker
+        if worker is None:
+            logger.error("No inference worker available")
+            return None
+
+        # The worker also pauses a running background job between segments
+        # while an interactive one decodes; this only holds back new ones
+        self._yield_to_interactive(job)
+        if job.cancelled:
+            return None
+
+        job_id = next(self._job_ids)
+        results = queue.Queue()
+        self._pending[job_id] = (worker, results)
+        shm = shared_memory.SharedMemory(create=True, size=samples.nbytes)
+        try:
+            import numpy as np
+            np.ndarray(samples.shape, dtype=np.float32, buffer=shm.buf)[:] = samples
+
+            if not worker.send((
+                "transcribe", job_id, shm.name, samples.size,
+                self.language, self.beam_size, job.context, job.priority
+            )):
+                logger.error("Failed to hand audio to inference worker")
+                return None
+            # Registered after the job reached the pipe, so the worker
+            # always knows the id a cancel refers to
+            job.add_cancel_callback(lambda: worker.send(("cancel", job_id)))
+
+            while True:
+                kind, payload = results.get()
+                if kind == "segment":
+                    if segment_callback and not job.cancelled:
+                        segment_callback(payload)
+                elif kind == "progress":
+                    if progress_callback:
+                        progress_callback(payload)
+                elif kind == "language_stats":
+                    self._language_stats = payload
+                elif kind == "done":
+                    text = payload
+                    break
+                elif kind == "cancelled":
+                    logger.info("Transcription cancelled")
+                    return None
+                else:
+                    logger.error(f"Transcription failed: {payload}")
+                    return None
+
+        finally:
+            self._pending.pop(job_id, None)
+            shm.close()
+            shm.unlink()
+
+        if job.cancelled:
+            return None
+
+        logger.info(f"Transcription complete: {text[:50]}...")
+        if callback:
+            callback(text)
+        return text
+
+    def _stop_workers(self) -> None:
+        with self._worker_lock:
+            workers = [w for w in (self._worker, self._spare) if w]
+            self._worker = None
+            self._spare = None
+        for worker in workers:
+            worker.stop()
+
+    def shutdown(self) -> None:
+        super().shutdown()
+        self._stopping = True
+        self._stop_workers()
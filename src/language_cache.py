@@ -0,0 +1,83 @@
+import math
+import threading
+from typing import Optional, List, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LanguageCache:
+    """Remembers the detected language so detection runs once, not per utterance.
+
+    With scope "session" one language is shared by every utterance; with
+    scope "application" it is kept per focused window class, so a
+    Portuguese chat window and an English editor each keep their own.
+    """
+
+    SCOPES = ["session", "application"]
+
+    def __init__(
+        self,
+        scope: str = "session",
+        candidates: Optional[List[str]] = None,
+        min_confidence: float = 0.45
+    ):
+        self.scope = scope if scope in self.SCOPES else "session"
+        self.candidates = list(candidates or [])
+        self.min_confidence = min_confidence
+        self._languages: Dict[Optional[str], str] = {}
+        self._lock = threading.Lock()
+        self.utterances = 0
+        self.detections = 0
+
+    @classmethod
+    def from_config(cls, detection_config: dict) -> "LanguageCache":
+        return cls(
+            scope=detection_config.get("scope", "session"),
+            candidates=detection_config.get("candidates"),
+            min_confidence=detection_config.get("min_confidence", 0.45)
+        )
+
+    def _key(self, context: Optional[str]) -> Optional[str]:
+        return context if self.scope == "application" else None
+
+    def get(self, context: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            self.utterances += 1
+            return self._languages.get(self._key(context))
+
+    def invalidate(self, context: Optional[str] = None) -> None:
+        with self._lock:
+            self._languages.pop(self._key(context), None)
+
+    def is_confident(self, avg_logprob: float) -> bool:
+        # Mean token probability of the first segment decoded with the
+        # cached language; a wrong language drags it down sharply
+        return math.exp(avg_logprob) >= self.min_confidence
+
+    def choose(self, info) -> str:
+        # Restrict detection to the configured candidates, if any
+        language = info.language
+        if not self.candidates or language in self.candidates:
+            return language
+        probabilities = dict(getattr(info, "all_language_probs", None) or [])
+        return max(self.candidates, key=lambda lang: probabilities.get(lang, 0.0))
+
+    def store(self, context: Optional[str], language: str, probability: float) -> None:
+        with self._lock:
+            self.detections += 1
+            self._languages[self._key(context)] = language
+        logger.info(
+            f"Detected language {language} (p={probability:.2f}) for "
+            f"{self._key(context) or 'session'}; detection ran {self.detections} "
+            f"time(s) in {self.utterances} utterance(s)"
+        )
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "utterances": self.utterances,
+                "detections": self.detections,
+                "detection_rate": self.detections / self.utterances if self.utterances else 0.0,
+                "languages": {key or "session": lang for key, lang in self._languages.items()},
+            }
@@ -0,0 +1,111 @@
+"""Non-blocking logging for MyWhisper
+
+Every logger call only appends the record to an in-memory queue; a single
+listener thread formats it and writes to stderr and a rotating log file.
+The pynput and PortAudio callback threads therefore never wait on a
+terminal or disk.
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+import logging
+import logging.handlers
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves %-formatting to the listener thread.
+
+    The stock handler merges msg % args in the logging thread. Records whose
+    args are all immutable can safely be formatted later, so the caller only
+    pays for the queue put.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if record.exc_info is None and (
+            not args or (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE) for arg in args))
+        ):
+            return record
+        return super().prepare(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets one record per call site through every interval seconds.
+
+    The first record after a quiet period also reports how many were
+    suppressed, so a burst of xrun warnings becomes one line per interval.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        # (pathname, lineno) -> (last emitted at, suppressed since)
+        self._sites = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._sites.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._sites[key] = (last, suppressed + 1)
+                return False
+            self._sites[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar message(s) suppressed)"
+        return True
+
+
+def setup_logging(logging_config: Optional[dict] = None) -> logging.handlers.QueueListener:
+    logging_config = logging_config or {}
+    level = getattr(logging, str(logging_config.get("level", "INFO")).upper(), logging.INFO)
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    handlers = []
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    handlers.append(console)
+
+    log_file = logging_config.get("file")
+    if log_file:
+        log_file = os.path.expanduser(log_file)
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=logging_config.get("max_bytes", 5 * 1024 * 1024),
+                backupCount=logging_config.get("backup_count", 3),
+                encoding="utf-8"
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            console.handle(logging.makeLogRecord({
+                "msg": f"Cannot write log file {log_file}: {e}", "levelno": logging.WARNING,
+                "levelname": "WARNING", "name": __name__,
+            }))
+
+    # Unbounded, so a put never blocks even if the disk stalls
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,276 @@
+"""Process metrics in the Prometheus text format
+
+The instruments below are module-level, like loggers: the transcriber,
+audio capture, text inserter and hotkey manager update them
+unconditionally, which costs a lock and an addition. Nothing leaves the
+process unless metrics are enabled, in which case MetricsExporter serves
+them on localhost or rewrites a file for node_exporter's textfile
+collector. Gauges that are cheaper to sample than to keep current are
+filled in by collector callbacks just before each export.
+"""
+
+import os
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    TYPE = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, object] = {}
+
+    @staticmethod
+    def _key(labels: dict) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float]):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+                    )
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """collector() runs before each export to set sampled gauges"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+UTTERANCES = REGISTRY.register(Counter(
+    "mywhisper_utterances_total", "Transcriptions that produced text"))
+CANCELLATIONS = REGISTRY.register(Counter(
+    "mywhisper_cancellations_total", "Recordings and transcriptions thrown away, by reason"))
+INSERT_FAILURES = REGISTRY.register(Counter(
+    "mywhisper_insert_failures_total", "Text insertions that failed, by backend"))
+HOTKEY_EVENTS = REGISTRY.register(Counter(
+    "mywhisper_hotkey_events_total", "Hotkey actions fired, by action"))
+AUDIO_XRUNS = REGISTRY.register(Counter(
+    "mywhisper_audio_xruns_total", "Audio input overflows and underflows, by kind"))
+
+DECODE_SECONDS = REGISTRY.register(Histogram(
+    "mywhisper_decode_seconds", "Time to decode one utterance",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)))
+REALTIME_FACTOR = REGISTRY.register(Histogram(
+    "mywhisper_realtime_factor", "Decode time divided by audio duration",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2)))
+HOTKEY_TO_TEXT_SECONDS = REGISTRY.register(Histogram(
+    "mywhisper_hotkey_to_text_seconds", "From the stop request until the first text is inserted",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "mywhisper_batch_size", "Clips per decode dispatched by the batch scheduler",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16)))
+
+RESIDENT_MEMORY_BYTES = REGISTRY.register(Gauge(
+    "mywhisper_resident_memory_bytes", "Resident set size of the process, mostly the loaded model"))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "mywhisper_queue_depth", "Utterances recorded but not yet fully inserted"))
+MODEL_LOADED = REGISTRY.register(Gauge(
+    "mywhisper_model_loaded", "1 while the named model is in memory, 0 while it is unloaded"))
+LAST_RECORDING_XRUNS = REGISTRY.register(Gauge(
+    "mywhisper_last_recording_xruns", "Input overflows and underflows in the most recent recording"))
+
+
+class MetricsExporter:
+    """Serves REGISTRY over HTTP on localhost, or rewrites a file every interval seconds"""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        port: Optional[int] = None,
+        host: str = "127.0.0.1",
+        file: Optional[str] = None,
+        interval: float = 15.0
+    ):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.file = os.path.expanduser(file) if file else None
+        self.interval = interval
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, metrics_config: Optional[dict]) -> Optional["MetricsExporter"]:
+        metrics_config = metrics_config or {}
+        if not metrics_config.get("enabled", False):
+            return None
+        return cls(
+            port=metrics_config.get("port"),
+            host=metrics_config.get("host", "127.0.0.1"),
+            file=metrics_config.get("file"),
+            interval=metrics_config.get("interval_s", 15.0)
+        )
+
+    def start(self) -> bool:
+        if self.port:
+            # http.server costs tens of milliseconds to import; only pay when serving
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            registry = self.registry
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] not in ("/", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", CONTENT_TYPE)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    # Scrapes every few seconds would drown the log
+                    pass
+
+            try:
+                self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            except OSError as e:
+                logger.error(f"Cannot serve metrics on {self.host}:{self.port}: {e}")
+                return False
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+            self._thread.start()
+            logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+        elif self.file:
+            self._thread = threading.Thread(target=self._write_loop, name="metrics-file", daemon=True)
+            self._thread.start()
+            logger.info(f"Writing metrics to {self.file} every {self.interval:g} s")
+        else:
+            logger.error("Metrics enabled without a port or a file")
+            return False
+        return True
+
+    def write_file(self) -> None:
+        # Rename into place so a collector never reads a half-written file
+        tmp_path = f"{self.file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render())
+            os.replace(tmp_path, self.file)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {self.file}: {e}")
+
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self.write_file()
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        elif self.file and self._thread:
+            self._thread.join(2)
+            # Leave the final counts behind
+            self.write_file()
@@ -0,0 +1,102 @@
+import os
+from typing import Dict, List, Optional
+
+
+# params_m is the parameter count in millions, which the tray has always
+# shown; on disk the float16 weights take about twice that in MB. RTF is a
+# rough CPU/int8 real-time factor (decode seconds per second of audio) to
+# help pick a model; run benchmark.py for real numbers.
+MODEL_CATALOG: Dict[str, dict] = {
+    "tiny": {"label": "Tiny", "params_m": 39, "languages": "multilingual", "rtf": 0.03, "family": "Multilingual"},
+    "base": {"label": "Base", "params_m": 74, "languages": "multilingual", "rtf": 0.05, "family": "Multilingual"},
+    "small": {"label": "Small", "params_m": 244, "languages": "multilingual", "rtf": 0.15, "family": "Multilingual"},
+    "medium": {"label": "Medium", "params_m": 769, "languages": "multilingual", "rtf": 0.4, "family": "Multilingual"},
+    "large": {"label": "Large", "params_m": 1550, "languages": "multilingual", "rtf": 0.8, "family": "Multilingual"},
+    "large-v2": {"label": "Large v2", "params_m": 1550, "languages": "multilingual", "rtf": 0.8, "family": "Multilingual"},
+    "large-v3": {"label": "Large v3", "params_m": 1550, "languages": "multilingual", "rtf": 0.8, "family": "Multilingual"},
+    "large-v3-turbo": {"label": "Large v3 Turbo", "params_m": 809, "languages": "multilingual", "rtf": 0.25, "family": "Multilingual"},
+    "tiny.en": {"label": "Tiny", "params_m": 39, "languages": "en", "rtf": 0.03, "family": "English-only"},
+    "base.en": {"label": "Base", "params_m": 74, "languages": "en", "rtf": 0.05, "family": "English-only"},
+    "small.en": {"label": "Small", "params_m": 244, "languages": "en", "rtf": 0.15, "family": "English-only"},
+    "medium.en": {"label": "Medium", "params_m": 769, "languages": "en", "rtf": 0.4, "family": "English-only"},
+    "distil-small.en": {"label": "Distil Small", "params_m": 166, "languages": "en", "rtf": 0.08, "family": "Distilled"},
+    "distil-medium.en": {"label": "Distil Medium", "params_m": 394, "languages": "en", "rtf": 0.15, "family": "Distilled"},
+    "distil-large-v2": {"label": "Distil Large v2", "params_m": 756, "languages": "en", "rtf": 0.3, "family": "Distilled"},
+    "distil-large-v3": {"label": "Distil Large v3", "params_m": 756, "languages": "en", "rtf": 0.3, "family": "Distilled"},
+}
+
+FAMILIES = ["Multilingual", "English-only", "Distilled", "Custom"]
+
+
+def size_label(info: dict) -> Optional[str]:
+    # Catalog models are known by parameter count, custom ones by the size
+    # of their model.bin
+    if info.get("params_m"):
+        return f"{info['params_m']}M params"
+    if info.get("size_mb"):
+        return f"{info['size_mb']}MB"
+    return None
+
+
+class ModelRegistry:
+    def __init__(self, custom_models: Optional[Dict[str, str]] = None):
+        # name -> path of a converted CTranslate2 directory
+        self.custom_models = dict(custom_models or {})
+
+    @staticmethod
+    def is_model_dir(path: str) -> bool:
+        return os.path.isfile(os.path.join(os.path.expanduser(path), "model.bin"))
+
+    def is_valid(self, model_name: str) -> bool:
+        return (
+            model_name in MODEL_CATALOG
+            or model_name in self.custom_models
+            or self.is_model_dir(model_name)
+        )
+
+    def get_path(self, model_name: str) -> Optional[str]:
+        # Local directory for custom models, None for catalog names
+        if model_name in self.custom_models:
+            return os.path.expanduser(self.custom_models[model_name])
+        if model_name not in MODEL_CATALOG and self.is_model_dir(model_name):
+            return os.path.expanduser(model_name)
+        return None
+
+    def register(self, model_name: str, path: str) -> bool:
+        if not self.is_model_dir(path):
+            return False
+        self.custom_models[model_name] = path
+        return True
+
+    def list_models(self) -> List[str]:
+        return list(MODEL_CATALOG) + [name for name in self.custom_models if name not in MODEL_CATALOG]
+
+    def get_info(self, model_name: str) -> dict:
+        if model_name in MODEL_CATALOG:
+            return MODEL_CATALOG[model_name]
+
+        info = {
+            "label": os.path.basename(os.path.normpath(model_name)),
+            "params_m": None,
+            "size_mb": None,
+            "languages": "unknown",
+            "rtf": None,
+            "family": "Custom",
+        }
+        path = self.get_path(model_name)
+        if path:
+            model_bin = os.path.join(path, "model.bin")
+            if os.path.isfile(model_bin):
+                info["size_mb"] = round(os.path.getsize(model_bin) / (1024 * 1024))
+        return info
+
+    def describe(self, model_name: str) -> str:
+        info = self.get_info(model_name)
+        details = []
+        size = size_label(info)
+        if size:
+            details.append(size)
+        details.append(info["languages"])
+        if info["rtf"]:
+            details.append(f"~{info['rtf']} RTF")
+        return f"{info['label']} ({', '.join(details)})"
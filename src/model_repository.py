@@ -0,0 +1,162 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Optional, List, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRepository:
+    """Local, offline-first store of converted CTranslate2 Whisper models.
+
+    Each model lives in its own directory under one of the repository paths,
+    together with a checksums.json manifest written at prefetch time. Paths
+    are searched in order, so a read-only directory shared by every user on
+    the host (and therefore shared in the page cache) can sit in front of a
+    per-user one.
+    """
+
+    CHECKSUM_FILE = "checksums.json"
+    REQUIRED_FILES = ["model.bin", "config.json"]
+
+    def __init__(self, paths: List[str], offline: bool = False):
+        self.paths = [Path(p).expanduser() for p in paths]
+        self.offline = offline
+
+    @classmethod
+    def from_config(cls, repository_config: dict) -> "ModelRepository":
+        return cls(
+            repository_config.get("paths", []),
+            offline=repository_config.get("offline", False)
+        )
+
+    @staticmethod
+    def _dir_name(model_name: str) -> str:
+        # Hugging Face ids like "Systran/faster-whisper-base" become one level
+        return model_name.strip("/").replace("/", "--")
+
+    def _is_model_dir(self, path: Path) -> bool:
+        return all((path / name).is_file() for name in self.REQUIRED_FILES)
+
+    def resolve(self, model_name: str) -> Optional[str]:
+        # Pure filesystem lookup, never touches the network
+        for root in self.paths:
+            path = root / self._dir_name(model_name)
+            if self._is_model_dir(path):
+                return str(path)
+        return None
+
+    def list_models(self) -> Dict[str, str]:
+        models = {}
+        for root in self.paths:
+            if not root.is_dir():
+                continue
+            for path in sorted(root.iterdir()):
+                if path.name not in models and self._is_model_dir(path):
+                    models[path.name] = str(path)
+        return models
+
+    def _writable_root(self) -> Optional[Path]:
+        for root in reversed(self.paths):
+            try:
+                root.mkdir(parents=True, exist_ok=True)
+            except OSError:
+                continue
+            if os.access(root, os.W_OK):
+                return root
+        return None
+
+    def prefetch(self, model_name: str, root: Optional[str] = None) -> Optional[str]:
+        target_root = Path(root).expanduser() if root else self._writable_root()
+        if target_root is None:
+            logger.error("No writable model repository path configured")
+            return None
+
+        target = target_root / self._dir_name(Path(model_name).name if os.path.isdir(model_name) else model_name)
+        try:
+            target_root.mkdir(parents=True, exist_ok=True)
+            if os.path.isdir(model_name):
+                # An already converted CTranslate2 directory, e.g. a fine-tune
+                logger.info(f"Copying local model {model_name} to {target}")
+                shutil.copytree(model_name, target, dirs_exist_ok=True)
+            else:
+                from faster_whisper import download_model
+
+                logger.info(f"Downloading model {model_name} to {target}")
+                download_model(model_name, output_dir=str(target))
+
+            if not self._is_model_dir(target):
+                logger.error(f"{target} does not contain a CTranslate2 model")
+                return None
+
+            self._write_checksums(target)
+            self._make_shareable(target)
+            logger.info(f"Model {model_name} stored in {target}")
+            return str(target)
+
+        except Exception as e:
+            logger.error(f"Failed to prefetch model {model_name}: {e}")
+            return None
+
+    @staticmethod
+    def _file_checksum(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _model_files(self, path: Path) -> List[Path]:
+        return sorted(
+            p for p in path.rglob("*")
+            if p.is_file() and p.name != self.CHECKSUM_FILE and ".cache" not in p.parts
+        )
+
+    def _write_checksums(self, path: Path) -> None:
+        checksums = {
+            str(p.relative_to(path)): self._file_checksum(p)
+            for p in self._model_files(path)
+        }
+        with open(path / self.CHECKSUM_FILE, "w") as f:
+            json.dump(checksums, f, indent=4, sort_keys=True)
+
+    @staticmethod
+    def _make_shareable(path: Path) -> None:
+        # Readable by everyone so one copy can serve every user on the host
+        for p in [path, *path.rglob("*")]:
+            try:
+                os.chmod(p, 0o755 if p.is_dir() else 0o644)
+            except OSError:
+                pass
+
+    def verify(self, model_name: str) -> bool:
+        path_str = self.resolve(model_name)
+        if path_str is None:
+            logger.error(f"Model {model_name} not found in repository")
+            return False
+
+        path = Path(path_str)
+        manifest = path / self.CHECKSUM_FILE
+        if not manifest.is_file():
+            logger.error(f"No {self.CHECKSUM_FILE} for {model_name} in {path}")
+            return False
+
+        with open(manifest) as f:
+            expected = json.load(f)
+
+        ok = True
+        for name, checksum in expected.items():
+            file_path = path / name
+            if not file_path.is_file():
+                logger.error(f"{model_name}: missing {name}")
+                ok = False
+            elif self._file_checksum(file_path) != checksum:
+                logger.error(f"{model_name}: checksum mismatch for {name}")
+                ok = False
+
+        if ok:
+            logger.info(f"Model {model_name} verified ({len(expected)} files)")
+        return ok
@@ -0,0 +1,45 @@
+import os
+import time
+import threading
+
+
+class ProcessStats:
+    """RSS and CPU usage of this process, read from /proc"""
+
+    def __init__(self):
+        self._last_cpu = self._cpu_seconds()
+        self._last_time = time.monotonic()
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        try:
+            with open("/proc/self/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            # utime and stime, fields 14 and 15 of stat(5)
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, ValueError, IndexError):
+            return time.process_time()
+
+    @staticmethod
+    def rss_mb() -> float:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except (OSError, ValueError):
+            pass
+        return 0.0
+
+    def sample(self) -> dict:
+        # CPU percentage since the previous sample
+        now = time.monotonic()
+        cpu = self._cpu_seconds()
+        elapsed = now - self._last_time
+        percent = 100.0 * (cpu - self._last_cpu) / elapsed if elapsed > 0 else 0.0
+        self._last_cpu, self._last_time = cpu, now
+        return {
+            "rss_mb": round(self.rss_mb(), 1),
+            "cpu_percent": round(percent, 2),
+            "threads": threading.active_count(),
+        }
@@ -0,0 +1,242 @@
+"""On-demand profiling of the dictation path
+
+The hotkey, capture, decode and insert paths are wrapped in section()
+blocks. With no session running, section() returns a shared no-op context
+manager, so the hooks cost one global lookup and a function call.
+
+A session ("Profile next N utterances") ends after N utterances have been
+inserted. While it runs:
+
+- A sampler thread walks the Python stacks of threads that are inside a
+  section, every interval_ms.
+- In "cprofile" mode, each thread also runs its own cProfile.Profile
+  while it is inside a section.
+
+Results go to ~/.config/mywhisper/profiles/<timestamp>/:
+
+    stacks.collapsed           all threads, for flamegraph.pl or speedscope
+    threads/<name>.collapsed   one thread each
+    threads/<name>.prof/.txt   cProfile dump and summary per thread (cprofile mode)
+    summary.txt                samples per thread and section
+
+Each collapsed stack starts with the thread name and the section.
+"""
+
+import os
+import sys
+import time
+import threading
+import contextlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = "~/.config/mywhisper/profiles"
+MODES = ("sampling", "cprofile")
+
+_NULL_SECTION = contextlib.nullcontext()
+_session: Optional["ProfileSession"] = None
+_session_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _file_name(thread_name: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in thread_name)
+
+
+class _Section:
+    __slots__ = ("session", "name")
+
+    def __init__(self, session: "ProfileSession", name: str):
+        self.session = session
+        self.name = name
+
+    def __enter__(self):
+        self.session._enter(self.name)
+
+    def __exit__(self, *exc):
+        self.session._exit()
+        return False
+
+
+class ProfileSession:
+    def __init__(
+        self,
+        utterances: int,
+        mode: str = "sampling",
+        interval_ms: float = 5.0,
+        directory: str = DEFAULT_DIRECTORY
+    ):
+        self.remaining = max(1, utterances)
+        self.utterances = self.remaining
+        self.mode = mode if mode in MODES else "sampling"
+        self.interval = interval_ms / 1000.0
+        self.path = Path(os.path.expanduser(directory)) / time.strftime("%Y%m%d-%H%M%S")
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        # thread ident -> stack of section names the thread is inside
+        self._sections: Dict[int, List[str]] = {}
+        self._stacks: Counter = Counter()
+        self._profiles: Dict[int, object] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._cprofile_failed = False
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def section(self, name: str) -> _Section:
+        return _Section(self, name)
+
+    def _enter(self, name: str) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._sections.setdefault(ident, [])
+            stack.append(name)
+            self._thread_names[ident] = threading.current_thread().name
+            first = len(stack) == 1
+        if first and self.mode == "cprofile":
+            profile = self._profiles.get(ident)
+            if profile is None:
+                import cProfile
+                profile = self._profiles[ident] = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one cProfile at a time per interpreter
+                if not self._cprofile_failed:
+                    self._cprofile_failed = True
+                    logger.warning(f"cProfile unavailable on this thread ({e}); sampling only")
+
+    def _exit(self) -> None:
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._sections.get(ident)
+            if not stack:
+                return
+            stack.pop()
+            last = not stack
+            if last:
+                del self._sections[ident]
+        if last and self.mode == "cprofile" and ident in self._profiles:
+            self._profiles[ident].disable()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = {ident: sections[-1] for ident, sections in self._sections.items()}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, section in active.items():
+                frame = frames.get(ident)
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+                self._stacks[(self._thread_names.get(ident, str(ident)), section, tuple(labels))] += 1
+
+    def utterance_done(self) -> bool:
+        """Counts one finished utterance; True once the session is complete"""
+        with self._lock:
+            self.remaining -= 1
+            return self.remaining <= 0
+
+    def finish(self) -> Path:
+        self._stop.set()
+        self._sampler.join(1.0)
+        for profile in self._profiles.values():
+            profile.disable()
+
+        threads_dir = self.path / "threads"
+        threads_dir.mkdir(parents=True, exist_ok=True)
+        by_thread: Dict[str, List[str]] = {}
+        totals: Counter = Counter()
+        for (thread_name, section, labels), count in sorted(self._stacks.items()):
+            line = ";".join((thread_name, section) + labels) + f" {count}"
+            by_thread.setdefault(thread_name, []).append(line)
+            totals[(thread_name, section)] += count
+
+        with open(self.path / "stacks.collapsed", "w", encoding="utf-8") as f:
+            for lines in by_thread.values():
+                f.write("\n".join(lines) + "\n")
+        for thread_name, lines in by_thread.items():
+            with open(threads_dir / f"{_file_name(thread_name)}.collapsed", "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+        if self._profiles:
+            import pstats
+        for ident, profile in self._profiles.items():
+            name = _file_name(self._thread_names.get(ident, str(ident)))
+            try:
+                profile.dump_stats(str(threads_dir / f"{name}.prof"))
+                with open(threads_dir / f"{name}.txt", "w", encoding="utf-8") as f:
+                    pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(40)
+            except (TypeError, ValueError):
+                # A profile that never ran has no stats
+                continue
+
+        with open(self.path / "summary.txt", "w", encoding="utf-8") as f:
+            f.write(f"utterances: {self.utterances - max(0, self.remaining)}\n")
+            f.write(f"duration_s: {time.monotonic() - self.started_at:.1f}\n")
+            f.write(f"mode: {self.mode}, interval_ms: {self.interval * 1000:g}\n\n")
+            for (thread_name, section), count in totals.most_common():
+                f.write(f"{count:>8} samples  {thread_name} / {section}  (~{count * self.interval:.2f} s)\n")
+        return self.path
+
+
+def section(name: str):
+    """Context manager around one stage of the dictation path"""
+    session = _session
+    if session is None:
+        return _NULL_SECTION
+    return session.section(name)
+
+
+def start(
+    utterances: int,
+    mode: str = "sampling",
+    interval_ms: float = 5.0,
+    directory: str = DEFAULT_DIRECTORY
+) -> bool:
+    global _session
+    with _session_lock:
+        if _session is not None:
+            logger.warning("A profiling session is already running")
+            return False
+        _session = ProfileSession(utterances, mode, interval_ms, directory)
+    logger.info(f"Profiling the next {utterances} utterance(s) ({mode})")
+    return True
+
+
+def stop() -> Optional[Path]:
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is None:
+        return None
+    try:
+        path = session.finish()
+    except OSError as e:
+        logger.error(f"Failed to write profile: {e}")
+        return None
+    logger.info(f"Profile written to {path}")
+    return path
+
+
+def utterance_done() -> None:
+    session = _session
+    if session is not None and session.utterance_done():
+        # Written off the insertion path
+        threading.Thread(target=stop, name="profile-writer", daemon=True).start()
+
+
+def is_active() -> bool:
+    return _session is not None
@@ -1,17 +1,25 @@
-import pyautogui
-import pyperclip
 import time
 import logging
 import subprocess
 from typing import Optional
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
 
 class TextInserter:
     def __init__(self):
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.01
+        self._pyautogui = None
+
+    def _get_pyautogui(self):
+        # pyautogui is only needed for the fallback paths and is slow to
+        # import, so load it the first time one of them is taken
+        if self._pyautogui is None:
+            import pyautogui
+            pyautogui.FAILSAFE = False
+            pyautogui.PAUSE = 0.01
+            self._pyautogui = pyautogui
+        return self._pyautogui
 
     def insert_text(self, text: str, method: str = "clipboard") -> bool:
         if not text:
@@ -20,16 +28,20 @@ class TextInserter:
 
         try:
             if method == "clipboard":
-                return self._insert_via_clipboard(text)
+                inserted = self._insert_via_clipboard(text)
             elif method == "typing":
-                return self._insert_via_typing(text)
+                inserted = self._insert_via_typing(text)
             else:
                 logger.error(f"Unknown insertion method: {method}")
                 return False
 
         except Exception as e:
             logger.error(f"Failed to insert text: {e}")
-            return False
+            inserted = False
+
+        if not inserted:
+            metrics.INSERT_FAILURES.inc(backend=method)
+        return inserted
 
     def _insert_via_clipboard(self, text: str) -> bool:
         try:
@@ -43,6 +55,7 @@ class TextInserter:
                 logger.debug("Clipboard set via xclip")
             except (subprocess.CalledProcessError, FileNotFoundError):
                 # Fallback to pyperclip
+                import pyperclip
                 pyperclip.copy(text)
                 logger.debug("Clipboard set via pyperclip")
 
@@ -81,7 +94,7 @@ class TextInserter:
 
             # Fallback to pyautogui
             if not paste_success:
-                pyautogui.hotkey('ctrl', 'v')
+                self._get_pyautogui().hotkey('ctrl', 'v')
                 logger.info(f"Text inserted via pyautogui: {text[:50]}...")
 
             time.sleep(0.1)
@@ -94,7 +107,7 @@ class TextInserter:
 
     def _insert_via_typing(self, text: str) -> bool:
         try:
-            pyautogui.write(text, interval=0.01)
+            self._get_pyautogui().write(text, interval=0.01)
             logger.info(f"Text inserted via typing: {text[:50]}...")
             return True
 
@@ -102,12 +115,20 @@ class TextInserter:
             logger.error(f"Typing insertion failed: {e}")
             return False
 
+    def get_active_window_class(self) -> Optional[str]:
+        try:
+            result = subprocess.run(['xdotool', 'getactivewindow', 'getwindowclassname'],
+                                    capture_output=True, text=True, timeout=1, check=True)
+            return result.stdout.strip() or None
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+            return None
+
     def insert_at_cursor(self, text: str) -> bool:
         return self.insert_text(text, method="clipboard")
 
     def simulate_key(self, key: str) -> bool:
         try:
-            pyautogui.press(key)
+            self._get_pyautogui().press(key)
             return True
         except Exception as e:
             logger.error(f"Failed to simulate key {key}: {e}")
@@ -115,7 +136,7 @@ class TextInserter:
 
     def simulate_hotkey(self, *keys) -> bool:
         try:
-            pyautogui.hotkey(*keys)
+            self._get_pyautogui().hotkey(*keys)
             return True
         except Exception as e:
             logger.error(f"Failed to simulate hotkey {keys}: {e}")
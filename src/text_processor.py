@@ -0,0 +1,268 @@
+"""Post-processing of transcribed text: custom vocabulary and spoken commands
+
+All rules are compiled into one Aho-Corasick automaton over lower-cased
+words, so a pass over the text is linear in its length no matter how many
+rules there are. Matches are case-insensitive, whole-word and
+leftmost-longest: with rules for "new line" and "new line please", the
+longer one wins.
+
+The vocabulary file has one rule per line, `spoken words => replacement`;
+blank lines and lines starting with # are ignored, and `\\n` in a replacement
+is a line break:
+
+    kuber netties => Kubernetes
+    my whisper => MyWhisper
+    new paragraph => \\n\\n
+
+A replacement made only of punctuation or line breaks is a spoken command:
+it attaches to the preceding word ("hello period" -> "hello.") and swallows
+punctuation Whisper may already have put after the command word.
+"""
+
+import os
+import re
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+(?:'\w+)*")
+
+SPOKEN_COMMANDS = {
+    "new line": "\n",
+    "new paragraph": "\n\n",
+    "period": ".",
+    "full stop": ".",
+    "comma": ",",
+    "question mark": "?",
+    "exclamation mark": "!",
+    "exclamation point": "!",
+    "colon": ":",
+    "semicolon": ";",
+    "open parenthesis": "(",
+    "close parenthesis": ")",
+}
+
+# Replacements that attach to the text on their left / right
+_ATTACH_LEFT = set(".,;:!?)\n")
+_ATTACH_RIGHT = set("(\n")
+_TRAILING_PUNCTUATION = ".,;:!?"
+
+
+class _Node:
+    __slots__ = ("children", "fail", "output", "length")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.fail: Optional["_Node"] = None
+        # Replacement for a rule ending at this node, if any
+        self.output: Optional[str] = None
+        # Number of words on the path from the root
+        self.length = 0
+
+
+class VocabularyAutomaton:
+    """Aho-Corasick automaton whose alphabet is words, not characters"""
+
+    def __init__(self, rules: Dict[str, str]):
+        self.root = _Node()
+        self.rule_count = 0
+        for phrase, replacement in rules.items():
+            words = [word.lower() for word in WORD_RE.findall(phrase)]
+            if words:
+                self._add(words, replacement)
+        self._link()
+
+    def _add(self, words: List[str], replacement: str) -> None:
+        node = self.root
+        for word in words:
+            child = node.children.get(word)
+            if child is None:
+                child = _Node()
+                child.length = node.length + 1
+                node.children[word] = child
+            node = child
+        if node.output is None:
+            self.rule_count += 1
+        node.output = replacement
+
+    def _link(self) -> None:
+        # Breadth-first, so every failure target is finished before it is used
+        queue = []
+        for child in self.root.children.values():
+            child.fail = self.root
+            queue.append(child)
+        for node in queue:
+            for word, child in node.children.items():
+                fail = node.fail
+                while fail is not None and word not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[word] if fail is not None else self.root
+                queue.append(child)
+
+    def find(self, words: List[str]) -> List[Tuple[int, int, str]]:
+        """Non-overlapping (start, end, replacement) word spans, leftmost-longest"""
+        # Longest rule starting at each word index
+        longest: List[Optional[Tuple[int, str]]] = [None] * len(words)
+        node = self.root
+        for index, word in enumerate(words):
+            while node is not self.root and word not in node.children:
+                node = node.fail
+            node = node.children.get(word, self.root)
+            # Shorter rules ending here are reached through failure links
+            match = node
+            while match is not self.root:
+                if match.output is not None:
+                    start = index - match.length + 1
+                    if longest[start] is None or longest[start][0] < match.length:
+                        longest[start] = (match.length, match.output)
+                match = match.fail
+
+        spans = []
+        next_free = 0
+        for start, best in enumerate(longest):
+            if best is not None and start >= next_free:
+                length, replacement = best
+                spans.append((start, start + length, replacement))
+                next_free = start + length
+        return spans
+
+
+def parse_rules(text: str) -> Dict[str, str]:
+    rules = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=>" not in line:
+            logger.warning(f"Vocabulary line {number} has no '=>': {line}")
+            continue
+        phrase, replacement = line.split("=>", 1)
+        rules[phrase.strip()] = replacement.strip().replace("\\n", "\n")
+    return rules
+
+
+class TextProcessor:
+    """Applies the compiled vocabulary to each piece of text before insertion.
+
+    The vocabulary file is checked for changes at most once per
+    reload_interval seconds and recompiled in the background when its
+    mtime changes.
+    """
+
+    def __init__(
+        self,
+        vocabulary_file: Optional[str] = None,
+        spoken_commands: bool = True,
+        reload_interval: float = 1.0
+    ):
+        self.vocabulary_file = os.path.expanduser(vocabulary_file) if vocabulary_file else None
+        self.spoken_commands = spoken_commands
+        self.reload_interval = reload_interval
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+        self.automaton = self._compile({})
+        self._maybe_reload(force=True)
+
+    @classmethod
+    def from_config(cls, text_processing: Optional[dict]) -> Optional["TextProcessor"]:
+        text_processing = text_processing or {}
+        if not text_processing.get("enabled", False):
+            return None
+        return cls(
+            vocabulary_file=text_processing.get("vocabulary_file"),
+            spoken_commands=text_processing.get("spoken_commands", True)
+        )
+
+    def _compile(self, rules: Dict[str, str]) -> VocabularyAutomaton:
+        combined = dict(SPOKEN_COMMANDS) if self.spoken_commands else {}
+        # File rules override the built-in commands
+        combined.update(rules)
+        return VocabularyAutomaton(combined)
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not self.vocabulary_file or (not force and now - self._checked_at < self.reload_interval):
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.vocabulary_file).st_mtime
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime == self._mtime or self._reloading:
+                return
+            # Recorded up front so a broken file is not retried until it changes
+            self._mtime = mtime
+            self._reloading = True
+
+        if force:
+            self._reload(mtime)
+        else:
+            # Large vocabularies take a while to compile; keep inserting
+            # with the old automaton meanwhile
+            threading.Thread(target=self._reload, args=(mtime,), daemon=True).start()
+
+    def _reload(self, mtime: Optional[float]) -> None:
+        try:
+            rules = {}
+            if mtime is not None:
+                with open(self.vocabulary_file, encoding="utf-8") as f:
+                    rules = parse_rules(f.read())
+            start = time.perf_counter()
+            automaton = self._compile(rules)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to load vocabulary {self.vocabulary_file}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._reloading = False
+
+        with self._lock:
+            self.automaton = automaton
+        logger.info(f"Compiled {automaton.rule_count} text rules in {elapsed_ms:.1f} ms")
+
+    def process(self, text: str) -> str:
+        self._maybe_reload()
+        with self._lock:
+            automaton = self.automaton
+
+        tokens = list(WORD_RE.finditer(text))
+        spans = automaton.find([token.group().lower() for token in tokens])
+        if not spans:
+            return text
+
+        pieces = []
+        position = 0
+        for start, end, replacement in spans:
+            begin = tokens[start].start()
+            finish = tokens[end - 1].end()
+            before = text[position:begin]
+            is_command = replacement and not any(char.isalnum() for char in replacement)
+
+            if is_command and replacement[0] in _ATTACH_LEFT:
+                before = before.rstrip()
+                if replacement[0] in _TRAILING_PUNCTUATION:
+                    # The spoken punctuation replaces whatever Whisper guessed
+                    before = before.rstrip(_TRAILING_PUNCTUATION)
+                if not before and pieces:
+                    pieces[-1] = pieces[-1].rstrip(" ")
+            pieces.append(before)
+            pieces.append(replacement)
+
+            if is_command:
+                # Whisper often punctuates the command word itself
+                while finish < len(text) and text[finish] in _TRAILING_PUNCTUATION:
+                    finish += 1
+                if replacement[-1] in _ATTACH_RIGHT:
+                    while finish < len(text) and text[finish] == " ":
+                        finish += 1
+            position = finish
+
+        pieces.append(text[position:])
+        return "".join(pieces)
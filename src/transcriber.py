@@ -1,72 +1,397 @@
-from faster_whisper import WhisperModel
 import os
+import gc
+import time
 import threading
-from typing import Optional, Callable
+from typing import Optional, Callable, List, Union
 import logging
+from .model_repository import ModelRepository
+from .model_registry import ModelRegistry, MODEL_CATALOG
+from .language_cache import LanguageCache
+from .process_stats import ProcessStats
+from .batch_scheduler import BatchScheduler
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+# A WAV path (deleted once transcribed) or 16 kHz mono float32 samples
+AudioInput = Union[str, "np.ndarray"]
+
+# Dictation is interactive; file and archive jobs run in the background and
+# pause between segments whenever an interactive job is decoding
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+
+class TranscriptionJob:
+    """Cancellation token for a single transcription.
+
+    The token is checked between segments, so a cancelled job stops decoding
+    after the segment in flight and never delivers any more text.
+    """
+
+    def __init__(self, audio: AudioInput, context: Optional[str] = None, priority: str = INTERACTIVE):
+        self.audio = audio
+        # Focused application, used to keep a detected language per app
+        self.context = context
+        self.priority = priority
+        self.created_at = time.monotonic()
+        self._cancelled = threading.Event()
+        self._cancel_callbacks: List[Callable[[], None]] = []
+
+    def add_cancel_callback(self, callback: Callable[[], None]) -> None:
+        self._cancel_callbacks.append(callback)
+        if self.cancelled:
+            callback()
+
+    def cancel(self, reason: str = "user") -> None:
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        metrics.CANCELLATIONS.inc(reason=reason)
+        for callback in self._cancel_callbacks:
+            callback()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
 
 class WhisperTranscriber:
-    AVAILABLE_MODELS = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]
+    AVAILABLE_MODELS = list(MODEL_CATALOG)
+    PREEMPT_POLICIES = ["none", "oldest", "all"]
 
     def __init__(
         self,
         model_name: str = "base",
         language: str = "en",
-        device: str = "auto"
+        device: str = "auto",
+        preempt_policy: str = "none",
+        load_async: bool = False,
+        model_repository: Optional[ModelRepository] = None,
+        model_registry: Optional[ModelRegistry] = None,
+        compute_type: str = "auto",
+        cpu_threads: int = 0,
+        beam_size: int = 5,
+        num_workers: int = 1,
+        long_audio: Optional[dict] = None,
+        language_detection: Optional[dict] = None,
+        idle_unload: Optional[dict] = None,
+        batching: Optional[dict] = None
     ):
-        self.model_name = model_name if model_name in self.AVAILABLE_MODELS else "base"
+        self.model_registry = model_registry or ModelRegistry()
+        if self.model_registry.is_valid(model_name):
+            self.model_name = model_name
+        else:
+            logger.warning(f"Unknown model {model_name}, falling back to base")
+            self.model_name = "base"
         self.language = language
+        # Only consulted when language is "auto"
+        self.language_cache = LanguageCache.from_config(language_detection or {})
         self.device = device
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        # Long recordings are split at silences and the chunks decoded
+        # concurrently, one per model worker
+        long_audio = long_audio or {}
+        self.long_audio_enabled = long_audio.get("enabled", True)
+        self.long_audio_min_duration = long_audio.get("min_duration_s", 60)
+        self.num_workers = max(1, num_workers)
+        # Concurrent short clips are decoded together when enabled
+        self.batch_scheduler = BatchScheduler.from_config(batching, self._decode_batch)
+        self._tokenizers = {}
+        self.preempt_policy = preempt_policy if preempt_policy in self.PREEMPT_POLICIES else "none"
+        self.model_repository = model_repository
         self.model = None
-        self._load_model()
+        self._jobs: List[TranscriptionJob] = []
+        self._jobs_lock = threading.Lock()
+        self._model_ready = threading.Event()
+        # Interactive jobs in progress; background jobs wait while any are
+        self._interactive_active = 0
+        self._priority_cond = threading.Condition()
 
-    def _load_model(self) -> None:
+        # Idle policy: release the model (or swap in a small standby model)
+        # after a quiet period, reload when the next recording starts
+        idle_unload = idle_unload or {}
+        self.idle_unload_after = (
+            idle_unload.get("after_minutes", 10) * 60 if idle_unload.get("enabled") else 0
+        )
+        self.standby_model = idle_unload.get("standby_model")
+        self._idle_lock = threading.Lock()
+        self._idle_timer: Optional[threading.Timer] = None
+        # Serializes releasing and reloading the model
+        self._swap_lock = threading.Lock()
+        self._unloaded = False
+        self._reloading = False
+        self._reload_started_at = 0.0
+        self.unload_count = 0
+        self.reload_times_ms: List[float] = []
+        self.reload_wait_ms = 0.0
+
+        if load_async:
+            # Let the caller get on with startup; transcribe() waits for us
+            threading.Thread(target=self._load_model_in_background, daemon=True).start()
+        else:
+            self._load_model()
+
+    def _resolve_model(self, model_name: Optional[str] = None) -> tuple:
+        # Prefer a local repository path, which skips the Hugging Face
+        # cache/hub lookup (and its network probes) entirely
+        model_name = model_name or self.model_name
+        start = time.perf_counter()
+        source, local_files_only = model_name, False
+        custom_path = self.model_registry.get_path(model_name)
+        if custom_path:
+            source, local_files_only = custom_path, True
+        elif self.model_repository:
+            path = self.model_repository.resolve(model_name)
+            if path:
+                source, local_files_only = path, True
+            elif self.model_repository.offline:
+                local_files_only = True
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Model {model_name} resolved to {source} in {elapsed_ms:.1f} ms")
+        return source, local_files_only
+
+    def _load_model_in_background(self) -> None:
         try:
-            logger.info(f"Loading Whisper model: {self.model_name}")
-            # Faster-whisper uses different model format
-            # Use int8 for CPU, auto for GPU to let it choose the best type
-            if self.device == "cpu" or self.device == "auto":
-                compute_type = "int8"
-            else:
-                compute_type = "auto"
+            self._load_model()
+        except Exception:
+            # Already logged by _load_model
+            pass
 
-            self.model = WhisperModel(
-                self.model_name,
-                device=self.device,
-                compute_type=compute_type
-            )
-            logger.info(f"Model {self.model_name} loaded successfully with compute type: {compute_type}")
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._model_ready.wait(timeout)
+
+    def _create_model(self, model_name: str):
+        from faster_whisper import WhisperModel
+
+        logger.info(f"Loading Whisper model: {model_name}")
+        # Faster-whisper uses different model format
+        # Unless tuned, use int8 for CPU, auto for GPU to let it choose the best type
+        if self.compute_type and self.compute_type != "auto":
+            compute_type = self.compute_type
+        elif self.device == "cpu" or self.device == "auto":
+            compute_type = "int8"
+        else:
+            compute_type = "auto"
+
+        model_source, local_files_only = self._resolve_model(model_name)
+
+        model = WhisperModel(
+            model_source,
+            device=self.device,
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
+            local_files_only=local_files_only
+        )
+        logger.info(f"Model {model_name} loaded successfully with compute type: {compute_type}")
+        # Keyed by id(model), which a new model may reuse
+        self._tokenizers.clear()
+        return model
+
+    def _load_model(self) -> None:
+        self._model_ready.clear()
+        try:
+            self.model = self._create_model(self.model_name)
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             raise
+        finally:
+            self._model_ready.set()
+            self._schedule_idle_unload()
+
+    def _schedule_idle_unload(self) -> None:
+        if not self.idle_unload_after:
+            return
+        with self._idle_lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+            self._idle_timer = threading.Timer(self.idle_unload_after, self._unload_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _unload_if_idle(self) -> None:
+        # The swap lock keeps a reload from prepare() from running between
+        # the idle check and the release
+        with self._swap_lock:
+            with self._idle_lock:
+                self._idle_timer = None
+                if self._unloaded or self._reloading or self.get_active_job_count():
+                    return
+                self._unloaded = True
+                # Jobs are registered before they look at the model, so a job
+                # that missed the count above waits on _model_ready for the
+                # reload its prepare() starts, not on a model about to vanish
+                self._model_ready.clear()
+
+            rss_before = ProcessStats.rss_mb()
+            self._release_model()
+        gc.collect()
+        self.unload_count += 1
+        logger.info(
+            f"Model {self.model_name} idle for {self.idle_unload_after / 60:.0f} min, released "
+            f"{rss_before - ProcessStats.rss_mb():.0f} MB (RSS now {ProcessStats.rss_mb():.0f} MB)"
+        )
+
+    def _release_model(self) -> None:
+        standby = None
+        if self.standby_model and self.standby_model != self.model_name:
+            try:
+                standby = self._create_model(self.standby_model)
+            except Exception as e:
+                logger.error(f"Failed to load standby model {self.standby_model}: {e}")
+        self.model = standby
+        if standby is not None:
+            self._model_ready.set()
+
+    def _restore_model(self) -> None:
+        self.model = self._create_model(self.model_name)
+
+    def prepare(self) -> None:
+        """Call when a recording starts: reloads an unloaded model while the user speaks"""
+        with self._idle_lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if not self._unloaded or self._reloading:
+                return
+            self._reloading = True
+            self._reload_started_at = time.perf_counter()
+        threading.Thread(target=self._reload, daemon=True).start()
+
+    def _reload(self) -> None:
+        reloaded = False
+        try:
+            with self._swap_lock:
+                self._restore_model()
+            reloaded = True
+            elapsed_ms = (time.perf_counter() - self._reload_started_at) * 1000
+            self.reload_times_ms.append(elapsed_ms)
+            logger.info(f"Model {self.model_name} reloaded in {elapsed_ms:.0f} ms")
+        except Exception as e:
+            logger.error(f"Failed to reload model: {e}")
+        finally:
+            with self._idle_lock:
+                # On failure stay unloaded, so the next recording retries
+                self._unloaded = not reloaded
+                self._reloading = False
+            self._model_ready.set()
+            if not self.get_active_job_count():
+                self._schedule_idle_unload()
+
+    @property
+    def model_ready(self) -> bool:
+        """True while a model is in memory and can decode"""
+        return self.model is not None
+
+    def get_memory_stats(self) -> dict:
+        reloads = self.reload_times_ms
+        return {
+            "model_loaded": not self._unloaded,
+            "standby_model": self.standby_model if self._unloaded and self.model else None,
+            "rss_mb": round(ProcessStats.rss_mb(), 1),
+            "unload_count": self.unload_count,
+            "reload_count": len(reloads),
+            "last_reload_ms": round(reloads[-1], 1) if reloads else None,
+            "avg_reload_ms": round(sum(reloads) / len(reloads), 1) if reloads else None,
+            # Part of the last reload that was not hidden behind recording
+            "last_reload_wait_ms": round(self.reload_wait_ms, 1),
+        }
 
     def transcribe(
         self,
-        audio_file: str,
-        callback: Optional[Callable[[str], None]] = None
+        audio: AudioInput,
+        callback: Optional[Callable[[str], None]] = None,
+        segment_callback: Optional[Callable[[str], None]] = None,
+        job: Optional[TranscriptionJob] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
     ) -> Optional[str]:
+        if job is None:
+            job = self.create_job(audio)
+
+        interactive = job.priority == INTERACTIVE
+        if interactive:
+            with self._priority_cond:
+                self._interactive_active += 1
+        start = time.perf_counter()
+        try:
+            text = self._transcribe(audio, callback, segment_callback, job, progress_callback)
+        finally:
+            if interactive:
+                with self._priority_cond:
+                    self._interactive_active -= 1
+                    self._priority_cond.notify_all()
+            self._finish_job(job)
+        if text:
+            elapsed = time.perf_counter() - start
+            metrics.UTTERANCES.inc()
+            metrics.DECODE_SECONDS.observe(elapsed)
+            if not isinstance(audio, str) and len(audio):
+                metrics.REALTIME_FACTOR.observe(elapsed / (len(audio) / 16000))
+        return text
+
+    def _transcribe(
+        self,
+        audio: AudioInput,
+        callback: Optional[Callable[[str], None]],
+        segment_callback: Optional[Callable[[str], None]],
+        job: TranscriptionJob,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> Optional[str]:
+        # No-op unless the idle policy released the model
+        self.prepare()
+        if self._unloaded and self.model:
+            logger.info(f"Model still reloading, decoding with standby model {self.standby_model}")
+        if not self._model_ready.is_set():
+            logger.info("Waiting for model to finish loading")
+            reloading = self._unloaded
+            start = time.perf_counter()
+            self._model_ready.wait()
+            if reloading:
+                self.reload_wait_ms = (time.perf_counter() - start) * 1000
+
         if not self.model:
             logger.error("Model not loaded")
             return None
 
-        if not os.path.exists(audio_file):
-            logger.error(f"Audio file not found: {audio_file}")
+        is_file = isinstance(audio, str)
+        if is_file and not os.path.exists(audio):
+            logger.error(f"Audio file not found: {audio}")
             return None
 
         try:
-            logger.info(f"Transcribing audio file: {audio_file}")
+            if job.cancelled:
+                logger.info("Transcription cancelled before decoding started")
+                return None
 
-            # Faster-whisper returns segments
-            segments, info = self.model.transcribe(
-                audio_file,
-                language=self.language,
-                beam_size=5
-            )
+            if is_file:
+                logger.info(f"Transcribing audio file: {audio}")
+            else:
+                logger.info(f"Transcribing {len(audio) / 16000:.1f} s of audio")
 
-            # Combine all segments into text
-            text = " ".join(segment.text for segment in segments).strip()
+            self._yield_to_interactive(job)
+            if not is_file and self._should_chunk(audio):
+                text = self._decode_chunked(audio, segment_callback, job, progress_callback)
+            elif (
+                not is_file and self.batch_scheduler and job.priority == INTERACTIVE
+                and self.batch_scheduler.accepts(audio)
+            ):
+                # Background jobs bypass it: one paused while holding the
+                # scheduler would block the very jobs it is waiting for
+                text = self.batch_scheduler.run(
+                    audio,
+                    job,
+                    lambda: self._decode(audio, segment_callback, job, progress_callback),
+                    segment_callback
+                )
+            else:
+                text = self._decode(audio, segment_callback, job, progress_callback)
+
+            if text is None:
+                logger.info("Transcription cancelled")
+                return None
 
             logger.info(f"Transcription complete: {text[:50]}...")
 
@@ -80,26 +405,327 @@ class WhisperTranscriber:
             return None
 
         finally:
-            try:
-                os.remove(audio_file)
-                logger.debug(f"Deleted temporary audio file: {audio_file}")
-            except:
-                pass
+            if is_file:
+                try:
+                    os.remove(audio)
+                    logger.debug(f"Deleted temporary audio file: {audio}")
+                except:
+                    pass
+
+    def _decode(
+        self,
+        audio: AudioInput,
+        segment_callback: Optional[Callable[[str], None]],
+        job: TranscriptionJob,
+        progress_callback: Optional[Callable[[float], None]]
+    ) -> Optional[str]:
+        # Faster-whisper returns segments
+        if self.language == "auto":
+            segments, info = self._transcribe_auto_language(audio, job)
+        else:
+            segments, info = self.model.transcribe(
+                audio,
+                language=self.language,
+                beam_size=self.beam_size
+            )
+
+        # Segments are decoded lazily, so hand each one out as soon as
+        # it is ready instead of waiting for the whole clip
+        parts = []
+        for segment in segments:
+            self._yield_to_interactive(job)
+            if job.cancelled:
+                break
+            if progress_callback and info.duration:
+                progress_callback(min(1.0, segment.end / info.duration))
+            piece = self._format_segment(segment.text, first=not parts)
+            if not piece:
+                continue
+            parts.append(piece)
+            if segment_callback and not job.cancelled:
+                segment_callback(piece)
+
+        if job.cancelled:
+            # Closing the generator stops CTranslate2 from decoding
+            # any further windows of this clip
+            segments.close()
+            return None
+
+        return "".join(parts)
+
+    def _transcribe_auto_language(self, audio: AudioInput, job: TranscriptionJob) -> tuple:
+        # Decode with the cached language and only fall back to detection
+        # (an extra encoder pass) when the first segment looks wrong
+        cached = self.language_cache.get(job.context)
+        if cached:
+            segments, info = self.model.transcribe(audio, language=cached, beam_size=self.beam_size)
+            first = next(segments, None)
+            if first is None or self.language_cache.is_confident(first.avg_logprob):
+                return self._prepend_segment(first, segments), info
+            segments.close()
+            logger.info(f"Low confidence with cached language {cached}, re-detecting")
+            self.language_cache.invalidate(job.context)
+
+        segments, info = self.model.transcribe(audio, language=None, beam_size=self.beam_size)
+        language = self.language_cache.choose(info)
+        self.language_cache.store(job.context, language, info.language_probability)
+        if language != info.language:
+            segments.close()
+            segments, info = self.model.transcribe(audio, language=language, beam_size=self.beam_size)
+        return segments, info
+
+    def _tokenizer(self, language: Optional[str]):
+        from faster_whisper.tokenizer import Tokenizer
+
+        model = self.model
+        key = (id(model), language)
+        if key not in self._tokenizers:
+            self._tokenizers[key] = Tokenizer(
+                model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language
+            )
+        return self._tokenizers[key]
+
+    def _batch_languages(self, encoder_output, jobs: List[TranscriptionJob]) -> List[str]:
+        if self.language != "auto":
+            return [self.language] * len(jobs)
+        from types import SimpleNamespace
+
+        languages = [self.language_cache.get(job.context) for job in jobs]
+        if all(languages):
+            return languages
+        # One detection pass for the whole batch, even if only some need it
+        detections = self.model.model.detect_language(encoder_output)
+        for index, (job, detected) in enumerate(zip(jobs, detections)):
+            if languages[index]:
+                continue
+            probs = [(token[2:-2], prob) for token, prob in detected]
+            info = SimpleNamespace(language=probs[0][0], language_probability=probs[0][1], all_language_probs=probs)
+            languages[index] = self.language_cache.choose(info)
+            self.language_cache.store(job.context, languages[index], info.language_probability)
+        return languages
+
+    def _decode_batch(self, clips: list) -> List[Optional[str]]:
+        """Decodes (samples, job) clips of at most 30 s with one encoder and one generate call"""
+        import numpy as np
+        from faster_whisper.audio import pad_or_trim
+
+        model = self.model
+        # Every clip is padded to the 30 s window the encoder expects
+        features = np.stack([pad_or_trim(model.feature_extractor(samples)) for samples, _ in clips])
+        encoder_output = model.encode(features)
+        languages = self._batch_languages(encoder_output, [job for _, job in clips])
+
+        tokenizers = [self._tokenizer(language) for language in languages]
+        prompts = [model.get_prompt(tokenizer, [], without_timestamps=True) for tokenizer in tokenizers]
+        results = model.model.generate(encoder_output, prompts, beam_size=self.beam_size)
+
+        texts = []
+        for (_, job), tokenizer, result in zip(clips, tokenizers, results):
+            if job.cancelled:
+                texts.append(None)
+            else:
+                texts.append(self._format_segment(tokenizer.decode(result.sequences_ids[0]), first=True))
+        return texts
+
+    @staticmethod
+    def _prepend_segment(first, segments):
+        if first is not None:
+            yield first
+        yield from segments
+
+    def _resolve_language(self, audio, job: TranscriptionJob) -> Optional[str]:
+        if self.language != "auto":
+            return self.language
+        language = self.language_cache.get(job.context)
+        if language is None:
+            # Detection only looks at the first 30 s window
+            segments, info = self.model.transcribe(audio[:30 * 16000], language=None)
+            segments.close()
+            language = self.language_cache.choose(info)
+            self.language_cache.store(job.context, language, info.language_probability)
+        return language
+
+    def uses_language_context(self) -> bool:
+        return self.language == "auto" and self.language_cache.scope == "application"
+
+    def get_language_stats(self) -> dict:
+        return self.language_cache.get_stats()
+
+    def _should_chunk(self, audio) -> bool:
+        return (
+            self.long_audio_enabled
+            and self.num_workers > 1
+            and len(audio) / 16000 >= self.long_audio_min_duration
+        )
+
+    def _decode_chunk(self, samples, job: TranscriptionJob, language: Optional[str]) -> Optional[str]:
+        segments, _ = self.model.transcribe(
+            samples,
+            language=language,
+            beam_size=self.beam_size,
+            condition_on_previous_text=False
+        )
+        texts = []
+        for segment in segments:
+            self._yield_to_interactive(job)
+            if job.cancelled:
+                segments.close()
+                return None
+            texts.append(segment.text.strip())
+        return " ".join(t for t in texts if t)
+
+    def _decode_chunked(
+        self,
+        audio,
+        segment_callback: Optional[Callable[[str], None]],
+        job: TranscriptionJob,
+        progress_callback: Optional[Callable[[float], None]]
+    ) -> Optional[str]:
+        from concurrent.futures import ThreadPoolExecutor
+        from .chunking import split_at_silences, merge_chunk_texts
+
+        chunks = split_at_silences(audio, 16000)
+        logger.info(f"Decoding {len(chunks)} chunks on {self.num_workers} workers")
+        # Every chunk must use the same language
+        language = self._resolve_language(audio, job)
+
+        parts = []
+        previous = ""
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            futures = [
+                executor.submit(self._decode_chunk, audio[start:end], job, language)
+                for start, end in chunks
+            ]
+            # Chunks finish out of order but are delivered in order, so the
+            # first one can be inserted while the rest are still decoding
+            for index, future in enumerate(futures):
+                chunk_text = future.result()
+                if chunk_text is None or job.cancelled:
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                if progress_callback:
+                    progress_callback((index + 1) / len(futures))
+
+                merged = merge_chunk_texts(previous, chunk_text)
+                previous = chunk_text
+                piece = self._format_segment(merged, first=not parts)
+                if not piece:
+                    continue
+                parts.append(piece)
+                if segment_callback:
+                    segment_callback(piece)
+
+        return "".join(parts)
+
+    @staticmethod
+    def _format_segment(text: str, first: bool) -> str:
+        # Segment texts carry their own leading space; normalize it so that
+        # pieces can be inserted one after another and still read correctly
+        text = text.strip()
+        if not text or first or text[0] in ".,;:!?)]}'\"":
+            return text
+        return " " + text
 
     def transcribe_async(
         self,
-        audio_file: str,
-        callback: Callable[[str], None]
-    ) -> None:
+        audio: AudioInput,
+        callback: Callable[[str], None],
+        segment_callback: Optional[Callable[[str], None]] = None
+    ) -> TranscriptionJob:
+        job = self.create_job(audio)
         thread = threading.Thread(
             target=self.transcribe,
-            args=(audio_file, callback),
+            args=(audio, callback, segment_callback, job),
             daemon=True
         )
         thread.start()
+        return job
+
+    def create_job(
+        self,
+        audio: AudioInput,
+        context: Optional[str] = None,
+        priority: str = INTERACTIVE
+    ) -> TranscriptionJob:
+        job = TranscriptionJob(audio, context, priority)
+        if priority == BACKGROUND:
+            job.add_cancel_callback(self._wake_background)
+        with self._jobs_lock:
+            # A new utterance only preempts jobs of its own priority
+            same_priority = [old_job for old_job in self._jobs if old_job.priority == priority]
+            if self.preempt_policy == "oldest" and same_priority:
+                preempted = [same_priority[0]]
+            elif self.preempt_policy == "all":
+                preempted = same_priority
+            else:
+                preempted = []
+            self._jobs.append(job)
+
+        for old_job in preempted:
+            logger.info("Preempting older transcription for new utterance")
+            old_job.cancel("preempted")
+        return job
+
+    def _finish_job(self, job: TranscriptionJob) -> None:
+        with self._jobs_lock:
+            if job in self._jobs:
+                self._jobs.remove(job)
+            idle = not self._jobs
+        if idle:
+            self._schedule_idle_unload()
+
+    def _yield_to_interactive(self, job: TranscriptionJob) -> None:
+        # Background jobs pause here, between segments, while interactive
+        # ones decode. The model's CPU threads are fixed when it is loaded,
+        # so pausing is how the interactive job gets all of them
+        if job.priority != BACKGROUND:
+            return
+        with self._priority_cond:
+            if self._interactive_active and not job.cancelled:
+                logger.debug("Background transcription paused for interactive utterance")
+            while self._interactive_active and not job.cancelled:
+                self._priority_cond.wait()
+
+    def _wake_background(self) -> None:
+        with self._priority_cond:
+            self._priority_cond.notify_all()
+
+    def transcribe_file(self, path: str, priority: str = BACKGROUND) -> Optional[str]:
+        """Transcribes any audio file ffmpeg can read; the file is left in place"""
+        from faster_whisper import decode_audio
+
+        try:
+            samples = decode_audio(path, sampling_rate=16000)
+        except Exception as e:
+            logger.error(f"Cannot read audio file {path}: {e}")
+            return None
+        logger.info(f"Transcribing {path} ({len(samples) / 16000:.0f} s) with {priority} priority")
+        return self.transcribe(samples, job=self.create_job(samples, priority=priority))
+
+    def cancel_all(self, priority: Optional[str] = None) -> int:
+        """Cancels the jobs of the given priority, or every job"""
+        with self._jobs_lock:
+            jobs = [job for job in self._jobs if priority is None or job.priority == priority]
+        for job in jobs:
+            job.cancel()
+        if jobs:
+            logger.info(f"Cancelled {len(jobs)} transcription(s)")
+        return len(jobs)
+
+    def get_active_job_count(self) -> int:
+        with self._jobs_lock:
+            return len(self._jobs)
+
+    def set_preempt_policy(self, policy: str) -> None:
+        if policy in self.PREEMPT_POLICIES:
+            self.preempt_policy = policy
+            logger.info(f"Preempt policy set to: {policy}")
+        else:
+            logger.warning(f"Invalid preempt policy: {policy}")
 
     def change_model(self, model_name: str) -> bool:
-        if model_name not in self.AVAILABLE_MODELS:
+        if not self.model_registry.is_valid(model_name):
             logger.error(f"Invalid model name: {model_name}")
             return False
 
@@ -109,20 +735,30 @@ class WhisperTranscriber:
 
         try:
             # Clear existing model
-            del self.model
+            self.model = None
             self.model_name = model_name
-            self._load_model()
+            with self._swap_lock:
+                self._load_model()
+            self._unloaded = False
             return True
         except Exception as e:
             logger.error(f"Failed to change model: {e}")
             return False
 
+    def shutdown(self) -> None:
+        with self._idle_lock:
+            if self._idle_timer:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self.idle_unload_after = 0
+        self.cancel_all()
+
     def set_language(self, language: str) -> None:
         self.language = language
         logger.info(f"Language set to: {language}")
 
     def get_available_models(self) -> list:
-        return self.AVAILABLE_MODELS
+        return self.model_registry.list_models()
 
     def get_current_model(self) -> str:
         return self.model_name
\ No newline at end of file
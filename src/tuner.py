@@ -0,0 +1,215 @@
+import gc
+import os
+import json
+import math
+import time
+import wave
+import platform
+import itertools
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def host_key() -> str:
+    # Tuning results are only valid for this CPU and these library versions
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+
+    import ctranslate2
+    import faster_whisper
+
+    return f"{cpu} | ctranslate2 {ctranslate2.__version__} | faster-whisper {faster_whisper.__version__}"
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def pareto_front(results: List[dict]) -> List[dict]:
+    # Points not beaten on both latency (lower) and quality (higher)
+    front = []
+    for result in results:
+        dominated = any(
+            other["rtf"] <= result["rtf"] and other["quality"] >= result["quality"]
+            and (other["rtf"] < result["rtf"] or other["quality"] > result["quality"])
+            for other in results
+        )
+        if not dominated:
+            front.append(result)
+    return sorted(front, key=lambda r: r["rtf"])
+
+
+class HardwareTuner:
+    COMPUTE_TYPES = ["int8", "int8_float32", "int16", "float32"]
+
+    def __init__(
+        self,
+        fixtures: List[str],
+        models: List[str],
+        compute_types: Optional[List[str]] = None,
+        thread_counts: Optional[List[int]] = None,
+        beam_sizes: Optional[List[int]] = None,
+        language: str = "en",
+        quality_tolerance: float = 0.02,
+        model_repository=None,
+        model_registry=None
+    ):
+        self.fixtures = fixtures
+        self.models = models
+        self.compute_types = compute_types or self.COMPUTE_TYPES
+        cores = os.cpu_count() or 4
+        self.thread_counts = thread_counts or sorted({max(1, cores // 4), max(1, cores // 2), cores})
+        self.beam_sizes = beam_sizes or [1, 5]
+        self.language = language
+        self.quality_tolerance = quality_tolerance
+        self.model_repository = model_repository
+        self.model_registry = model_registry
+
+    @staticmethod
+    def find_fixtures(directory: str) -> List[str]:
+        path = Path(directory).expanduser()
+        return sorted(str(p) for p in path.glob("*.wav")) if path.is_dir() else []
+
+    @staticmethod
+    def _reference(fixture: str) -> Optional[str]:
+        reference = Path(fixture).with_suffix(".txt")
+        return reference.read_text().strip() if reference.is_file() else None
+
+    def _quality(self, fixture: str, text: str, segments: list) -> float:
+        # 1 - WER when a reference transcript sits next to the fixture,
+        # otherwise the mean token probability reported by the decoder
+        reference = self._reference(fixture)
+        if reference is not None:
+            return max(0.0, 1.0 - word_error_rate(reference, text))
+        if not segments:
+            return 0.0
+        return sum(math.exp(s.avg_logprob) for s in segments) / len(segments)
+
+    def run(self) -> List[dict]:
+        from .transcriber import WhisperTranscriber
+
+        audio_seconds = 0.0
+        for fixture in self.fixtures:
+            with wave.open(fixture, 'rb') as wf:
+                audio_seconds += wf.getnframes() / float(wf.getframerate())
+
+        results = []
+        transcriber = None
+        for model_name, compute_type, cpu_threads in itertools.product(
+            self.models, self.compute_types, self.thread_counts
+        ):
+            # Free the previous candidate first; two large models at once
+            # would double the peak RSS
+            transcriber = None
+            gc.collect()
+            try:
+                transcriber = WhisperTranscriber(
+                    model_name=model_name,
+                    language=self.language,
+                    device="cpu",
+                    model_repository=self.model_repository,
+                    model_registry=self.model_registry,
+                    compute_type=compute_type,
+                    cpu_threads=cpu_threads
+                )
+            except Exception as e:
+                logger.warning(f"Skipping {model_name}/{compute_type}: {e}")
+                continue
+
+            # The first decode pays one-time allocations; keep them out of the RTF
+            segments, _ = transcriber.model.transcribe(
+                self.fixtures[0], language=self.language, beam_size=self.beam_sizes[0]
+            )
+            list(segments)
+
+            for beam_size in self.beam_sizes:
+                decode_time = 0.0
+                qualities = []
+                for fixture in self.fixtures:
+                    start = time.perf_counter()
+                    segments, _ = transcriber.model.transcribe(
+                        fixture, language=self.language, beam_size=beam_size
+                    )
+                    segments = list(segments)
+                    decode_time += time.perf_counter() - start
+                    text = " ".join(s.text.strip() for s in segments)
+                    qualities.append(self._quality(fixture, text, segments))
+
+                result = {
+                    "model": model_name,
+                    "compute_type": compute_type,
+                    "cpu_threads": cpu_threads,
+                    "beam_size": beam_size,
+                    "rtf": round(decode_time / audio_seconds, 4),
+                    "quality": round(sum(qualities) / len(qualities), 4),
+                }
+                logger.info(f"Tuning result: {result}")
+                results.append(result)
+
+        transcriber = None
+        gc.collect()
+        return results
+
+    def choose(self, results: List[dict]) -> Optional[dict]:
+        # Fastest point on the front whose quality is close to the best seen
+        front = pareto_front(results)
+        if not front:
+            return None
+        best_quality = max(r["quality"] for r in front)
+        for result in front:
+            if result["quality"] >= best_quality - self.quality_tolerance:
+                return result
+        return front[-1]
+
+
+class TuningCache:
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            path = Path.home() / ".config" / "mywhisper" / "tuning_cache.json"
+        self.path = Path(path)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._load().get(key)
+
+    def put(self, key: str, results: List[dict], chosen: dict) -> None:
+        cache = self._load()
+        cache[key] = {
+            "results": results,
+            "chosen": chosen,
+            "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(cache, f, indent=4)
@@ -1,47 +1,232 @@
 """Wayland-compatible window for MyWhisper"""
 
 import sys
+import time
 import threading
-from PyQt6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QLabel, QSystemTrayIcon, QMenu
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtWidgets import (
+    QWidget, QPushButton, QVBoxLayout, QLabel, QSystemTrayIcon, QMenu,
+    QDialog, QLineEdit, QListWidget, QListWidgetItem
+)
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal, pyqtSlot, QTimer
 from PyQt6.QtGui import QIcon, QAction
 
 import logging
+from . import profiling
+from .transcriber import INTERACTIVE
 
 logger = logging.getLogger(__name__)
 
 
-class RecordingThread(QThread):
-    finished = pyqtSignal(str)
+class CaptureWorker(QObject):
+    """Owns the audio stream; start/stop requests are queued in order"""
+
+    recording = pyqtSignal()
+    trimming = pyqtSignal()
+    captured = pyqtSignal(object)
     error = pyqtSignal(str)
 
-    def __init__(self, audio_capture, transcriber):
+    def __init__(self, audio_capture):
         super().__init__()
         self.audio_capture = audio_capture
-        self.transcriber = transcriber
 
-    def run(self):
+    @pyqtSlot()
+    def start(self):
         try:
-            audio_file = self.audio_capture.stop_recording()
-            if audio_file:
-                text = self.transcriber.transcribe(audio_file)
-                if text:
-                    self.finished.emit(text)
-                else:
-                    self.error.emit("No text transcribed")
+            self.audio_capture.start_recording()
+            self.recording.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+
+    @pyqtSlot()
+    def stop(self):
+        try:
+            self.trimming.emit()
+            audio = self.audio_capture.stop_recording(as_array=True)
+            if audio is not None:
+                self.captured.emit(audio)
             else:
                 self.error.emit("No audio captured")
         except Exception as e:
             self.error.emit(str(e))
 
+    @pyqtSlot()
+    def cancel(self):
+        self.audio_capture.cancel_recording()
+
+
+class TranscriptionWorker(QObject):
+    """Decodes captured audio and inserts the text, off the GUI thread"""
+
+    decoding = pyqtSignal(int)
+    inserting = pyqtSignal()
+    segment = pyqtSignal(str)
+    finished = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, transcriber, text_inserter, streaming: bool = False, text_processor=None, history=None):
+        super().__init__()
+        self.transcriber = transcriber
+        self.text_inserter = text_inserter
+        self.streaming = streaming
+        self.text_processor = text_processor
+        self.history = history
+        self._inserted = []
+        self._insert_s = 0.0
+
+    @pyqtSlot(object, object)
+    def process(self, audio, job):
+        # job was created when capture stopped, so a newer utterance can
+        # preempt or cancel it while it still waits behind this thread
+        try:
+            self.decoding.emit(0)
+            self._inserted = []
+            self._insert_s = 0.0
+            start = time.perf_counter()
+            with profiling.section("decode"):
+                text = self.transcriber.transcribe(
+                    audio,
+                    segment_callback=self._insert_segment if self.streaming else None,
+                    job=job,
+                    progress_callback=lambda fraction: self.decoding.emit(int(fraction * 100))
+                )
+            if job.cancelled:
+                return
+            if not text:
+                self.error.emit("No text transcribed")
+                return
+            decode_s = time.perf_counter() - start
+            if not self.streaming:
+                self.inserting.emit()
+                self._insert(text)
+            self._record(audio, decode_s, time.perf_counter() - start)
+            if self._inserted:
+                profiling.utterance_done()
+            self.finished.emit(text)
+        except Exception as e:
+            self.error.emit(str(e))
+
+    def _insert_segment(self, text):
+        self.inserting.emit()
+        self._insert(text)
+        self.segment.emit(text)
+
+    def _insert(self, text):
+        start = time.perf_counter()
+        with profiling.section("insert"):
+            if self.text_processor:
+                text = self.text_processor.process(text)
+            if self.text_inserter.insert_at_cursor(text):
+                self._inserted.append(text.strip())
+        self._insert_s += time.perf_counter() - start
+
+    def _record(self, audio, decode_s, total_s):
+        if self.history and self._inserted:
+            is_array = not isinstance(audio, str)
+            self.history.record({
+                "text": " ".join(self._inserted),
+                "model": self.transcriber.get_current_model(),
+                "language": self.transcriber.language,
+                "audio": audio if is_array and self.history.store_audio else None,
+                "audio_s": len(audio) / 16000 if is_array else None,
+                "decode_ms": decode_s * 1000,
+                "insert_ms": self._insert_s * 1000,
+                "total_ms": total_s * 1000,
+            })
+
+
+class HistoryDialog(QDialog):
+    """Searchable transcript history; activating an entry inserts it again"""
+
+    def __init__(self, app_controller, parent=None):
+        super().__init__(parent)
+        self.app_controller = app_controller
+        self.setWindowTitle('MyWhisper History')
+        self.resize(420, 320)
+
+        layout = QVBoxLayout()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText('Search transcripts...')
+        self.search_box.textChanged.connect(self.refresh)
+        layout.addWidget(self.search_box)
+
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.results)
+        self.setLayout(layout)
+
+    def refresh(self):
+        self.results.clear()
+        for entry in self.app_controller.search_history(self.search_box.text()):
+            when = time.strftime('%m-%d %H:%M', time.localtime(entry['created_at']))
+            item = QListWidgetItem(f"{when}  {entry['text']}")
+            item.setData(Qt.ItemDataRole.UserRole, entry['text'])
+            self.results.addItem(item)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.search_box.setFocus()
+        super().showEvent(event)
+
+    def on_item_activated(self, item):
+        # Hide first so the insertion lands in the previously focused window
+        self.hide()
+        self.app_controller.reinsert(item.data(Qt.ItemDataRole.UserRole))
+
 
 class WaylandWindow(QWidget):
+    start_requested = pyqtSignal()
+    stop_requested = pyqtSignal()
+    cancel_requested = pyqtSignal()
+    transcribe_requested = pyqtSignal(object, object)
+
     def __init__(self, app_controller):
         super().__init__()
         self.app_controller = app_controller
         self.is_recording = False
+        self.history_dialog = None
         self.init_ui()
         self.create_tray_icon()
+        self.create_workers()
+
+    def create_workers(self):
+        # Two long-lived threads: capture stays responsive to the next
+        # utterance while the previous one is still being decoded
+        self.capture_thread = QThread(self)
+        self.capture_worker = CaptureWorker(self.app_controller.audio_capture)
+        self.capture_worker.moveToThread(self.capture_thread)
+
+        self.transcription_thread = QThread(self)
+        self.transcription_worker = TranscriptionWorker(
+            self.app_controller.transcriber,
+            self.app_controller.text_inserter,
+            streaming=self.app_controller.streaming_insert,
+            text_processor=self.app_controller.text_processor,
+            history=self.app_controller.history
+        )
+        self.transcription_worker.moveToThread(self.transcription_thread)
+
+        self.start_requested.connect(self.capture_worker.start)
+        self.stop_requested.connect(self.capture_worker.stop)
+        self.cancel_requested.connect(self.capture_worker.cancel)
+        self.capture_worker.captured.connect(self.on_captured)
+        self.transcribe_requested.connect(self.transcription_worker.process)
+
+        self.capture_worker.recording.connect(self.on_recording)
+        self.capture_worker.trimming.connect(self.on_trimming)
+        self.capture_worker.error.connect(self.on_transcription_error)
+        self.transcription_worker.decoding.connect(self.on_decoding)
+        self.transcription_worker.inserting.connect(self.on_inserting)
+        self.transcription_worker.finished.connect(self.on_transcription_complete)
+        self.transcription_worker.error.connect(self.on_transcription_error)
+
+        self.capture_thread.start()
+        self.transcription_thread.start()
+
+    def shutdown_workers(self):
+        self.app_controller.transcriber.cancel_all()
+        for thread in (self.capture_thread, self.transcription_thread):
+            thread.quit()
+            thread.wait(2000)
 
     def init_ui(self):
         self.setWindowTitle('MyWhisper')
@@ -130,6 +315,18 @@ class WaylandWindow(QWidget):
             show_action.triggered.connect(self.toggle_visibility)
             menu.addAction(show_action)
 
+            history_action = QAction("History...", self)
+            history_action.triggered.connect(self.show_history)
+            menu.addAction(history_action)
+
+            cancel_action = QAction("Cancel Transcription", self)
+            cancel_action.triggered.connect(self.cancel_transcription)
+            menu.addAction(cancel_action)
+
+            profile_action = QAction("Profile Next 5 Utterances", self)
+            profile_action.triggered.connect(lambda: self.app_controller.profile_next(5))
+            menu.addAction(profile_action)
+
             quit_action = QAction("Quit", self)
             quit_action.triggered.connect(self.quit_application)
             menu.addAction(quit_action)
@@ -144,6 +341,13 @@ class WaylandWindow(QWidget):
         except Exception as e:
             logger.error(f"Failed to create tray icon: {e}")
 
+    def show_history(self):
+        if self.history_dialog is None:
+            self.history_dialog = HistoryDialog(self.app_controller, self)
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+        self.history_dialog.activateWindow()
+
     def on_tray_activated(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
             self.toggle_visibility()
@@ -168,36 +372,39 @@ class WaylandWindow(QWidget):
     def start_recording(self):
         if not self.is_recording:
             self.is_recording = True
-            self.status_label.setText('🔴 Recording...')
             self.record_button.setText('Release to Stop')
-            try:
-                self.app_controller.audio_capture.start_recording()
-                logger.info("Started recording (GUI button)")
-            except Exception as e:
-                logger.error(f"Failed to start recording: {e}")
-                self.status_label.setText(f'Error: {str(e)[:20]}')
-                self.is_recording = False
+            self.app_controller.transcriber.prepare()
+            self.start_requested.emit()
+            logger.info("Started recording (GUI button)")
 
     def stop_recording(self):
         if self.is_recording:
             self.is_recording = False
-            self.status_label.setText('Processing...')
             self.record_button.setText('Hold to Record')
-
-            # Create and start recording thread
-            self.recording_thread = RecordingThread(
-                self.app_controller.audio_capture,
-                self.app_controller.transcriber
-            )
-            self.recording_thread.finished.connect(self.on_transcription_complete)
-            self.recording_thread.error.connect(self.on_transcription_error)
-            self.recording_thread.start()
+            self.stop_requested.emit()
             logger.info("Stopped recording (GUI button)")
 
+    def on_captured(self, audio):
+        # Register the job right away, as AppCore._submit does, so the
+        # preempt policy sees it before the previous decode has finished
+        job = self.app_controller.transcriber.create_job(audio)
+        self.transcribe_requested.emit(audio, job)
+
+    def on_recording(self):
+        self.status_label.setText('🔴 Recording...')
+
+    def on_trimming(self):
+        self.status_label.setText('Processing...')
+
+    def on_decoding(self, percent):
+        self.status_label.setText(f'Transcribing... {percent}%')
+
+    def on_inserting(self):
+        self.status_label.setText('Inserting...')
+
     def on_transcription_complete(self, text):
         logger.info(f"Transcription complete: {text[:50]}...")
         self.status_label.setText(f'✓ Transcribed')
-        self.app_controller.text_inserter.insert_at_cursor(text)
 
         # Reset status after 2 seconds
         QTimer.singleShot(2000, lambda: self.status_label.setText('Ready'))
@@ -207,7 +414,17 @@ class WaylandWindow(QWidget):
         self.status_label.setText(f'Error: {error[:20]}')
         QTimer.singleShot(3000, lambda: self.status_label.setText('Ready'))
 
+    def cancel_transcription(self):
+        if self.is_recording:
+            self.is_recording = False
+            self.record_button.setText('Hold to Record')
+            self.cancel_requested.emit()
+        self.app_controller.transcriber.cancel_all(INTERACTIVE)
+        self.status_label.setText('Cancelled')
+        QTimer.singleShot(2000, lambda: self.status_label.setText('Ready'))
+
     def quit_application(self):
+        self.shutdown_workers()
         self.app_controller.quit()
 
     def closeEvent(self, event):
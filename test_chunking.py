@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Chunk boundaries and overlap merging for long recordings (src/chunking.py)"""
+
+import pytest
+
+from src.chunking import merge_chunk_texts, split_at_silences
+
+SAMPLE_RATE = 16000
+
+
+def tone_with_gaps(duration_s: float, period_s: float, gap_s: float):
+    # A loud tone, silent for gap_s at the end of every period_s
+    np = pytest.importorskip("numpy")
+    t = np.arange(int(duration_s * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = 0.5 * np.sin(2 * np.pi * 220 * t).astype(np.float32)
+    audio[(t % period_s) >= period_s - gap_s] = 0.0
+    return audio
+
+
+def seconds(chunks):
+    return [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in chunks]
+
+
+def test_short_audio_is_one_chunk():
+    audio = tone_with_gaps(10, 5, 1)
+    assert split_at_silences(audio) == [(0, len(audio))]
+
+
+def test_cuts_in_silences_closest_to_target():
+    # One-second silences centred on 4.5 s, 9.5 s, 14.5 s, ...
+    audio = tone_with_gaps(60, 5, 1)
+    chunks = seconds(split_at_silences(audio, target_chunk_s=20, max_chunk_s=28, overlap_s=0.3))
+
+    assert len(chunks) == 3
+    cuts = [19.5, 39.5]
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == 60
+    for (_, end), (start, _), cut in zip(chunks, chunks[1:], cuts):
+        # Each side of a cut reaches overlap_s past it
+        assert end == pytest.approx(cut + 0.3, abs=0.05)
+        assert start == pytest.approx(cut - 0.3, abs=0.05)
+
+
+def test_hard_cut_at_max_length_without_silences():
+    # The 0.2 s gaps are shorter than min_silence_ms, so none qualify
+    audio = tone_with_gaps(70, 1, 0.2)
+    chunks = seconds(split_at_silences(audio, target_chunk_s=20, max_chunk_s=28, overlap_s=0.3))
+
+    assert chunks == [
+        pytest.approx((0, 28.3)),
+        pytest.approx((27.7, 56.3)),
+        pytest.approx((55.7, 70)),
+    ]
+    for start, end in chunks:
+        assert end - start <= 28 + 2 * 0.3 + 1e-6
+
+
+def test_merge_drops_repeated_overlap():
+    assert merge_chunk_texts("the quick brown fox", "brown fox jumps over") == "jumps over"
+
+
+def test_merge_ignores_case_and_punctuation():
+    assert merge_chunk_texts("Hello, World.", "world. Again we go") == "Again we go"
+
+
+def test_merge_prefers_longest_overlap():
+    assert merge_chunk_texts("a b a b", "a b a b c") == "c"
+
+
+def test_merge_keeps_text_without_overlap():
+    assert merge_chunk_texts("the quick brown fox", "jumps over the dog") == "jumps over the dog"
+
+
+def test_merge_limits_overlap_search():
+    previous = "one two three four five"
+    current = "one two three four five six"
+    assert merge_chunk_texts(previous, current, max_overlap_words=3) == current
+
+
+def test_merge_does_not_match_on_punctuation_alone():
+    assert merge_chunk_texts("well -", "- right") == "- right"
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Headless mode must run without a display and without any GUI toolkit
+
+Run directly to print the steady-state RSS and idle CPU of a headless
+instance, or under pytest to check that nothing GUI-related is imported.
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+GUI_MODULES = [
+    "pynput",
+    "pyautogui",
+    "pyperclip",
+    "pystray",
+    "PIL",
+    "PyQt6",
+    "tkinter",
+]
+
+# Builds a headless app, opens its control socket and, once the model is
+# loaded, asks for status over the socket twice: the second reply covers an
+# idle interval only
+PROBE = """
+import sys, json, time
+import main
+from src.headless import send_command
+
+app = main.MyWhisperApp(headless=True, control_socket=sys.argv[1])
+app.control_server.start()
+app.transcriber.wait_until_ready()
+send_command(sys.argv[1], "status")
+time.sleep(float(sys.argv[2]))
+status = json.loads(send_command(sys.argv[1], "status"))
+app.control_server.stop()
+app.transcriber.shutdown()
+print(json.dumps({"status": status, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_headless_probe(idle_s: float = 0.0) -> dict:
+    with tempfile.TemporaryDirectory() as home:
+        env = {
+            key: value for key, value in os.environ.items()
+            if key not in ("DISPLAY", "WAYLAND_DISPLAY", "XDG_SESSION_TYPE")
+        }
+        env["HOME"] = home
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, os.path.join(home, "mywhisper.sock"), str(idle_s)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=300
+        )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_headless_runs_without_display_or_gui_modules():
+    probe = run_headless_probe()
+    loaded = [name for name in GUI_MODULES if name in probe["modules"]]
+    assert not loaded, f"headless mode imported: {loaded}"
+    assert probe["status"]["state"] == "idle"
+    assert probe["status"]["rss_mb"] > 0
+
+
+if __name__ == "__main__":
+    status = run_headless_probe(idle_s=float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)["status"]
+    print(f"model ready: {status['model_ready']}")
+    print(f"RSS:         {status['rss_mb']:.1f} MB")
+    print(f"idle CPU:    {status['cpu_percent']:.2f} %")
+    print(f"threads:     {status['threads']}")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Replays recorded sessions through the full pipeline (see replay.py)
+
+Sessions are read from $MYWHISPER_REPLAY_SESSIONS, or
+~/.config/mywhisper/sessions by default. Each one must reach its expected
+text within max_wer and stay within its latency budgets.
+"""
+
+import os
+import json
+import glob
+from pathlib import Path
+
+import pytest
+
+from replay import ReplayHarness
+
+SESSIONS_DIR = os.environ.get(
+    "MYWHISPER_REPLAY_SESSIONS",
+    str(Path.home() / ".config" / "mywhisper" / "sessions")
+)
+SESSIONS = sorted(glob.glob(os.path.join(SESSIONS_DIR, "*.json")))
+
+
+def test_stage_latencies_from_events(tmp_path):
+    session = tmp_path / "session.json"
+    session.write_text(json.dumps({
+        "audio": "unused.wav",
+        "events": [],
+        "expected": "Hello, world.",
+        "budgets_ms": {"final_text_ms": 500}
+    }))
+    harness = ReplayHarness(str(session))
+    harness.events = [
+        ("action_start", 1.000),
+        ("stream_start", 1.010),
+        ("action_stop", 3.000),
+        ("stream_stop", 3.050),
+        ("insert", 3.400),
+        ("insert", 3.700),
+        ("decode", 3.060),
+        ("decode_end", 3.650),
+    ]
+
+    report = harness._report("hello world")
+
+    utterance = report["utterances"][0]
+    assert utterance["hotkey_to_capture_ms"] == pytest.approx(10, abs=0.1)
+    assert utterance["release_to_capture_stop_ms"] == pytest.approx(50, abs=0.1)
+    assert utterance["decode_ms"] == pytest.approx(590, abs=0.1)
+    assert utterance["first_text_ms"] == pytest.approx(400, abs=0.1)
+    assert report["wer"] == 0
+    assert report["failures"] == ["final_text_ms 700 ms over budget 500 ms"]
+
+
+@pytest.mark.skipif(not SESSIONS, reason=f"no replay sessions in {SESSIONS_DIR}")
+@pytest.mark.parametrize("session", SESSIONS, ids=os.path.basename)
+def test_replay_session(session):
+    for module in ("numpy", "faster_whisper", "pynput"):
+        pytest.importorskip(module)
+
+    report = ReplayHarness(session, speed=float(os.environ.get("MYWHISPER_REPLAY_SPEED", "1"))).run()
+    assert report["passed"], report
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Startup-time budget for MyWhisper
+
+Run directly to print a `python -X importtime` report for main.py, or under
+pytest to enforce the budget.
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Importing main.py must not pull in anything heavy
+IMPORT_BUDGET_MS = 150
+# Launch until the hotkey listener is running, independent of model load
+HOTKEY_READY_BUDGET_MS = 400
+
+HEAVY_MODULES = [
+    "faster_whisper",
+    "ctranslate2",
+    "sounddevice",
+    "numpy",
+    "pynput",
+    "pyautogui",
+    "pystray",
+    "PIL",
+    "PyQt6",
+]
+
+
+def run_python(*args, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120
+    )
+
+
+def import_time_report() -> list:
+    # Returns (cumulative_us, module) for every module imported by main.py
+    result = run_python("-X", "importtime", "-c", "import main")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), module.strip()))
+    return rows
+
+
+def loaded_modules() -> set:
+    result = run_python("-c", "import sys, json, main; print(json.dumps(sorted(sys.modules)))")
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_main_import_skips_heavy_modules():
+    modules = loaded_modules()
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    assert not loaded, f"main.py eagerly imports: {loaded}"
+
+
+def test_main_import_within_budget():
+    rows = import_time_report()
+    main_us = next(us for us, module in rows if module == "main")
+    assert main_us / 1000 < IMPORT_BUDGET_MS, f"import main took {main_us / 1000:.0f} ms"
+
+
+def test_hotkey_ready_within_budget():
+    import pytest
+
+    if not os.environ.get("DISPLAY"):
+        pytest.skip("hotkey listener needs an X display")
+    for module in ("pynput", "faster_whisper", "sounddevice"):
+        pytest.importorskip(module)
+
+    env = dict(os.environ, XDG_SESSION_TYPE="x11")
+    result = run_python("main.py", "--startup-benchmark", env=env)
+    timings = json.loads(result.stdout.splitlines()[-1])
+    assert timings["hotkey_ready_ms"] < HOTKEY_READY_BUDGET_MS, timings
+
+
+if __name__ == "__main__":
+    rows = sorted(import_time_report(), reverse=True)
+    print(f"{'cumulative ms':>14}  module")
+    for us, module in rows[:25]:
+        print(f"{us / 1000:>14.1f}  {module}")
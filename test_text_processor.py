@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Vocabulary automaton and spoken commands (src/text_processor.py)"""
+
+import os
+import time
+
+from src.text_processor import TextProcessor, VocabularyAutomaton, parse_rules
+
+
+def test_leftmost_longest_match():
+    automaton = VocabularyAutomaton({
+        "new line": "\n",
+        "new line please": "A",
+        "line please go": "B",
+    })
+    # The longer rule at the leftmost start wins; the overlapping one is dropped
+    assert automaton.find("a new line please go".split()) == [(1, 4, "A")]
+    assert automaton.find("new line new line".split()) == [(0, 2, "\n"), (2, 4, "\n")]
+    assert automaton.find("nothing to see".split()) == []
+
+
+def test_shorter_rule_found_through_failure_link():
+    automaton = VocabularyAutomaton({"my whisper app": "A", "whisper": "B"})
+    assert automaton.find("my whisper is here".split()) == [(1, 2, "B")]
+
+
+def test_vocabulary_is_case_insensitive_and_whole_word():
+    processor = TextProcessor(spoken_commands=False)
+    processor.automaton = processor._compile({"kuber netties": "Kubernetes", "cat": "dog"})
+    assert processor.process("Kuber Netties is great") == "Kubernetes is great"
+    assert processor.process("concatenate the cat") == "concatenate the dog"
+
+
+def test_spoken_punctuation_attaches_left():
+    processor = TextProcessor()
+    assert processor.process("hello period") == "hello."
+    assert processor.process("hello comma world") == "hello, world"
+    assert processor.process("Is it done question mark") == "Is it done?"
+
+
+def test_spoken_command_replaces_whisper_punctuation():
+    processor = TextProcessor()
+    assert processor.process("Hello period.") == "Hello."
+    assert processor.process("Hello. New line. World") == "Hello.\nWorld"
+    assert processor.process("first new paragraph second") == "first\n\nsecond"
+
+
+def test_parentheses():
+    processor = TextProcessor()
+    assert processor.process("call open parenthesis maybe close parenthesis now") == "call (maybe) now"
+
+
+def test_spoken_commands_can_be_disabled():
+    processor = TextProcessor(spoken_commands=False)
+    assert processor.process("hello period") == "hello period"
+
+
+def test_parse_rules():
+    rules = parse_rules("# comment\n\nmy whisper => MyWhisper\nbroken line\nnew para => \\n\\n\n")
+    assert rules == {"my whisper": "MyWhisper", "new para": "\n\n"}
+
+
+def test_vocabulary_file_reloads_on_mtime_change(tmp_path):
+    vocabulary = tmp_path / "vocabulary.txt"
+    vocabulary.write_text("my whisper => MyWhisper\n", encoding="utf-8")
+    processor = TextProcessor(str(vocabulary), reload_interval=0)
+    assert processor.process("use my whisper") == "use MyWhisper"
+
+    vocabulary.write_text("my whisper => My-Whisper\n", encoding="utf-8")
+    mtime = os.stat(vocabulary).st_mtime + 5
+    os.utime(vocabulary, (mtime, mtime))
+
+    # The new rules are compiled in the background; the old ones apply meanwhile
+    deadline = time.monotonic() + 5
+    while processor.process("use my whisper") != "use My-Whisper":
+        assert time.monotonic() < deadline, "vocabulary was not reloaded"
+        time.sleep(0.01)